@@ -1,6 +1,8 @@
 import cv2
 import mediapipe as mp
 
+from hand_classifier import classify_results
+
 # Uncomment if you want ESP32 connection
 # import serial
 # esp = serial.Serial('COM3', 115200)  # Replace with your ESP32 port
@@ -35,25 +37,7 @@ hands = mp_hands.Hands(
 # Open Webcam
 cap = cv2.VideoCapture(0)
 
-def get_finger_status(hand_landmarks):
-    """Return which fingers are up"""
-    finger_status = []
-    tip_ids = [4, 8, 12, 16, 20]  # Thumb, Index, Middle, Ring, Pinky
-
-    # Thumb
-    if hand_landmarks.landmark[tip_ids[0]].x < hand_landmarks.landmark[tip_ids[0] - 1].x:
-        finger_status.append(1)
-    else:
-        finger_status.append(0)
-
-    # Other fingers
-    for id in range(1, 5):
-        if hand_landmarks.landmark[tip_ids[id]].y < hand_landmarks.landmark[tip_ids[id] - 2].y:
-            finger_status.append(1)
-        else:
-            finger_status.append(0)
-
-    return finger_status
+DEVICE_NAMES = {"light": "Light", "fan": "Fan", "tv": "TV", "ac": "AC"}
 
 while cap.isOpened():
     ret, frame = cap.read()
@@ -67,37 +51,14 @@ while cap.isOpened():
     command = "No Command"
 
     if result.multi_hand_landmarks:
-        for hand_landmarks in result.multi_hand_landmarks:
+        # Finger states for every hand come from the shared classifier; the
+        # Light/Fan/TV/AC mapping is a lookup table in hand_classifier.GESTURE_COMMANDS
+        for hand_landmarks, hand in zip(result.multi_hand_landmarks, classify_results(result)):
             mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            fingers = get_finger_status(hand_landmarks)
-
-            # ============================
-            # Appliance Control Mapping
-            # ============================
-
-            # Light
-            if fingers == [0, 1, 0, 0, 0]:
-                command = "Light ON"
-            elif fingers == [0, 0, 0, 0, 0]:
-                command = "Light OFF"
-
-            # Fan
-            elif fingers == [0, 1, 1, 0, 0]:
-                command = "Fan ON"
-            elif fingers == [1, 1, 1, 1, 1]:
-                command = "Fan OFF"
-
-            # TV
-            elif fingers == [0, 1, 1, 1, 0]:
-                command = "TV ON"
-            elif fingers == [1, 0, 0, 0, 1]:
-                command = "TV OFF"
-
-            # AC
-            elif fingers == [1, 0, 0, 0, 0]:
-                command = "AC ON"
-            elif fingers == [0, 0, 0, 0, 1]:
-                command = "AC OFF"
+
+            if hand.command is not None:
+                device, state = hand.command
+                command = f"{DEVICE_NAMES[device]} {'ON' if state else 'OFF'}"
 
             cv2.putText(frame, f'Command: {command}', (10, 40),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
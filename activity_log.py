@@ -0,0 +1,117 @@
+# Bounded activity log: any-thread ring buffer, batched flushes into a Tk text widget
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+TAG_COLORS = {"voice": "blue", "gesture": "green", "status": "black"}
+
+
+class ActivityLog:
+    """
+    record() may be called from any thread: it only appends to a fixed-size
+    ring buffer (the oldest unflushed records are dropped and counted when
+    it is full) and never touches Tk. attach(), on the Tk thread, starts a
+    Tk timer that flushes every flush_interval seconds: the whole batch goes
+    in with a single widget call, the widget is trimmed to max_lines and it
+    scrolls only when the view was already at the bottom.
+
+    With file_path set, records are also mirrored to a rotating file by a
+    background logging listener, so the Tk thread never writes to disk.
+    """
+
+    def __init__(self, capacity=1000, max_lines=500, flush_interval=0.25, file_path=None,
+                 file_max_bytes=1_000_000, file_backups=3):
+        self.capacity = capacity
+        self.max_lines = max_lines
+        self.flush_interval = flush_interval
+        self._pending = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._root = None
+        self._widget = None
+        self._after = None
+        self._mirror = None
+        self._listener = None
+        if file_path:
+            self._start_mirror(file_path, file_max_bytes, file_backups)
+        # Counters
+        self.recorded = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.trimmed = 0
+
+    def _start_mirror(self, file_path, max_bytes, backups):
+        handler = logging.handlers.RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backups,
+                                                       encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(kind)s] %(message)s"))
+        records = queue.Queue(-1)
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        self._mirror = logging.getLogger(f"{__name__}.{id(self)}")
+        self._mirror.propagate = False
+        self._mirror.setLevel(logging.INFO)
+        self._mirror.addHandler(logging.handlers.QueueHandler(records))
+
+    def attach(self, root, widget):
+        """Bind to a Tk text widget; call from the Tk thread."""
+        self._root, self._widget = root, widget
+        for tag, color in TAG_COLORS.items():
+            widget.tag_configure(tag, foreground=color)
+        self._after = root.after(max(1, int(self.flush_interval * 1000)), self._tick)
+        return self
+
+    def record(self, text, type_="status"):
+        with self._lock:
+            if len(self._pending) == self.capacity:
+                self.dropped += 1
+            self._pending.append((time.time(), text, type_))
+            self.recorded += 1
+        if self._mirror is not None:
+            self._mirror.info(text, extra={"kind": type_})
+
+    def _tick(self):
+        # Tk thread: flush, then come back in flush_interval
+        self.flush()
+        self._after = self._root.after(max(1, int(self.flush_interval * 1000)), self._tick)
+
+    def flush(self):
+        """Move every pending record into the widget (Tk thread only)."""
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        if not batch or self._widget is None:
+            return
+        widget = self._widget
+        at_bottom = widget.yview()[1] >= 0.999
+        # insert(index, chars, tags, chars, tags, ...): one Tk call for the whole batch;
+        # timestamps are formatted here, only for the lines that will be shown
+        args = []
+        for ts, text, tag in batch[-self.max_lines:]:
+            args += (f"[{datetime.fromtimestamp(ts).strftime('%H:%M:%S')}] {text}\n", tag)
+        widget.insert("end", *args)
+        lines = int(widget.index("end-1c").split(".")[0]) - 1
+        if lines > self.max_lines:
+            excess = lines - self.max_lines
+            widget.delete("1.0", f"{excess + 1}.0")
+            self.trimmed += excess
+        if at_bottom:
+            widget.see("end")
+        self.flushes += 1
+
+    def close(self):
+        """Stop the flush timer (Tk thread) and the file mirror."""
+        if self._after is not None:
+            self._root.after_cancel(self._after)
+            self._after = None
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {"recorded": self.recorded, "dropped": self.dropped, "flushes": self.flushes,
+                "trimmed": self.trimmed, "pending": pending}
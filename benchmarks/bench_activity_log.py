@@ -0,0 +1,113 @@
+# Activity log cost over a long session: old per-message ScrolledText writes vs. the batched ring buffer
+# The widget part needs a display (Tk); record() throughput from worker threads is measured regardless.
+# Usage: python benchmarks/bench_activity_log.py [messages]
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from activity_log import ActivityLog
+
+
+def legacy_log(log_area, text, type_="status"):
+    """SmartHomeUI.log before the activity log."""
+    import tkinter as tk
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    log_area.tag_configure("voice", foreground="blue")
+    log_area.tag_configure("gesture", foreground="green")
+    log_area.tag_configure("status", foreground="black")
+    log_area.insert(tk.END, f"[{timestamp}] {text}\n", type_)
+    log_area.see(tk.END)
+
+
+def run_threads(messages=200_000, threads=4):
+    """record() from several threads with no widget attached: throughput and memory stay flat."""
+    log = ActivityLog()
+    tracemalloc.start()
+    per_thread = messages // threads
+
+    def worker(i):
+        for n in range(per_thread):
+            log.record(f"worker {i} message {n}", "gesture")
+
+    t0 = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = log.stats()
+    return {"record_us": elapsed / (per_thread * threads) * 1e6, "peak_kb": peak / 1024,
+            "pending": stats["pending"], "dropped": stats["dropped"]}
+
+
+def run_widget(messages=20_000, window=1000):
+    """Per-message cost at the start and the end of a long session, on a real Tk widget."""
+    import tkinter as tk
+    from tkinter import scrolledtext
+    root = tk.Tk()
+    results = {}
+    try:
+        area = scrolledtext.ScrolledText(root, height=8)
+        area.pack()
+        root.update()
+        costs = []
+        for n in range(messages):
+            t0 = time.perf_counter()
+            legacy_log(area, f"Gesture detected: {n % 2} fingers", "gesture")
+            costs.append(time.perf_counter() - t0)
+        root.update()
+        results["legacy"] = {"first_us": sum(costs[:window]) / window * 1e6,
+                             "last_us": sum(costs[-window:]) / window * 1e6,
+                             "lines": int(area.index("end-1c").split(".")[0])}
+        area.destroy()
+
+        area = scrolledtext.ScrolledText(root, height=8)
+        area.pack()
+        log = ActivityLog(flush_interval=3600).attach(root, area)  # flushed by hand below
+        record_s = flush_s = 0.0
+        for n in range(messages):
+            t0 = time.perf_counter()
+            log.record(f"Gesture detected: {n % 2} fingers", "gesture")
+            record_s += time.perf_counter() - t0
+            if n % 50 == 49:  # a flush tick every ~50 messages
+                t0 = time.perf_counter()
+                log.flush()
+                flush_s += time.perf_counter() - t0
+        root.update()
+        results["batched"] = {"per_message_us": (record_s + flush_s) / messages * 1e6,
+                              "lines": int(area.index("end-1c").split(".")[0]), "flushes": log.flushes}
+    finally:
+        root.destroy()
+    return results
+
+
+def run(messages=20_000):
+    res = {"threads": run_threads(messages * 10)}
+    try:
+        res["widget"] = run_widget(messages)
+    except Exception as e:  # no display
+        res["widget"] = {"skipped": str(e)}
+    return res
+
+
+if __name__ == "__main__":
+    res = run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
+    t = res["threads"]
+    print(f"record() from 4 threads: {t['record_us']:.2f} us/message, peak {t['peak_kb']:.0f} KB, "
+          f"buffered {t['pending']}, dropped {t['dropped']}")
+    w = res["widget"]
+    if "skipped" in w:
+        print(f"widget benchmark skipped: {w['skipped']}")
+    else:
+        print(f"legacy : {w['legacy']['first_us']:.0f} us/message at start, {w['legacy']['last_us']:.0f} us at end, "
+              f"{w['legacy']['lines']} lines kept")
+        print(f"batched: {w['batched']['per_message_us']:.1f} us/message, {w['batched']['lines']} lines kept, "
+              f"{w['batched']['flushes']} flushes")
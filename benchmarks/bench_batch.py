@@ -0,0 +1,69 @@
+# Scene latency on one board: a route per relay vs. one /batch request
+# The stub runs like the stock firmware: one request at a time, connection closed after each reply.
+# "skew" is how long the relays sit half-switched: first to last relay change seen by the board.
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esp32_client import DEVICE_ROUTES, DeviceDispatcher, batch_route, decode_bits
+from esp32_stub import ESP32Stub
+from home_core import SCENES
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_mode(mode, relays, stub, dispatcher, repeats):
+    times, skews = [], []
+    for i in range(repeats):
+        # Alternate the scene with its inverse so every relay really switches
+        states = {relay: state != (i % 2 == 1) for relay, state in relays.items()}
+        routes = ([batch_route(states)] if mode == "batch" else
+                  [f"/{relay}/{'on' if state else 'off'}" for relay, state in states.items()])
+        stub.applied.clear()
+        start = time.perf_counter()
+        coro = (_sequential if mode == "sequential" else _concurrent)(dispatcher, routes)
+        results = asyncio.run_coroutine_threadsafe(coro, dispatcher.loop).result()
+        times.append(time.perf_counter() - start)
+        assert all(r.ok for r in results), results
+        if mode == "batch":
+            assert {k: v for k, v in decode_bits(results[0].body).items() if k in states} == states
+        stamps = [t for t, _, _ in stub.applied]
+        skews.append(max(stamps) - min(stamps))
+    return {"p50_ms": percentile(times, 50) * 1000, "p99_ms": percentile(times, 99) * 1000,
+            "skew_ms": percentile(skews, 50) * 1000, "requests": len(routes)}
+
+
+async def _sequential(dispatcher, routes):
+    return [await dispatcher.request("main", route) for route in routes]
+
+
+async def _concurrent(dispatcher, routes):
+    return (await dispatcher.fan_out([("main", route) for route in routes])).results
+
+
+def run(latency=0.015, jitter=0.005, repeats=40):
+    stub = ESP32Stub(latency=latency, jitter=jitter, keep_alive=False, serial=True).start()
+    dispatcher = DeviceDispatcher({"main": stub.address}, keep_alive=False).start()
+    try:
+        results = {}
+        for name, scene in SCENES.items():
+            relays = {DEVICE_ROUTES[device]: state for device, state in scene.items()}
+            results[name] = {mode: run_mode(mode, relays, stub, dispatcher, repeats)
+                             for mode in ("sequential", "concurrent", "batch")}
+        return results
+    finally:
+        dispatcher.stop()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    for name, modes in run().items():
+        line = ", ".join(f"{mode} {r['requests']} req {r['p50_ms']:3.0f} ms (p99 {r['p99_ms']:3.0f}, skew {r['skew_ms']:3.0f})"
+                         for mode, r in modes.items())
+        print(f"{name:8s}: {line}")
@@ -0,0 +1,138 @@
+# Load test for home_daemon: concurrent WebSocket subscribers + HTTP command clients against one daemon
+# The daemon runs in its own process (as deployed); every client shares this process's event loop.
+# Each command client is closed-loop over a keep-alive connection; each subscriber must see every
+# resulting event. On a single-core machine both sides share the CPU, so treat results as a floor.
+#   python benchmarks/bench_daemon.py [--duration 3]
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from home_daemon import read_ws_message
+
+DEVICES = ("light", "fan", "tv", "ac")
+SCENARIOS = [(1, 1), (10, 4), (50, 8), (200, 8), (500, 16), (1000, 16)]  # (subscribers, command clients)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def start_daemon(db_path):
+    env = {k: v for k, v in os.environ.items() if k != "SMART_HOME_ESP32"}  # no relay board in the loop
+    proc = subprocess.Popen([sys.executable, "home_daemon.py", "--port", "0", "--db", db_path], cwd=ROOT,
+                            stdout=subprocess.PIPE, text=True, env=env)
+    line = proc.stdout.readline()
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+async def _http(reader, writer, method, path, body=b""):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: daemon\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return status, await reader.readexactly(length)
+
+
+async def subscriber(port, ready, received, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: daemon\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n")
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    await read_ws_message(reader)  # snapshot
+    ready.set_result(None)
+    count = 0
+    try:
+        while True:
+            _, payload = await read_ws_message(reader)
+            event = json.loads(payload)
+            if event["type"] == "state":
+                latencies.append(time.time() - event["at"])
+                count += 1
+    except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        received.append(count)
+        writer.close()
+
+
+async def commander(port, index, stop_at, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    n = 0
+    while time.perf_counter() < stop_at:
+        body = json.dumps({"state": n % 2 == 0}).encode()
+        t0 = time.perf_counter()
+        status, _ = await _http(reader, writer, "POST", f"/devices/{DEVICES[(index + n) % 4]}", body)
+        latencies.append(time.perf_counter() - t0)
+        n += 1
+        assert status == 200, status
+    writer.close()
+    return n
+
+
+async def run_scenario(port, subscribers, clients, duration):
+    loop = asyncio.get_running_loop()
+    ready = [loop.create_future() for _ in range(subscribers)]
+    received, event_lat, request_lat = [], [], []
+    subs = []
+    for i in range(subscribers):
+        subs.append(asyncio.create_task(subscriber(port, ready[i], received, event_lat)))
+        if i % 100 == 99:
+            await asyncio.gather(*ready[:i + 1])  # don't overflow the listen backlog
+    await asyncio.gather(*ready)
+    t0 = time.perf_counter()
+    counts = await asyncio.gather(*(commander(port, i, t0 + duration, request_lat) for i in range(clients)))
+    elapsed = time.perf_counter() - t0
+    commands = sum(counts)
+    # Let the last events reach every subscriber, then disconnect
+    expected = commands * subscribers
+    deadline = time.perf_counter() + 5.0
+    while len(event_lat) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    for task in subs:
+        task.cancel()
+    await asyncio.gather(*subs, return_exceptions=True)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, stats = await _http(reader, writer, "GET", "/stats")
+    writer.close()
+    return {"subscribers": subscribers, "clients": clients, "commands_per_s": commands / elapsed,
+            "request_p50_ms": percentile(request_lat, 50) * 1000, "request_p99_ms": percentile(request_lat, 99) * 1000,
+            "events_per_s": len(event_lat) / elapsed, "delivered": len(event_lat) / expected if expected else 1.0,
+            "event_p50_ms": percentile(event_lat, 50) * 1000, "event_p99_ms": percentile(event_lat, 99) * 1000,
+            "slow_clients": json.loads(stats)["server"]["slow_clients"]}
+
+
+def run(duration=3.0, scenarios=SCENARIOS):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for subscribers, clients in scenarios:
+            # Fresh daemon per scenario so counters and socket state don't carry over
+            proc, port = start_daemon(os.path.join(tmp, f"usage-{subscribers}.db"))
+            try:
+                results.append(asyncio.run(run_scenario(port, subscribers, clients, duration)))
+            finally:
+                proc.terminate()
+                proc.wait()
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    duration = float(args[args.index("--duration") + 1]) if "--duration" in args else 3.0
+    for r in run(duration):
+        print(f"{r['subscribers']:5d} subscribers, {r['clients']:3d} clients: {r['commands_per_s']:6.0f} commands/s "
+              f"(p50 {r['request_p50_ms']:5.1f} ms, p99 {r['request_p99_ms']:6.1f} ms), "
+              f"{r['events_per_s']:7.0f} events/s pushed, {r['delivered'] * 100:5.1f}% delivered "
+              f"(p50 {r['event_p50_ms']:6.1f} ms, p99 {r['event_p99_ms']:7.1f} ms), {r['slow_clients']} dropped")
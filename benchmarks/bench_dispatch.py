@@ -0,0 +1,83 @@
+# Throughput and tail latency of the ESP32 dispatcher against the local stub
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esp32_client import DeviceDispatcher, route_for
+from esp32_stub import ESP32Stub
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _routes(n):
+    devices = ("light", "fan", "tv", "ac")
+    return [route_for(devices[i % 4], i % 8 < 4) for i in range(n)]
+
+
+def run_case(n=2000, concurrency=4, keep_alive=True, latency=0.002, jitter=0.002,
+             failure_rate=0.0, drop_rate=0.0, retries=2, timeout=1.0):
+    stub = ESP32Stub(latency=latency, jitter=jitter, failure_rate=failure_rate,
+                     drop_rate=drop_rate, keep_alive=keep_alive).start()
+    dispatcher = DeviceDispatcher({"main": stub.address}, max_connections=concurrency,
+                                  timeout=timeout, retries=retries, keep_alive=keep_alive).start()
+    try:
+        routes = _routes(n)
+        results = []
+
+        async def client():
+            # Closed-loop client: one command in flight per client at a time
+            while routes:
+                results.append(await dispatcher.request("main", routes.pop()))
+
+        async def drive():
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+
+        t0 = time.perf_counter()
+        asyncio.run_coroutine_threadsafe(drive(), dispatcher.loop).result()
+        elapsed = time.perf_counter() - t0
+    finally:
+        dispatcher.stop()
+        stub.stop()
+
+    latencies = [r.latency for r in results]
+    return {
+        "commands": n,
+        "concurrency": concurrency,
+        "keep_alive": keep_alive,
+        "failure_rate": failure_rate,
+        "drop_rate": drop_rate,
+        "elapsed_s": elapsed,
+        "throughput_cps": n / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "ok": sum(r.ok for r in results),
+        "retried": sum(r.attempts > 1 for r in results),
+        "connections_opened": stub.connections,
+    }
+
+
+def run(n=2000):
+    return [
+        run_case(n, concurrency=4, keep_alive=False),
+        run_case(n, concurrency=4, keep_alive=True),
+        run_case(n, concurrency=16, keep_alive=True),
+        run_case(n, concurrency=4, keep_alive=True, failure_rate=0.05, drop_rate=0.02, timeout=0.2),
+    ]
+
+
+if __name__ == "__main__":
+    print(f"{'conc':>4} {'keep':>5} {'fail':>5} {'drop':>5} {'cmd/s':>8} {'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'ok':>6} {'retry':>6} {'conns':>6}")
+    for r in run():
+        print(f"{r['concurrency']:>4} {str(r['keep_alive']):>5} {r['failure_rate']:>5} {r['drop_rate']:>5} "
+              f"{r['throughput_cps']:>8.0f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['p99_ms']:>7.2f} "
+              f"{r['ok']:>6} {r['retried']:>6} {r['connections_opened']:>6}")
@@ -0,0 +1,75 @@
+# How long an input thread (gesture/voice) spends publishing while a slow subscriber is attached, per policy
+# The input thread flips devices through HomeController as fast as a held gesture/voice burst would;
+# the slow subscriber is a logger taking 5 ms per event. "inline" is how every subscriber was called before.
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from home_core import HomeController
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_policy(policy, commands=400, interval=0.002, work=0.005, maxsize=64):
+    home = HomeController(gesture_cooldown=0.0)
+    home.queue.hold = 0.0
+    seen, done = [], threading.Event()
+
+    def slow_logger(event):
+        time.sleep(work)
+        seen.append(event)
+        if event["seq"] == last_seq[0]:
+            done.set()
+
+    last_seq = [None]
+    home.subscribe(slow_logger, types=("state",), policy=policy, maxsize=maxsize, name="logger")
+    rng = random.Random(3)
+    devices = list(home.state)
+    publish_times = []
+    start = time.perf_counter()
+    for i in range(commands):
+        t = time.perf_counter()
+        event = home.set(rng.choice(devices), i % 3 != 0, "gesture")
+        publish_times.append(time.perf_counter() - t)
+        time.sleep(interval)
+    input_time = time.perf_counter() - start
+    last_seq[0] = event["seq"]
+    if seen and seen[-1]["seq"] == event["seq"]:
+        done.set()
+    done.wait(commands * work + 5)
+    stats = home.stats()["bus"]["subscribers"][0]
+    # Per-device order: the logger never sees an older change after a newer one for the same device
+    last, ordered = {}, True
+    for e in seen:
+        for change in e["changes"]:
+            ordered &= last.get(change["device"], 0) < e["seq"]
+            last[change["device"]] = e["seq"]
+    final = {}
+    for e in seen:
+        final.update({c["device"]: c["state"] for c in e["changes"]})
+    home.close()
+    return {"policy": policy, "commands": commands, "input_ms": input_time * 1000,
+            "call_p50_ms": percentile(publish_times, 50) * 1000, "call_p99_ms": percentile(publish_times, 99) * 1000,
+            "delivered": len(seen), "dropped": stats["dropped"], "coalesced": stats["coalesced"],
+            "max_depth": stats["max_depth"], "latency_p99_ms": stats["latency_p99_ms"], "ordered": ordered,
+            "final_state_ok": all(final.get(d, False) == s for d, s in home.state.items())}
+
+
+def run():
+    return [run_policy(policy) for policy in ("inline", "block", "drop_oldest", "coalesce")]
+
+
+if __name__ == "__main__":
+    for r in run():
+        latency = f"{r['latency_p99_ms']:.0f}" if r["latency_p99_ms"] is not None else "-"
+        print(f"{r['policy']:12s}: input loop {r['input_ms']:6.0f} ms for {r['commands']} commands, "
+              f"set() p50 {r['call_p50_ms']:.3f} ms p99 {r['call_p99_ms']:.3f} ms; logger got {r['delivered']} "
+              f"(dropped {r['dropped']}, coalesced {r['coalesced']}, max depth {r['max_depth']}, queue p99 {latency} ms), "
+              f"per-device order kept: {r['ordered']}, logger ends on the real state: {r['final_state_ok']}")
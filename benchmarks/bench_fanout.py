@@ -0,0 +1,86 @@
+# Whole-house "All OFF" / "All ON" across many relay boards: one-at-a-time vs. concurrent fan-out
+# Every board is an esp32_stub with its own latency; one board is deliberately slow.
+#   sequential : the old toggle_all loop, one route per relay, each awaited in turn
+#   per-relay  : every relay route fanned out at once, per-node connection limit applies
+#   planned    : NodeRegistry.plan() - one /all/off per board for OFF - then fanned out
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esp32_client import DeviceDispatcher, NodeRegistry
+from esp32_stub import ESP32Stub
+
+RELAYS = ("led", "fan", "tv", "ac")
+
+
+def house(boards, latency=0.02, jitter=0.01, slow=0.08):
+    stubs = [ESP32Stub(latency=slow if i == 0 else latency, jitter=jitter, seed=i).start() for i in range(boards)]
+    registry = NodeRegistry({f"room{i}": stub.address for i, stub in enumerate(stubs)},
+                            {f"room{i}.{relay}": [(f"room{i}", relay)] for i in range(boards) for relay in RELAYS})
+    return stubs, registry
+
+
+def run_case(boards, state=False, max_connections=2):
+    stubs, registry = house(boards)
+    dispatcher = DeviceDispatcher(registry.nodes, max_connections=max_connections).start()
+    try:
+        changes = [(device, state) for device in registry.devices]
+        per_relay = [(node, f"/{relay}/{'on' if state else 'off'}") for node, relay in
+                     (targets[0] for targets in registry.devices.values())]
+        planned = registry.plan(changes)
+
+        async def sequential():
+            start = time.perf_counter()
+            results = [await dispatcher.request(node, route) for node, route in per_relay]
+            return time.perf_counter() - start, all(r.ok for r in results)
+
+        def timed(coro):
+            return asyncio.run_coroutine_threadsafe(coro, dispatcher.loop).result()
+
+        timed(dispatcher.fan_out(planned))  # open the keep-alive pools first
+        seq_time, seq_ok = timed(sequential())
+        relay_report = timed(dispatcher.fan_out(per_relay, deadline=5.0))
+        plan_report = timed(dispatcher.fan_out(planned, deadline=5.0))
+        return {"boards": boards, "relays": len(per_relay), "planned_routes": len(planned),
+                "sequential_ms": seq_time * 1000, "sequential_ok": seq_ok,
+                "per_relay_ms": relay_report.elapsed * 1000, "per_relay_ok": relay_report.ok,
+                "planned_ms": plan_report.elapsed * 1000, "planned_ok": plan_report.ok,
+                "slowest_node": plan_report.summary()["slowest"]}
+    finally:
+        dispatcher.stop()
+        for stub in stubs:
+            stub.stop()
+
+
+def run_deadline(boards=8, deadline=0.05):
+    """A board slower than the deadline fails on time instead of holding up the report."""
+    stubs, registry = house(boards, slow=0.5)
+    dispatcher = DeviceDispatcher(registry.nodes).start()
+    try:
+        commands = registry.plan([(device, False) for device in registry.devices])
+        report = dispatcher.send_many(commands, deadline=deadline).result()
+        return report.summary()
+    finally:
+        dispatcher.stop()
+        for stub in stubs:
+            stub.stop()
+
+
+def run():
+    cases = [run_case(boards, state) for boards in (1, 4, 12, 24, 48) for state in (False, True)]
+    return {"cases": cases, "deadline": run_deadline()}
+
+
+if __name__ == "__main__":
+    res = run()
+    for r in res["cases"]:
+        print(f"{r['boards']:3d} boards / {r['relays']:3d} relays, {r['planned_routes']:3d} planned routes: "
+              f"sequential {r['sequential_ms']:7.0f} ms, per-relay fan-out {r['per_relay_ms']:5.0f} ms, "
+              f"planned fan-out {r['planned_ms']:5.0f} ms (slowest {r['slowest_node']}), "
+              f"all ok: {r['sequential_ok'] and r['per_relay_ok'] and r['planned_ok']}")
+    d = res["deadline"]
+    print(f"deadline 50 ms, one 500 ms board: {d['sent']} routes in {d['latency_ms']:.0f} ms, "
+          f"failed: {[(f['node'], f['error']) for f in d['failed']]}")
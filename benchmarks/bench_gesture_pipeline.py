@@ -0,0 +1,110 @@
+# Gesture-to-command latency: old serial gesture_loop vs. the staged pipeline
+# Camera, inference and rendering are simulated with sleeps, so no camera is needed.
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gesture_pipeline import GesturePipeline
+
+
+class SimulatedRig:
+    """Camera at a fixed FPS plus gestures that appear at random moments."""
+
+    def __init__(self, camera_fps=30, infer_s=0.04, render_s=0.06, duration=6.0, seed=3):
+        self.frame_interval = 1.0 / camera_fps
+        self.infer_s = infer_s
+        self.render_s = render_s
+        self.duration = duration
+        rng = random.Random(seed)
+        self.start = time.perf_counter()
+        # Gesture onsets, each at least 0.4 s apart
+        t, self.onsets = 0.3, []
+        while t < duration - 0.5:
+            self.onsets.append(self.start + t)
+            t += 0.4 + rng.random() * 0.3
+        self.next_frame = self.start
+        self.latencies = []
+        self._handled = set()
+
+    def done(self):
+        return time.perf_counter() - self.start > self.duration
+
+    def capture(self):
+        # Blocks until the camera delivers the next frame, like cap.read()
+        now = time.perf_counter()
+        if now < self.next_frame:
+            time.sleep(self.next_frame - now)
+        self.next_frame = max(self.next_frame + self.frame_interval, time.perf_counter())
+        return time.perf_counter()  # the "frame" is its capture timestamp
+
+    def infer(self, frame_ts):
+        time.sleep(self.infer_s)
+        # The newest gesture visible in this frame fires a command once
+        visible = [i for i, t in enumerate(self.onsets) if t <= frame_ts]
+        if visible and visible[-1] not in self._handled:
+            self._handled.add(visible[-1])
+            self.latencies.append(time.perf_counter() - self.onsets[visible[-1]])
+        return frame_ts
+
+    def render(self, frame_ts):
+        time.sleep(self.render_s)
+
+
+def run_serial(**kwargs):
+    rig = SimulatedRig(**kwargs)
+    frames = 0
+    while not rig.done():
+        ts = rig.capture()
+        rig.infer(ts)
+        rig.render(ts)
+        time.sleep(0.02)
+        frames += 1
+    return rig, frames / rig.duration
+
+
+def run_pipeline(**kwargs):
+    rig = SimulatedRig(**kwargs)
+    pipeline = GesturePipeline(rig.capture, rig.infer, rig.render).start()
+    while not rig.done():
+        time.sleep(0.05)
+    stats = pipeline.stats()
+    pipeline.stop()
+    return rig, stats
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def run(infer_s=0.04, render_s=0.06, duration=6.0):
+    serial_rig, serial_fps = run_serial(infer_s=infer_s, render_s=render_s, duration=duration)
+    pipe_rig, stats = run_pipeline(infer_s=infer_s, render_s=render_s, duration=duration)
+    return {
+        "infer_ms": infer_s * 1000,
+        "render_ms": render_s * 1000,
+        "serial": dict(_summary(serial_rig.latencies), fps=serial_fps),
+        "pipeline": dict(_summary(pipe_rig.latencies),
+                         capture_fps=stats["capture"]["fps"],
+                         inference_fps=stats["inference"]["fps"],
+                         render_fps=stats["render"]["fps"],
+                         dropped_frames=stats["dropped"]["frames"]),
+    }
+
+
+if __name__ == "__main__":
+    res = run()
+    print(f"Simulated inference {res['infer_ms']:.0f} ms, render {res['render_ms']:.0f} ms, camera 30 fps")
+    s, p = res["serial"], res["pipeline"]
+    print(f"Serial loop : {s['fps']:5.1f} fps   gesture->command mean {s['mean_ms']:6.1f} ms  max {s['max_ms']:6.1f} ms")
+    print(f"Pipeline    : cap {p['capture_fps']:4.1f} / inf {p['inference_fps']:4.1f} / ui {p['render_fps']:4.1f} fps   "
+          f"gesture->command mean {p['mean_ms']:6.1f} ms  max {p['max_ms']:6.1f} ms  dropped {p['dropped_frames']}")
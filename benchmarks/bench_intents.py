@@ -0,0 +1,168 @@
+# Micro-benchmark: compiled intent engine vs. the old per-call regex loops
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_engine import IntentEngine
+
+# ---------- Legacy parsers (copied from hybrid_ui.py / voice.py before the engine) ----------
+def legacy_process_voice_command(command):
+    on_patterns = [r"\bturn\s+on\b", r"\bswitch\s+on\b", r"\bstart\b", "चालू करा", "चालू"]
+    off_patterns = [r"\bturn\s+off\b", r"\bswitch\s+off\b", r"\bstop\b", "बंद करा", "बंद"]
+    action = None
+    if any(re.search(p, command) for p in on_patterns):
+        action = True
+    elif any(re.search(p, command) for p in off_patterns):
+        action = False
+
+    mapping = {
+        ("light", "बत्ती"): "light",
+        ("fan", "पंख", "पंखा"): "fan",
+        ("tv", "television"): "tv",
+        ("ac", "air conditioner", "cooler"): "ac",
+    }
+
+    device = None
+    for keys, name in mapping.items():
+        if any(k in command for k in keys):
+            device = name
+            break
+    if device is not None and action is not None:
+        return device, action
+    return None
+
+
+def legacy_process_fan_command(text):
+    turn_on_patterns = [r'turn\s+on\s+.*fan', r'switch\s+on\s+.*fan', r'start\s+.*fan',
+                        r'fan\s+on', r'turn\s+.*fan\s+on']
+    turn_off_patterns = [r'turn\s+off\s+.*fan', r'switch\s+off\s+.*fan', r'stop\s+.*fan',
+                         r'fan\s+off', r'turn\s+.*fan\s+off']
+    for pattern in turn_on_patterns:
+        if re.search(pattern, text):
+            return True
+    for pattern in turn_off_patterns:
+        if re.search(pattern, text):
+            return False
+    return None
+
+
+# ---------- Corpus ----------
+EN_DEVICES = {"light": ["light", "lamp"], "fan": ["fan"], "tv": ["tv", "television"],
+              "ac": ["ac", "air conditioner", "cooler"]}
+HI_DEVICES = {"light": ["बत्ती", "लाइट"], "fan": ["पंखा"], "tv": ["टीवी"], "ac": ["एसी"]}
+MR_DEVICES = {"light": ["दिवा", "बत्ती"], "fan": ["पंखा"], "tv": ["टीव्ही"], "ac": ["एसी"]}
+
+EN_TEMPLATES = [
+    "turn {a} the {d}", "switch {a} the {d}", "please turn {a} {d}", "{d} {a}",
+    "turn the {d} {a}", "can you switch {a} the {d} please",
+]
+NOISE = ["what time is it", "hello there", "play some music", "how is the weather today",
+         "tell me a joke", "set an alarm for seven"]
+
+
+# Correctness: utterances with the exact intents the engine must return (empty: change nothing)
+CASES = [
+    ("turn on the fan", (("fan", True),)),
+    ("turn the fan off", (("fan", False),)),
+    ("turn on the fan and light", (("fan", True), ("light", True))),
+    ("fan and light on", (("fan", True), ("light", True))),
+    ("turn on the fan and switch off the light", (("fan", True), ("light", False))),
+    ("light on fan off", (("light", True), ("fan", False))),
+    ("turn on the light, fan off", (("light", True), ("fan", False))),
+    ("switch off the tv then the ac", (("tv", False), ("ac", False))),
+    ("turn on the fan and the tv then turn off the ac", (("fan", True), ("tv", True), ("ac", False))),
+    ("switch on the light and fan and switch off the tv", (("light", True), ("fan", True), ("tv", False))),
+    ("turn on the light and fan, turn off the tv", (("light", True), ("fan", True), ("tv", False))),
+    ("turn off the light and the fan and turn on the ac", (("light", False), ("fan", False), ("ac", True))),
+    ("fan, light on", (("fan", True), ("light", True))),
+    ("is the light on", ()),
+    ("what is on the tv", ()),
+    ("don't turn on the fan", ()),
+    ("turn on the fan, don't turn on the light", (("fan", True),)),
+    ("पंखा बंद मत करो", ()),
+    ("क्या पंखा चालू है", ()),
+    ("is the fan on or off", ()),
+    ("is the light off or on", ()),
+    ("पंखा चालू है या बंद", ()),
+    ("पंखा चालू करा", (("fan", True),)),
+    ("बत्ती बंद कर दो", (("light", False),)),
+    ("what time is it", ()),
+]
+
+
+def build_corpus(n=5000, seed=7):
+    """Deterministic multilingual corpus of single, multi-device and noise utterances."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.45:
+            device = rng.choice(list(EN_DEVICES))
+            action = rng.choice(["on", "off"])
+            corpus.append(rng.choice(EN_TEMPLATES).format(a=action, d=rng.choice(EN_DEVICES[device])))
+        elif kind < 0.6:
+            d1, d2 = rng.sample(list(EN_DEVICES), 2)
+            a1, a2 = rng.choice(["on", "off"]), rng.choice(["on", "off"])
+            corpus.append(f"turn {a1} the {rng.choice(EN_DEVICES[d1])} and switch {a2} the {rng.choice(EN_DEVICES[d2])}")
+        elif kind < 0.72:
+            device = rng.choice(list(HI_DEVICES))
+            phrase = rng.choice(["चालू करो", "बंद करो", "चालू कर दो", "बंद कर दो"])
+            corpus.append(f"{rng.choice(HI_DEVICES[device])} {phrase}")
+        elif kind < 0.84:
+            device = rng.choice(list(MR_DEVICES))
+            phrase = rng.choice(["चालू करा", "बंद करा"])
+            corpus.append(f"{rng.choice(MR_DEVICES[device])} {phrase}")
+        else:
+            corpus.append(rng.choice(NOISE))
+    return corpus
+
+
+def _time(fn, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n=5000, repeat=5):
+    corpus = build_corpus(n)
+    engine = IntentEngine()
+    uncached = IntentEngine(cache_size=0)
+
+    results = {
+        "utterances": len(corpus),
+        "legacy_voice_s": _time(legacy_process_voice_command, corpus, repeat),
+        "legacy_fan_s": _time(legacy_process_fan_command, corpus, repeat),
+        "engine_uncached_s": _time(uncached.parse, corpus, repeat),
+        "engine_cached_s": _time(engine.parse, corpus, repeat),
+    }
+    # Coverage: how many utterances yield at least one intent, and multi-device hits
+    results["legacy_voice_hits"] = sum(1 for t in corpus if legacy_process_voice_command(t))
+    results["engine_hits"] = sum(1 for t in corpus if engine.parse(t))
+    results["engine_multi_device_hits"] = sum(1 for t in corpus if len(engine.parse(t)) > 1)
+    # Correctness on the hand-written cases
+    wrong = [text for text, expected in CASES if tuple(engine.parse(text)) != expected]
+    results["engine_correct"] = len(CASES) - len(wrong)
+    results["engine_wrong"] = wrong
+    # Determinism: a second uncached pass must give identical answers
+    results["deterministic"] = [uncached.parse(t) for t in corpus] == [engine.parse(t) for t in corpus]
+    return results
+
+
+if __name__ == "__main__":
+    res = run()
+    n = res["utterances"]
+    print(f"Corpus: {n} utterances")
+    for key in ("legacy_voice_s", "legacy_fan_s", "engine_uncached_s", "engine_cached_s"):
+        print(f"{key:>20}: {res[key] * 1000:8.2f} ms total  {res[key] / n * 1e6:7.2f} us/utterance")
+    print(f"Legacy hits: {res['legacy_voice_hits']}  Engine hits: {res['engine_hits']}  "
+          f"(multi-device: {res['engine_multi_device_hits']})")
+    print(f"Correct: {res['engine_correct']}/{len(CASES)}" + (f"  wrong: {res['engine_wrong']}" if res["engine_wrong"] else ""))
+    print(f"Deterministic: {res['deterministic']}")
@@ -0,0 +1,114 @@
+# Finger classification over landmark fixtures: old per-attribute loops vs. hand_classifier
+# Regenerate the fixtures with benchmarks/make_landmark_fixtures.py.
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from hand_classifier import classify, landmarks_to_array
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hand_landmarks.json")
+
+
+# ---------- Legacy classifiers (hybrid_ui.count_fingers / Gesture_Control.get_finger_status) ----------
+def legacy_count_fingers(handLms, handedness_label):
+    tips = [4, 8, 12, 16, 20]
+    lm = handLms.landmark
+    fingers = []
+    thumb_tip = lm[tips[0]].x
+    thumb_ip = lm[tips[0] - 1].x
+    if handedness_label == "Right":
+        fingers.append(1 if thumb_tip > thumb_ip + 0.02 else 0)
+    else:
+        fingers.append(1 if thumb_tip < thumb_ip - 0.02 else 0)
+    for i in range(1, 5):
+        fingers.append(1 if lm[tips[i]].y < lm[tips[i] - 2].y - 0.02 else 0)
+    return sum(fingers)
+
+
+def legacy_get_finger_status(hand_landmarks):
+    finger_status = []
+    tip_ids = [4, 8, 12, 16, 20]
+    if hand_landmarks.landmark[tip_ids[0]].x < hand_landmarks.landmark[tip_ids[0] - 1].x:
+        finger_status.append(1)
+    else:
+        finger_status.append(0)
+    for id in range(1, 5):
+        if hand_landmarks.landmark[tip_ids[id]].y < hand_landmarks.landmark[tip_ids[id] - 2].y:
+            finger_status.append(1)
+        else:
+            finger_status.append(0)
+    return finger_status
+
+
+def load_fixtures(path=FIXTURES):
+    with open(path) as f:
+        records = json.load(f)
+    hands = [SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in r["landmarks"]])
+             for r in records]
+    return records, hands
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(repeat=20, hands_per_frame=2):
+    records, hands = load_fixtures()
+    labels = [r["handedness"] for r in records]
+    expected = [tuple(r["fingers"]) for r in records]
+    n = len(hands)
+    frames = [(hands[i:i + hands_per_frame], labels[i:i + hands_per_frame]) for i in range(0, n, hands_per_frame)]
+    buffer = np.empty((hands_per_frame, 21, 3), dtype=np.float32)
+
+    def legacy_count():
+        for h, label in zip(hands, labels):
+            legacy_count_fingers(h, label)
+
+    def legacy_status():
+        for h in hands:
+            legacy_get_finger_status(h)
+
+    def vectorized_frames():
+        for frame_hands, frame_labels in frames:
+            classify(landmarks_to_array(frame_hands, buffer), frame_labels)
+
+    all_landmarks = landmarks_to_array(hands)
+
+    def vectorized_batch():
+        classify(all_landmarks, labels)
+
+    states = classify(all_landmarks, labels)
+    return {
+        "hands": n,
+        "hands_per_frame": hands_per_frame,
+        "legacy_count_fingers_us_per_hand": _best(legacy_count, repeat) / n * 1e6,
+        "legacy_get_finger_status_us_per_hand": _best(legacy_status, repeat) / n * 1e6,
+        "classifier_per_frame_us_per_hand": _best(vectorized_frames, repeat) / n * 1e6,
+        "classifier_preconverted_batch_us_per_hand": _best(vectorized_batch, repeat) / n * 1e6,
+        "classifier_accuracy": sum(s.fingers == e for s, e in zip(states, expected)) / n,
+        "legacy_status_accuracy": sum(tuple(legacy_get_finger_status(h)) == e for h, e in zip(hands, expected)) / n,
+        "legacy_count_agreement": sum(legacy_count_fingers(h, l) == s.count
+                                      for h, l, s in zip(hands, labels, states)) / n,
+    }
+
+
+if __name__ == "__main__":
+    res = run()
+    print(f"{res['hands']} fixture hands, {res['hands_per_frame']} per frame")
+    for key in ("legacy_count_fingers_us_per_hand", "legacy_get_finger_status_us_per_hand",
+                "classifier_per_frame_us_per_hand", "classifier_preconverted_batch_us_per_hand"):
+        print(f"{key:>42}: {res[key]:7.2f} us")
+    print(f"Accuracy vs fixture labels: classifier {res['classifier_accuracy']:.1%}, "
+          f"get_finger_status {res['legacy_status_accuracy']:.1%}; "
+          f"count agreement with count_fingers {res['legacy_count_agreement']:.1%}")
@@ -0,0 +1,83 @@
+# Cost of the latency instrumentation: per call, and on the controller's command path, enabled vs. disabled
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from home_core import HomeController
+from metrics import METRICS, Metrics
+
+
+def per_call(metrics, n=200_000):
+    rng = random.Random(5)
+    values = [rng.lognormvariate(-6, 1.5) for _ in range(1024)]
+
+    def timed(fn):
+        start = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        return (time.perf_counter() - start) / n * 1e9
+
+    def span(i):
+        with metrics.span("parse"):
+            pass
+
+    def trace(i):
+        metrics.mark(metrics.start("chat"), "ack", end=True)
+
+    return {"observe_ns": timed(lambda i: metrics.observe("stage", values[i & 1023])),
+            "span_ns": timed(span), "tick_ns": timed(lambda i: metrics.tick("loop")),
+            "trace_ns": timed(trace)}
+
+
+def command_path(enabled, n=20_000):
+    # HomeController.set() without a board: parse/queue/trace instrumentation only, nothing else in the way
+    METRICS.enabled = enabled
+    METRICS.reset()
+    home = HomeController(gesture_cooldown=0.0)
+    home.queue.hold = 0.0
+    start = time.perf_counter()
+    for i in range(n):
+        home.process_command("turn on the fan" if i % 2 else "turn off the fan", "chat")
+    elapsed = time.perf_counter() - start
+    home.close()
+    return elapsed / n * 1e6
+
+
+def accuracy(n=100_000):
+    # Histogram percentiles vs. exact ones on a latency-like distribution
+    rng = random.Random(9)
+    values = sorted(rng.lognormvariate(-4, 0.8) for _ in range(n))
+    metrics = Metrics()
+    for v in values:
+        metrics.observe("x", v)
+    h = metrics.histograms["x"]
+    return {p: (h.percentile(p) / values[int(p / 100 * (n - 1))] - 1) * 100 for p in (50, 95, 99)}
+
+
+def run():
+    enabled = per_call(Metrics(enabled=True))
+    disabled = per_call(Metrics(enabled=False))
+    paths = {"on": command_path(True), "off": command_path(False)}
+    METRICS.enabled = True
+    metrics = Metrics()
+    for i in range(30):
+        for v in range(200):
+            metrics.observe(f"stage{i}", v / 1e4)
+    start = time.perf_counter()
+    text = metrics.prometheus()
+    scrape = time.perf_counter() - start
+    return {"enabled": enabled, "disabled": disabled, "command_us": paths, "accuracy_pct": accuracy(),
+            "scrape_ms": scrape * 1000, "scrape_bytes": len(text)}
+
+
+if __name__ == "__main__":
+    r = run()
+    for name in ("observe_ns", "span_ns", "tick_ns", "trace_ns"):
+        print(f"{name[:-3]:8s}: {r['enabled'][name]:6.0f} ns enabled, {r['disabled'][name]:4.0f} ns disabled")
+    on, off = r["command_us"]["on"], r["command_us"]["off"]
+    print(f"process_command(): {on:.1f} us with metrics, {off:.1f} us without ({(on - off) / off * 100:+.1f}%)")
+    print("percentile error vs. exact: " + ", ".join(f"p{p} {e:+.1f}%" for p, e in r["accuracy_pct"].items()))
+    print(f"Prometheus scrape of 30 stages: {r['scrape_ms']:.1f} ms, {r['scrape_bytes']} bytes")
@@ -0,0 +1,64 @@
+# Motion gate: share of frames sent to MediaPipe when idle vs. active, and gate cost
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from motion_gate import MotionGate
+
+
+def synthetic_scene(idle_frames=600, active_frames=150, width=960, height=540, fps=30, seed=5):
+    """Static room with sensor noise, then a 'hand' blob moving through it, then idle again."""
+    rng = np.random.default_rng(seed)
+    room = rng.integers(40, 200, (height, width, 3), dtype=np.uint8)
+    frames = []
+    total = idle_frames * 2 + active_frames
+    for i in range(total):
+        noise = rng.integers(-3, 4, (height, width, 3), dtype=np.int16)
+        frame = np.clip(room.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        if idle_frames <= i < idle_frames + active_frames:
+            x = 100 + (i - idle_frames) * 5
+            frame[200:340, x:x + 120] = (60, 140, 230)
+        frames.append((i / fps, frame))
+    return frames, idle_frames, active_frames
+
+
+def run(infer_ms=35.0):
+    frames, idle_n, active_n = synthetic_scene()
+    gate = MotionGate()
+    decisions = []
+    gate_time = 0.0
+    for ts, frame in frames:
+        t0 = time.perf_counter()
+        run_inference = gate.should_infer(frame, now=ts)
+        gate_time += time.perf_counter() - t0
+        # Pretend MediaPipe sees the hand whenever the blob is on screen
+        if run_inference:
+            gate.report(idle_n <= len(decisions) < idle_n + active_n, now=ts)
+        decisions.append(run_inference)
+
+    idle_decisions = decisions[:idle_n]
+    active_decisions = decisions[idle_n:idle_n + active_n]
+    first_active = next((i for i, d in enumerate(active_decisions) if d), None)
+    n = len(frames)
+    return {
+        "frames": n,
+        "gate_us_per_frame": gate_time / n * 1e6,
+        "idle_inference_ratio": sum(idle_decisions) / idle_n,
+        "active_inference_ratio": sum(active_decisions) / active_n,
+        "frames_to_first_inference_after_motion": first_active,
+        "inference_ms_per_s_ungated": infer_ms * 30,
+        "inference_ms_per_s_idle": infer_ms * 30 * sum(idle_decisions) / idle_n,
+    }
+
+
+if __name__ == "__main__":
+    res = run()
+    print(f"{res['frames']} frames at 30 fps, gate cost {res['gate_us_per_frame']:.0f} us/frame")
+    print(f"Idle:   {res['idle_inference_ratio']:.1%} of frames inferred "
+          f"({res['inference_ms_per_s_idle']:.0f} ms/s of inference vs {res['inference_ms_per_s_ungated']:.0f} ungated)")
+    print(f"Active: {res['active_inference_ratio']:.1%} of frames inferred, "
+          f"first inference {res['frames_to_first_inference_after_motion']} frame(s) after motion starts")
@@ -0,0 +1,110 @@
+# Per-frame preview cost: old fromarray/PhotoImage path vs. PreviewRenderer
+# Needs numpy, opencv-python and Pillow; Tk is used only if a display is available.
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from preview_renderer import PreviewRenderer
+
+
+class _Event:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+
+class _HeadlessLabel:
+    """Minimal stand-in for the Tk label when there is no display."""
+
+    def __init__(self):
+        self.handlers = []
+
+    def bind(self, sequence, func, add=None):
+        self.handlers.append(func)
+
+    def resize(self, width, height):
+        for handler in self.handlers:
+            handler(_Event(width, height))
+
+    def configure(self, **kwargs):
+        pass
+
+
+def _frames(n, width=960, height=540, seed=1):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return [np.roll(base, i * 7, axis=1) for i in range(n)]
+
+
+def _measure(step, frames):
+    for frame in frames[:5]:  # warm-up, lets one-time buffers be allocated
+        step(frame)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    for frame in frames:
+        step(frame)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms_per_frame": elapsed / len(frames) * 1000,
+            "peak_alloc_kb_per_frame": (peak - before) / 1024}
+
+
+def run(n=200, widget=(640, 360)):
+    frames = _frames(n)
+    root = None
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        ImageTk = None
+
+    def legacy(frame):
+        # Old path: second cvtColor, new PIL image and new PhotoImage per frame
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if ImageTk is not None and root is not None:
+            ImageTk.PhotoImage(image=image)
+
+    label = _HeadlessLabel()
+    renderer = PreviewRenderer(label, max_fps=0)
+    label.resize(*widget)
+
+    def current(frame):
+        renderer.render(frame)  # frame is already RGB from the inference stage
+        if root is not None:
+            renderer.present()
+        else:
+            renderer._pending = None
+
+    results = {
+        "frames": n,
+        "frame_size": [960, 540],
+        "widget_size": list(widget),
+        "tk": root is not None,
+        "legacy": _measure(legacy, frames),
+        "renderer": _measure(current, frames),
+        "renderer_buffer_allocations": renderer.allocations,
+    }
+    if root is not None:
+        root.destroy()
+    return results
+
+
+if __name__ == "__main__":
+    res = run()
+    print(f"{res['frames']} frames 960x540 -> widget {res['widget_size']} (Tk: {res['tk']})")
+    for key in ("legacy", "renderer"):
+        r = res[key]
+        print(f"{key:>9}: {r['ms_per_frame']:6.2f} ms/frame  peak traced alloc {r['peak_alloc_kb_per_frame']:8.1f} KiB")
+    print(f"Renderer buffer (re)allocations over the whole run: {res['renderer_buffer_allocations']}")
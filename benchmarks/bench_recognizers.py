@@ -0,0 +1,114 @@
+# Latency and command accuracy of each recogniser backend on recorded command clips
+# Usage: python benchmarks/bench_recognizers.py [--record] [clips-dir]
+# Clips are 16 kHz mono WAVs listed in phrases.csv (file,language,text). The bundled ones are
+# synthetic (espeak-ng, regenerated by make_command_clips.py); --record prompts for every phrase
+# and replaces them with real recordings through the voice front end. The offline backends need
+# their packages and models (see recognizers.py); unavailable ones are reported as such.
+# Accuracy compares parsed intents, not raw text: "turn the fan on" and
+# "turn on the fan" both count as correct.
+import csv
+import os
+import statistics
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+from intent_engine import get_engine
+from recognizers import GoogleRecognizer, SphinxKeywordRecognizer, VoskGrammarRecognizer
+from voice_frontend import SAMPLE_RATE, SAMPLE_WIDTH, VoiceFrontend
+
+CLIPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "command_clips")
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, "phrases.csv"), encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def record(directory):
+    frontend = VoiceFrontend().start()
+    for row in load_manifest(directory):
+        input(f"Press Enter, then say: {row['text']!r} ({row['language']})")
+        while frontend.next_utterance(timeout=0) is not None:
+            pass  # drop anything captured while waiting
+        audio = frontend.next_utterance(timeout=8)
+        if audio is None:
+            print("  nothing heard, skipped")
+            continue
+        with wave.open(os.path.join(directory, row["file"]), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(SAMPLE_WIDTH)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH))
+        print(f"  saved {row['file']}")
+    frontend.stop()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(directory=CLIPS_DIR, backends=None):
+    engine = get_engine()
+    clips = []
+    for row in load_manifest(directory):
+        path = os.path.join(directory, row["file"])
+        if os.path.exists(path):
+            with sr.AudioFile(path) as source:
+                audio = sr.Recognizer().record(source)
+            clips.append((audio, row["language"], engine.parse(row["text"])))
+    backends = backends or [VoskGrammarRecognizer(), SphinxKeywordRecognizer(), GoogleRecognizer()]
+
+    results = {"clips": len(clips)}
+    for backend in backends:
+        latencies, correct, attempted, errors = [], 0, 0, 0
+        for audio, language, expected in clips:
+            if not backend.available(language):
+                continue
+            attempted += 1
+            t0 = time.perf_counter()
+            try:
+                text = backend.recognize(audio, language)
+            except (sr.UnknownValueError, sr.RequestError):
+                errors += 1
+                text = ""
+            latencies.append(time.perf_counter() - t0)
+            correct += engine.parse(text) == expected
+        if not attempted:
+            results[backend.name] = {"available": False}
+            continue
+        results[backend.name] = {
+            "available": True,
+            "clips": attempted,
+            "accuracy": correct / attempted,
+            "errors": errors,
+            "median_ms": statistics.median(latencies) * 1000,
+            "p95_ms": _percentile(latencies, 0.95) * 1000,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--record"]
+    directory = args[0] if args else CLIPS_DIR
+    if "--record" in sys.argv:
+        record(directory)
+        sys.exit(0)
+    res = run(directory)
+    if not res["clips"]:
+        print(f"No clips in {directory}; generate them with make_command_clips.py or record them with --record")
+        sys.exit(0)
+    print(f"{res['clips']} clips")
+    for name, r in res.items():
+        if name == "clips":
+            continue
+        if not r["available"]:
+            print(f"{name:7s}: not available (model or package missing)")
+            continue
+        print(f"{name:7s}: accuracy {r['accuracy'] * 100:5.1f}% on {r['clips']} clips, "
+              f"median {r['median_ms']:.0f} ms, p95 {r['p95_ms']:.0f} ms, errors {r['errors']}")
@@ -0,0 +1,192 @@
+# Soak throughput from recordings: recorded frames and audio pushed through the input paths faster than real time
+# A synthetic camera session and a synthetic voice session are recorded with the input_sources recorders, then
+# replayed as fast as possible through GesturePipeline and VoiceFrontend (and the frames once at 1x/4x, for pacing).
+# Inference and recognition are simulated with fixed costs, so the rates are the ceilings of the capture and
+# hand-off machinery for those costs. No camera, microphone or network is needed.
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bench_vad import synth_session
+from gesture_pipeline import GesturePipeline
+from input_sources import AudioRecorder, AudioReplay, FrameRecorder, FrameReplay
+from voice_frontend import VoiceFrontend
+
+
+class SyntheticCamera:
+    """A bright square moving over sensor noise, stamped on a virtual 30 fps clock (no waiting)."""
+
+    live = True
+
+    def __init__(self, frames, width=320, height=240, fps=30):
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.finished = False
+        rng = np.random.default_rng(1)
+        self._noise = [rng.integers(0, 40, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+        self._i = 0
+
+    def open(self):
+        return self
+
+    def read(self):
+        if self._i >= self.frames:
+            self.finished = True
+            return None
+        frame = self._noise[self._i % len(self._noise)].copy()
+        x = int((self._i * 4) % (self.width - 40))
+        frame[100:140, x:x + 40] = 220
+        self._i += 1
+        return frame, self._i / self.fps
+
+    def close(self):
+        pass
+
+
+def record_frames(path, frames):
+    recorder = FrameRecorder(SyntheticCamera(frames), path).open()
+    start = time.perf_counter()
+    while recorder.read() is not None:
+        pass
+    elapsed = time.perf_counter() - start
+    recorder.close()
+    return {"frames": recorder.frames, "record_us_per_frame": elapsed / recorder.frames * 1e6,
+            "file_mb": os.path.getsize(path) / 1e6}
+
+
+def raw_replay(path):
+    replay = FrameReplay(path, speed=None).open()
+    start = time.perf_counter()
+    n = 0
+    while replay.read() is not None:
+        n += 1
+    elapsed = time.perf_counter() - start
+    size = replay.frames.dtype.itemsize * n
+    replay.close()
+    return {"read_fps": n / elapsed, "read_mb_per_s": size / elapsed / 1e6}
+
+
+def pipeline_replay(path, infer_s, lossless):
+    replay = FrameReplay(path, speed=None).open()
+    classified = []
+
+    def infer(captured):
+        frame, _ = captured
+        time.sleep(infer_s)
+        classified.append(int(frame[100:140].argmax()))
+        return captured
+
+    pipeline = GesturePipeline(replay.read, infer, lambda result: None, lossless=lossless).start()
+    start = time.perf_counter()
+    while not replay.finished:
+        time.sleep(0.005)
+    deadline = time.perf_counter() + 5
+    while lossless and len(classified) < replay.delivered and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    stats = pipeline.stats()
+    pipeline.stop()
+    recorded_s = replay.duration
+    replay.close()
+    return {"lossless": lossless, "classified": len(classified), "dropped": stats["dropped"]["frames"],
+            "frames_per_s": len(classified) / elapsed, "x_real_time": recorded_s / elapsed}
+
+
+def paced_replay(path, speed, frames=60):
+    # Delivery time vs. the recorded timestamp / speed, with an instant consumer
+    replay = FrameReplay(path, speed=speed).open()
+    times = replay.frames["t"]
+    late = []
+    origin = None
+    for i in range(min(frames, len(times))):
+        _, delivered_at = replay.read()
+        origin = delivered_at if origin is None else origin
+        late.append(delivered_at - (origin + (times[i] - times[0]) / speed))
+    replay.close()
+    late = sorted(late)
+    return {"speed": speed, "late_p50_ms": late[len(late) // 2] * 1000, "late_max_ms": late[-1] * 1000,
+            "skipped": replay.skipped}
+
+
+def voice_replay(path, spans, recognize_s):
+    # Replay through VoiceFrontend (recording the replay again, to check the markers), with a simulated recogniser
+    source = AudioRecorder(AudioReplay(path, speed=None), path[:-4] + "-copy.wav")
+    frontend = VoiceFrontend(source=source)
+    recognized = []
+    start = time.perf_counter()
+    frontend.start()
+
+    def recognizer():
+        while frontend.running or not frontend.utterances.empty():
+            utterance = frontend.next_utterance(timeout=0.1)
+            if utterance is not None:
+                time.sleep(recognize_s)
+                recognized.append(utterance)
+
+    worker = threading.Thread(target=recognizer)
+    worker.start()
+    worker.join()
+    elapsed = time.perf_counter() - start
+    frontend.stop()
+    if frontend.error is not None:
+        raise frontend.error
+    recorded_s = source.samples / source.sample_rate
+    with open(source.markers_path) as f:
+        markers = [tuple(map(float, line.split())) for line in f if line.strip()]
+    # Re-recorded markers vs. the synthesised speech: mean signed offset of each edge (VAD onset/offset delay)
+    nearest = [min(spans, key=lambda span: abs(span[0] - start)) for start, _ in markers]
+    start_error = [(start - span[0]) * 1000 for (start, _), span in zip(markers, nearest)]
+    end_error = [(end - span[1]) * 1000 for (_, end), span in zip(markers, nearest)]
+    return {"utterances": len(recognized), "markers_written": len(markers), "dropped": frontend.dropped,
+            "utterances_per_s": len(recognized) / elapsed, "x_real_time": recorded_s / elapsed,
+            "audio_s": recorded_s,
+            "marker_start_offset_ms": sum(start_error) / len(start_error) if start_error else None,
+            "marker_end_offset_ms": sum(end_error) / len(end_error) if end_error else None}
+
+
+def run(frames=600, infer_s=0.005, utterances=60, recognize_s=0.02):
+    tmp = tempfile.mkdtemp()
+    try:
+        frames_path = os.path.join(tmp, "session.frames")
+        recorded = record_frames(frames_path, frames)
+        video = {"recorded": recorded, "raw": raw_replay(frames_path),
+                 "pipeline": [pipeline_replay(frames_path, infer_s, lossless) for lossless in (True, False)],
+                 "paced": [paced_replay(frames_path, speed) for speed in (1.0, 4.0)]}
+        audio_path = os.path.join(tmp, "session.wav")
+        spans = synth_session(audio_path, n_utterances=utterances)
+        with open(audio_path[:-4] + ".txt", "w") as f:
+            f.writelines(f"{start:.3f} {end:.3f}\n" for start, end in spans)
+        audio = dict(voice_replay(audio_path, spans, recognize_s), spoken=len(spans))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"infer_ms": infer_s * 1000, "recognize_ms": recognize_s * 1000, "video": video, "audio": audio}
+
+
+if __name__ == "__main__":
+    r = run()
+    v, a = r["video"], r["audio"]
+    rec = v["recorded"]
+    print(f"recorded {rec['frames']} frames of 320x240: {rec['record_us_per_frame']:.0f} us/frame, "
+          f"{rec['file_mb']:.0f} MB")
+    print(f"raw replay: {v['raw']['read_fps']:.0f} frames/s ({v['raw']['read_mb_per_s']:.0f} MB/s)")
+    for p in v["pipeline"]:
+        print(f"pipeline, {r['infer_ms']:.0f} ms inference, {'lossless' if p['lossless'] else 'latest-wins'}: "
+              f"{p['classified']} frames classified at {p['frames_per_s']:.0f} fps ({p['x_real_time']:.1f}x real time), "
+              f"dropped {p['dropped']}")
+    for p in v["paced"]:
+        print(f"paced replay at {p['speed']:g}x: delivery late p50 {p['late_p50_ms']:.2f} ms, "
+              f"max {p['late_max_ms']:.2f} ms, skipped {p['skipped']}")
+    print(f"voice, {r['recognize_ms']:.0f} ms recognition: {a['utterances']}/{a['spoken']} utterances from "
+          f"{a['audio_s']:.0f} s of audio at {a['utterances_per_s']:.1f}/s ({a['x_real_time']:.0f}x real time), "
+          f"{a['markers_written']} markers re-recorded, dropped {a['dropped']}")
+    print(f"re-recorded markers vs. the synthesised speech: start {a['marker_start_offset_ms']:+.0f} ms, "
+          f"end {a['marker_end_offset_ms']:+.0f} ms")
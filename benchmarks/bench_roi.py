@@ -0,0 +1,72 @@
+# ROI tracking + resolution control with a simulated detector whose cost scales with pixels
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from roi_tracker import ResolutionController, RoiTracker
+
+FRAME = (540, 960)
+HAND = np.array([[0.0, 0.0], [0.1, -0.12], [0.05, -0.2], [-0.04, -0.18], [-0.08, -0.05]])  # rough outline, frame units
+
+
+def hand_at(t):
+    """Landmarks of a hand drifting around the frame; absent for t in [6, 7) s."""
+    if 6.0 <= t < 7.0:
+        return None
+    cx = 0.5 + 0.3 * math.sin(t * 0.7)
+    cy = 0.6 + 0.15 * math.sin(t * 1.3)
+    pts = np.zeros((1, 21, 3), dtype=np.float32)
+    pts[0, :, :2] = np.resize(HAND, (21, 2)) * 0.9 + (cx, cy)
+    return pts
+
+
+def run(full_frame_ms=110.0, fixed_ms=6.0, target_fps=15, seconds=20.0):
+    """Low-end laptop model: inference = fixed + full_frame_ms * (pixels / full-frame pixels)."""
+    tracker = RoiTracker()
+    controller = ResolutionController(target_fps=target_fps)
+    full_pixels = FRAME[0] * FRAME[1]
+    t, frames, inference_total, misses = 0.0, 0, 0.0, 0
+    baseline_total = 0.0
+    while t < seconds:
+        x0, y0, x1, y1 = tracker.roi(FRAME)
+        w, h = controller.size_for(x1 - x0, y1 - y0)
+        duration = (fixed_ms + full_frame_ms * (w * h) / full_pixels) / 1000.0
+        controller.record(duration, now=t)
+        hand = hand_at(t)
+        if hand is not None:
+            # The detector finds the hand only if it lies inside the crop
+            px, py = hand[0, :, 0] * FRAME[1], hand[0, :, 1] * FRAME[0]
+            if px.min() >= x0 and px.max() <= x1 and py.min() >= y0 and py.max() <= y1:
+                tracker.update(hand, FRAME)
+            else:
+                misses += 1
+                tracker.update(None, FRAME)
+        else:
+            tracker.update(None, FRAME)
+        inference_total += duration
+        baseline_total += (fixed_ms + full_frame_ms) / 1000.0
+        frames += 1
+        t += duration
+    stats = tracker.stats()
+    return {
+        "frames": frames,
+        "target_fps": target_fps,
+        "full_frame_fps": frames / baseline_total,
+        "achieved_fps": frames / inference_total,
+        "tracked_ratio": stats["tracked_ratio"],
+        "pixel_ratio": stats["pixel_ratio"],
+        "final_scale": controller.scale,
+        "frames_hand_outside_crop": misses,
+    }
+
+
+if __name__ == "__main__":
+    res = run()
+    print(f"Full-frame detector: {res['full_frame_fps']:.1f} fps; with ROI + resolution control: "
+          f"{res['achieved_fps']:.1f} fps (target {res['target_fps']})")
+    print(f"Tracked {res['tracked_ratio']:.0%} of frames, {res['pixel_ratio']:.0%} of full-frame pixels, "
+          f"final scale {res['final_scale']:.0%}, hand outside crop {res['frames_hand_outside_crop']} times")
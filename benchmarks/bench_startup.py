@@ -0,0 +1,108 @@
+# Cold-start regression check: time until hybrid_ui can show its window, eager vs. lazy imports
+# Usage: python benchmarks/bench_startup.py [--budget-ms N] [--runs N]
+# Every measurement runs in a fresh interpreter. "eager" imports cv2, mediapipe and
+# speech_recognition up front like the UI used to; "lazy" is the current module import.
+# With a display, the real window is opened with --startup-report and the per-component
+# warm-up timings are collected as well. Exits 1 when the median exceeds the budget, or when a
+# component fails in the background warm-up but loads fine through require() (a factory reading a
+# module global that only require() binds).
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EAGER = """
+import time
+t0 = time.perf_counter()
+for name in ("cv2", "mediapipe", "speech_recognition"):
+    try:
+        __import__(name)
+    except Exception:
+        pass
+import hybrid_ui
+print((time.perf_counter() - t0) * 1000)
+"""
+
+LAZY = """
+import time
+t0 = time.perf_counter()
+import hybrid_ui
+print((time.perf_counter() - t0) * 1000)
+"""
+
+
+# Warm-up errors per component, before anything has gone through require()
+WARMED = """
+import json
+import hybrid_ui
+hybrid_ui.COMPONENTS.warm(hybrid_ui.WARMUP_ORDER).join()
+print(json.dumps({name: t["error"] for name, t in hybrid_ui.COMPONENTS.report().items()}))
+"""
+
+# The same components loaded on first use, as when the warm-up is off
+REQUIRED = """
+import json
+import hybrid_ui
+print(json.dumps({name: hybrid_ui.require(name) for name in hybrid_ui.WARMUP_ORDER}))
+"""
+
+
+def _python(code, env=None):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                         env=env, timeout=120, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def warm_up_check():
+    """Components that load through require() but fail in the background warm-up: {name: error}."""
+    warmed, required = _python(WARMED), _python(REQUIRED)
+    return {name: error for name, error in warmed.items() if error and required.get(name)}
+
+
+def window_report():
+    """Open the real window once (needs a display); returns hybrid_ui's startup JSON or None."""
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        return None
+    out = subprocess.run([sys.executable, "hybrid_ui.py", "--startup-report"], cwd=ROOT, capture_output=True,
+                         text=True, timeout=120)
+    for line in reversed(out.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return None
+
+
+def run(runs=5):
+    eager = [_python(EAGER) for _ in range(runs)]
+    lazy = [_python(LAZY) for _ in range(runs)]
+    return {"eager_import_ms": statistics.median(eager), "lazy_import_ms": statistics.median(lazy),
+            "window": window_report(), "warm_up_failures": warm_up_check()}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    budget = float(args[args.index("--budget-ms") + 1]) if "--budget-ms" in args else 400.0
+    runs = int(args[args.index("--runs") + 1]) if "--runs" in args else 5
+    res = run(runs)
+    print(f"module import, eager heavy deps : {res['eager_import_ms']:.0f} ms (median of {runs})")
+    print(f"module import, lazy             : {res['lazy_import_ms']:.0f} ms (median of {runs})")
+    startup_ms = res["lazy_import_ms"]
+    window = res["window"]
+    if window is None:
+        print("window: no display, measured module import only")
+    else:
+        startup_ms = window["window_ms"]
+        print(f"window ready                    : {window['window_ms']:.0f} ms")
+        for name, timing in window["components"].items():
+            cost = timing["error"] or f"{timing['ms']:.0f} ms"
+            print(f"  warm-up {timing['kind']:6s} {name:18s}: {cost}")
+    for name, error in res["warm_up_failures"].items():
+        print(f"REGRESSION: {name} fails in the warm-up ({error}) but loads through require()")
+    if res["warm_up_failures"]:
+        sys.exit(1)
+    if startup_ms > budget:
+        print(f"REGRESSION: {startup_ms:.0f} ms > budget {budget:.0f} ms")
+        sys.exit(1)
+    print(f"OK: {startup_ms:.0f} ms <= budget {budget:.0f} ms")
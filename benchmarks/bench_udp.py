@@ -0,0 +1,54 @@
+# Per-command latency: HTTP routes (keep-alive and stock close-per-request) vs. the UDP transport
+# Loss is simulated on the stub: for UDP, datagrams lost each way; for HTTP, the same fraction of
+# requests dropped without a reply (the closest a local TCP stand-in gets to a lossy link). The drop
+# closes the connection at once, so HTTP retries immediately; real TCP loss waits out its own
+# retransmit timer (200 ms minimum), which makes the HTTP tails under loss optimistic.
+# "applied" must equal the command count: retransmissions may never switch a relay twice.
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esp32_client import DeviceDispatcher, route_for
+from esp32_stub import ESP32Stub
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_case(mode, loss, n=400, latency=0.003, jitter=0.002):
+    udp = mode == "udp"
+    stub = ESP32Stub(latency=latency, jitter=jitter, keep_alive=mode != "http-close", seed=1,
+                     drop_rate=0.0 if udp else loss, udp=udp, udp_loss=loss if udp else 0.0).start()
+    dispatcher = DeviceDispatcher({"main": stub.address}, keep_alive=mode != "http-close", timeout=0.5,
+                                  retries=3, retry_delay=0.0, udp={"main": stub.udp_port} if udp else None).start()
+    try:
+        async def drive():
+            results = []
+            for i in range(n):
+                results.append(await dispatcher.request("main", route_for(("light", "fan", "tv", "ac")[i % 4], i % 8 < 4)))
+            return results
+
+        results = asyncio.run_coroutine_threadsafe(drive(), dispatcher.loop).result()
+        latencies = [r.latency for r in results]
+        return {"mode": mode, "loss": loss, "p50_ms": percentile(latencies, 50) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000, "ok": sum(r.ok for r in results) / n,
+                "over_udp": sum(r.transport == "udp" for r in results) / n, "fallbacks": dispatcher.udp_fallbacks,
+                "applied": stub.requests, "commands": n}
+    finally:
+        dispatcher.stop()
+        stub.stop()
+
+
+def run():
+    return [run_case(mode, loss) for loss in (0.0, 0.02, 0.1) for mode in ("http-close", "http-keepalive", "udp")]
+
+
+if __name__ == "__main__":
+    for r in run():
+        extra = f", {r['over_udp'] * 100:.0f}% over UDP, {r['fallbacks']} HTTP fallbacks" if r["mode"] == "udp" else ""
+        print(f"loss {r['loss'] * 100:4.1f}% {r['mode']:15s}: p50 {r['p50_ms']:5.2f} ms, p99 {r['p99_ms']:6.2f} ms, "
+              f"ok {r['ok'] * 100:5.1f}%, board applied {r['applied']} for {r['commands']} commands{extra}")
@@ -0,0 +1,126 @@
+# Tk event-queue load: one root.after(0) per update (old safe_update) vs. the coalescing dispatcher
+# Runs headless: AfterQueue plays the part of Tk's timer queue and repaint costs are simulated
+# with sleeps on the "Tk" (main) thread: a 20 ms preview paint at 60 camera fps overloads it.
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui_dispatcher import UiDispatcher
+
+PAINT_COST = {"preview": 0.020, "gesture_status": 0.001, "voice_status": 0.001}
+
+
+class AfterQueue:
+    """root.after() semantics: callbacks run on the thread calling run(), in due-time then FIFO order."""
+
+    def __init__(self):
+        self._heap = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def after(self, ms, func):
+        with self._lock:
+            heapq.heappush(self._heap, (time.perf_counter() + ms / 1000.0, next(self._seq), func))
+
+    def bind(self, sequence, func, add=None):
+        pass
+
+    def run_due(self):
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > time.perf_counter():
+                    return
+                _, _, func = heapq.heappop(self._heap)
+            func()
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class Sink:
+    """Records how stale each applied update was and burns the repaint time on the Tk thread."""
+
+    def __init__(self):
+        self.latencies = []
+        self.busy = 0.0
+
+    def paint(self, target, posted_at):
+        t0 = time.perf_counter()
+        time.sleep(PAINT_COST[target])
+        self.busy += time.perf_counter() - t0
+        self.latencies.append(time.perf_counter() - posted_at)
+
+
+def producers(post, duration, camera_fps=60):
+    """Gesture pipeline: preview every frame + stats line; voice: bursts of status text."""
+    stop = time.perf_counter() + duration
+
+    def gesture():
+        n = 0
+        while time.perf_counter() < stop:
+            post("preview")
+            if n % 6 == 0:
+                post("gesture_status")
+            n += 1
+            time.sleep(1.0 / camera_fps)
+
+    def voice():
+        while time.perf_counter() < stop:
+            for _ in range(4):  # hearing / processing / recognized / ...
+                post("voice_status")
+                time.sleep(0.01)
+            time.sleep(0.4)
+
+    return [threading.Thread(target=gesture), threading.Thread(target=voice)]
+
+
+def run_mode(coalesce, duration=3.0):
+    root = AfterQueue()
+    sink = Sink()
+    dispatcher = UiDispatcher(root, rate=30)
+    if coalesce:
+        def post(target):
+            dispatcher.post(target, sink.paint, target, time.perf_counter())
+    else:
+        def post(target):
+            posted_at = time.perf_counter()
+            root.after(0, lambda: sink.paint(target, posted_at))
+    threads = producers(post, duration)
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    while any(t.is_alive() for t in threads):
+        root.run_due()
+        time.sleep(0.001)
+    for t in threads:
+        t.join()
+    # Drain what is still queued: that backlog is what the user watches catch up
+    while len(root):
+        root.run_due()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - t0
+    lat = sorted(sink.latencies)
+    return {"applied": len(lat),
+            "dropped": dispatcher.stats()["dropped_total"] if coalesce else 0,
+            "catch_up_ms": (elapsed - duration) * 1000,
+            "busy_ratio": sink.busy / elapsed,
+            "p50_ms": lat[len(lat) // 2] * 1000,
+            "p99_ms": lat[int(len(lat) * 0.99)] * 1000,
+            "max_ms": lat[-1] * 1000}
+
+
+def run(duration=3.0):
+    return {"after_per_update": run_mode(False, duration), "coalescing": run_mode(True, duration)}
+
+
+if __name__ == "__main__":
+    res = run()
+    for name, r in res.items():
+        print(f"{name:16s}: applied {r['applied']:4d}, dropped {r['dropped']:4d}, Tk busy {r['busy_ratio'] * 100:3.0f}%, "
+              f"staleness p50 {r['p50_ms']:.0f} ms, p99 {r['p99_ms']:.0f} ms, max {r['max_ms']:.0f} ms, "
+              f"{r['catch_up_ms']:.0f} ms to catch up after the load stops")
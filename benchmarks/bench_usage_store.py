@@ -0,0 +1,127 @@
+# Usage store: caller-side record() cost, batched write throughput, indexed queries and rollup
+# summaries on years of events
+# Usage: python benchmarks/bench_usage_store.py [years] [devices]
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_engine import DEVICES
+from usage_store import SOURCES, UsageStore
+
+
+def synth_history(store, years=3, devices=DEVICES, switches_per_day=12, seed=9):
+    """Alternating ON/OFF transitions per device, spread over `years` ending now."""
+    rng = random.Random(seed)
+    now = time.time()
+    t = now - years * 365 * 86400
+    step = 86400 / (switches_per_day * len(devices))
+    n = 0
+    while t < now - 3600:
+        t += rng.uniform(0.5, 1.5) * step
+        device = rng.choice(devices)
+        if store.record(device, not store.current_state(device)[0], rng.choice(SOURCES), ts=t):
+            n += 1
+    return n
+
+
+def naive_on_seconds(conn, device_code, start, end):
+    """What a query without the store's indexes/bookkeeping costs: scan and replay everything."""
+    total, on_since = 0.0, None
+    for ts, device, state in conn.execute("SELECT ts, device, state FROM events ORDER BY id"):
+        if device != device_code:
+            continue
+        if state and on_since is None:
+            on_since = ts
+        elif not state and on_since is not None:
+            if ts > start and on_since < end:
+                total += min(ts, end) - max(on_since, start)
+            on_since = None
+    if on_since is not None and on_since < end:
+        total += end - max(on_since, start)
+    return total
+
+
+def _time(fn, repeat=20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat * 1000, result
+
+
+def run(years=3, n_devices=len(DEVICES)):
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "usage.db")
+    devices = list(DEVICES) + [f"device-{i}" for i in range(len(DEVICES), n_devices)]
+    store = UsageStore(path)
+    t0 = time.perf_counter()
+    events = synth_history(store, years, devices)
+    record_s = time.perf_counter() - t0
+    store.flush(timeout=120)
+    write_s = time.perf_counter() - t0
+
+    now = time.time()
+    day_ms, today = _time(lambda: store.on_seconds("fan", now - 86400, now))
+    week_ms, _ = _time(lambda: store.daily_usage(7), repeat=5)
+    hour_ms, changes = _time(lambda: store.recent_changes(3600 * 6))
+    duration_ms, _ = _time(lambda: store.on_duration("fan"), repeat=10000)
+    naive_ms, naive = _time(lambda: naive_on_seconds(store._reader, 1, now - 86400, now), repeat=3)
+    rollup_day_ms, _ = _time(lambda: store.usage("fan", "day"), repeat=10000)
+    summary_ms, _ = _time(lambda: store.summary("week"), repeat=200)
+    reminder_ms, _ = _time(lambda: store.running_longer_than(2 * 3600), repeat=1000)
+    stats = store.stats()
+    store.close()
+    # Crash recovery: throw the rollups away; opening returns at once and rebuilds on the writer thread,
+    # answering summaries from the raw log meanwhile
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM meta")
+    t0 = time.perf_counter()
+    store = UsageStore(path)
+    open_ms = (time.perf_counter() - t0) * 1000
+    raw_summary_ms, _ = _time(lambda: store.summary("day"), repeat=3) if store.rebuilding else (None, None)
+    store.flush(timeout=600)
+    rebuild_s = time.perf_counter() - t0
+    store.close()
+    return {
+        "events": events,
+        "record_us": record_s / events * 1e6,
+        "write_events_per_s": events / write_s,
+        "batches": stats["batches"],
+        "db_mb": os.path.getsize(os.path.join(tmp, "usage.db")) / 1e6,
+        "on_duration_us": duration_ms * 1000,
+        "fan_last_24h_ms": day_ms,
+        "daily_usage_7d_ms": week_ms,
+        "changes_6h_ms": hour_ms,
+        "changes_6h": len(changes),
+        "naive_last_24h_ms": naive_ms,
+        "agree": abs(today - naive) < 1e-3,
+        "devices": len(devices),
+        "rollup_day_us": rollup_day_ms * 1000,
+        "week_summary_ms": summary_ms,
+        "long_running_check_us": reminder_ms * 1000,
+        "open_after_crash_ms": open_ms,
+        "raw_summary_ms": raw_summary_ms,
+        "rebuild_s": rebuild_s,
+    }
+
+
+if __name__ == "__main__":
+    res = run(float(sys.argv[1]) if len(sys.argv) > 1 else 3, int(sys.argv[2]) if len(sys.argv) > 2 else 4)
+    print(f"{res['events']} events, {res['devices']} devices, {res['db_mb']:.1f} MB, {res['batches']} batches")
+    print(f"record() on caller : {res['record_us']:.1f} us/event")
+    print(f"batched writes     : {res['write_events_per_s']:.0f} events/s")
+    print(f"on_duration        : {res['on_duration_us']:.2f} us (in memory)")
+    print(f"fan ON last 24 h   : {res['fan_last_24h_ms']:.2f} ms indexed vs {res['naive_last_24h_ms']:.0f} ms "
+          f"full scan (agree={res['agree']})")
+    print(f"7-day summary      : {res['daily_usage_7d_ms']:.2f} ms")
+    print(f"changes, last 6 h  : {res['changes_6h_ms']:.2f} ms ({res['changes_6h']} events)")
+    print(f"rollup: fan today  : {res['rollup_day_us']:.2f} us")
+    print(f"rollup: week, all  : {res['week_summary_ms']:.3f} ms")
+    print(f"ON > 2 h check     : {res['long_running_check_us']:.2f} us")
+    raw = f", raw-log day summary meanwhile {res['raw_summary_ms']:.1f} ms" if res["raw_summary_ms"] is not None else ""
+    print(f"rollup rebuild     : open in {res['open_after_crash_ms']:.1f} ms, rebuilt on the writer in "
+          f"{res['rebuild_s']:.2f} s{raw}")
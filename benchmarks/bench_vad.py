@@ -0,0 +1,170 @@
+# End-of-speech -> utterance-ready latency: per-command calibrate+listen vs. the streaming VAD
+# Usage: python benchmarks/bench_vad.py [dir-with-16k-mono-wavs]
+# Without a directory, a synthetic session (speech-like bursts over room noise) is generated.
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import speech_recognition as sr
+
+from voice_frontend import SAMPLE_RATE, Segmenter
+
+
+def _burst(rng, dur):
+    """Speech-like burst: a harmonic voice with syllable-rate loudness, over room noise."""
+    n = int(dur * SAMPLE_RATE)
+    tt = np.arange(n) / SAMPLE_RATE
+    f0 = rng.uniform(110, 220)
+    voiced = sum(np.sin(2 * np.pi * f0 * k * tt) / k for k in range(1, 6))
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 5) * tt - np.pi / 2))
+    return 3500 * voiced * (0.3 + 0.7 * syllables) + rng.normal(0, 150, n)
+
+
+def synth_session(path, n_utterances=12, seed=4):
+    """Write a WAV with noise and speech-like bursts; returns [(start_s, end_s)] of each burst."""
+    rng = np.random.default_rng(seed)
+    pieces, spans, t = [], [], 0.0
+
+    def noise(seconds):
+        return rng.normal(0, 150, int(seconds * SAMPLE_RATE))
+
+    lead = noise(1.5)
+    pieces.append(lead)
+    t += 1.5
+    for _ in range(n_utterances):
+        dur = rng.uniform(0.7, 1.6)
+        pieces.append(_burst(rng, dur))
+        spans.append((t, t + dur))
+        t += dur
+        gap = rng.uniform(1.2, 2.5)
+        pieces.append(noise(gap))
+        t += gap
+    audio = np.clip(np.concatenate(pieces), -32768, 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(audio.tobytes())
+    return spans
+
+
+def _match(spans, close_s):
+    """Latest speech end at or before the time an utterance became available."""
+    ends = [end for _, end in spans if end <= close_s + 1e-6]
+    return close_s - ends[-1] if ends else None
+
+
+def legacy_latencies(path, spans, calibrate_s=0.6):
+    """hybrid_ui.voice_loop before the front end: calibrate, then listen, every command."""
+    recognizer = sr.Recognizer()
+    latencies, found = [], set()
+    with sr.AudioFile(path) as source:
+        total = source.audio_reader.getnframes()
+        while source.audio_reader.tell() < total - SAMPLE_RATE // 2:
+            recognizer.adjust_for_ambient_noise(source, duration=calibrate_s)
+            try:
+                recognizer.listen(source, timeout=5, phrase_time_limit=4)
+            except sr.WaitTimeoutError:
+                continue
+            close_s = source.audio_reader.tell() / SAMPLE_RATE
+            latency = _match(spans, close_s)
+            if latency is not None:
+                idx = max(i for i, (_, end) in enumerate(spans) if end <= close_s + 1e-6)
+                if idx not in found:
+                    found.add(idx)
+                    latencies.append(latency)
+    return latencies, len(found)
+
+
+def frontend_latencies(path, spans):
+    segmenter = Segmenter()
+    latencies, found = [], set()
+    with wave.open(path, "rb") as f:
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    t0 = time.perf_counter()
+    chunk = segmenter.frame_len * 5
+    for i in range(0, len(data), chunk):
+        for _, position in segmenter.feed(data[i:i + chunk]):
+            close_s = position / SAMPLE_RATE
+            latency = _match(spans, close_s)
+            if latency is not None:
+                idx = max(i for i, (_, end) in enumerate(spans) if end <= close_s + 1e-6)
+                if idx not in found:
+                    found.add(idx)
+                    latencies.append(latency)
+    cpu = time.perf_counter() - t0
+    return latencies, len(found), cpu / (len(data) / SAMPLE_RATE)
+
+
+def pre_roll_check(gap_s=0.45, seed=6):
+    """
+    Two utterances a short pause apart: every segment must be one contiguous
+    slice of the stream ending where feed() says it closed, so the second
+    one's pre-roll is the pause just before it, not audio from before the first.
+    """
+    rng = np.random.default_rng(seed)
+    pieces = [rng.normal(0, 150, SAMPLE_RATE), _burst(rng, 1.0), rng.normal(0, 150, int(gap_s * SAMPLE_RATE)),
+              _burst(rng, 1.0), rng.normal(0, 150, SAMPLE_RATE)]
+    data = np.clip(np.concatenate(pieces), -32768, 32767).astype(np.int16)
+    segmenter = Segmenter()
+    chunk = segmenter.frame_len * 5
+    segments = [s for i in range(0, len(data), chunk) for s in segmenter.feed(data[i:i + chunk])]
+    contiguous = [bool(np.array_equal(audio, data[end - len(audio):end])) for audio, end in segments]
+    return {"segments": len(segments), "contiguous": all(contiguous) and len(segments) == 2}
+
+
+def _stats(values):
+    if not values:
+        return {"mean_ms": None, "max_ms": None}
+    return {"mean_ms": float(np.mean(values)) * 1000, "max_ms": float(np.max(values)) * 1000}
+
+
+def run(directory=None):
+    sessions = []
+    tmp = None
+    if directory:
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".wav"):
+                spans_file = os.path.join(directory, name[:-4] + ".txt")
+                if os.path.exists(spans_file):  # "start end" per line, seconds
+                    with open(spans_file) as f:
+                        spans = [tuple(map(float, line.split())) for line in f if line.strip()]
+                    sessions.append((os.path.join(directory, name), spans))
+    else:
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, "session.wav")
+        sessions.append((path, synth_session(path)))
+
+    legacy, fe, total, legacy_found, fe_found, rtf = [], [], 0, 0, 0, []
+    for path, spans in sessions:
+        lat, n = legacy_latencies(path, spans)
+        legacy += lat
+        legacy_found += n
+        lat, n, cpu = frontend_latencies(path, spans)
+        fe += lat
+        fe_found += n
+        rtf.append(cpu)
+        total += len(spans)
+    return {
+        "utterances": total,
+        "legacy": dict(_stats(legacy), detected=legacy_found),
+        "frontend": dict(_stats(fe), detected=fe_found, real_time_factor=float(np.mean(rtf))),
+        "pre_roll": pre_roll_check(),
+    }
+
+
+if __name__ == "__main__":
+    res = run(sys.argv[1] if len(sys.argv) > 1 else None)
+    l, f = res["legacy"], res["frontend"]
+    print(f"{res['utterances']} utterances")
+    print(f"calibrate+listen : end of speech -> audio ready mean {l['mean_ms']:.0f} ms, max {l['max_ms']:.0f} ms, "
+          f"detected {l['detected']}")
+    print(f"streaming VAD    : end of speech -> audio ready mean {f['mean_ms']:.0f} ms, max {f['max_ms']:.0f} ms, "
+          f"detected {f['detected']}, CPU {f['real_time_factor'] * 100:.2f}% of real time")
+    p = res["pre_roll"]
+    print(f"two close utterances: {p['segments']} segments, audio is the stream just before each: {p['contiguous']}")
@@ -0,0 +1,94 @@
+# Utterance-to-command latency for back-to-back voice commands: serial loop vs. the recognition pipeline
+# Recognition is simulated with sleeps drawn from a cloud-like latency distribution.
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_pipeline import RecognitionPipeline
+
+
+def make_session(n=20, seed=5):
+    """(gap before utterance, recognition time) pairs; a few commands arrive in quick bursts."""
+    rng = random.Random(seed)
+    session = []
+    for i in range(n):
+        gap = rng.uniform(0.15, 0.4) if i % 3 else rng.uniform(0.8, 1.5)
+        recognize = rng.uniform(0.35, 0.9) if rng.random() > 0.1 else rng.uniform(2.0, 3.0)
+        session.append((gap, recognize))
+    return session
+
+
+def _recognize(item):
+    seq, recognize_s = item
+    time.sleep(recognize_s)
+    return seq
+
+
+def run_serial(session):
+    """Old voice_loop: the next utterance is only picked up once the previous one is handled."""
+    latencies, t = [], time.monotonic()
+    ready_at = []
+    for gap, _ in session:
+        t += gap
+        ready_at.append(t)
+    for seq, (_, recognize_s) in enumerate(session):
+        now = time.monotonic()
+        if now < ready_at[seq]:
+            time.sleep(ready_at[seq] - now)
+        _recognize((seq, recognize_s))
+        latencies.append(time.monotonic() - ready_at[seq])
+    return latencies, list(range(len(session)))
+
+
+def run_pipeline(session, workers=3):
+    latencies, order = [], []
+    ready_at = {}
+
+    def on_result(seq):
+        latencies.append(time.monotonic() - ready_at[seq])
+        order.append(seq)
+
+    pipeline = RecognitionPipeline(_recognize, on_result, workers=workers).start()
+    t = time.monotonic()
+    for seq, (gap, recognize_s) in enumerate(session):
+        t += gap
+        time.sleep(max(0.0, t - time.monotonic()))
+        ready_at[seq] = time.monotonic()
+        pipeline.submit((seq, recognize_s))
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and len(order) + pipeline.skipped + pipeline.stale < len(session):
+        time.sleep(0.02)
+    stats = pipeline.stats()
+    pipeline.stop()
+    return latencies, order, stats
+
+
+def _summary(latencies):
+    latencies = sorted(latencies)
+    return {"mean_ms": sum(latencies) / len(latencies) * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000,
+            "max_ms": latencies[-1] * 1000}
+
+
+def run(n=20):
+    session = make_session(n)
+    serial, _ = run_serial(session)
+    piped, order, stats = run_pipeline(session)
+    return {"utterances": n,
+            "serial": _summary(serial),
+            "pipeline": dict(_summary(piped), applied=len(order), in_order=order == sorted(order),
+                             skipped=stats["skipped"], stale=stats["stale"],
+                             peak_in_flight=stats["peak_in_flight"])}
+
+
+if __name__ == "__main__":
+    res = run()
+    s, p = res["serial"], res["pipeline"]
+    print(f"{res['utterances']} utterances")
+    print(f"serial   : mean {s['mean_ms']:.0f} ms, p95 {s['p95_ms']:.0f} ms, max {s['max_ms']:.0f} ms")
+    print(f"pipeline : mean {p['mean_ms']:.0f} ms, p95 {p['p95_ms']:.0f} ms, max {p['max_ms']:.0f} ms, "
+          f"applied {p['applied']} in order={p['in_order']}, skipped {p['skipped']}, stale {p['stale']}, "
+          f"in flight {p['peak_in_flight']}")
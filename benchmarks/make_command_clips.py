@@ -0,0 +1,82 @@
+# Writes the synthetic command clips in benchmarks/fixtures/command_clips: every phrase in phrases.csv
+# spoken by the espeak-ng synthesiser, as 16 kHz mono 16-bit WAVs with 300 ms of silence on each side.
+# Needs libespeak-ng (system package, or `pip install espeakng-loader`). Synthetic speech is cleaner
+# than a real microphone, so accuracy on these clips is an upper bound; record real ones over them
+# with `python benchmarks/bench_recognizers.py --record` for field numbers.
+import csv
+import ctypes
+import ctypes.util
+import os
+import wave
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLIPS_DIR = os.path.join(HERE, "fixtures", "command_clips")
+SAMPLE_RATE = 16000
+PADDING_S = 0.3
+VOICES = {"en": "en-us", "hi": "hi", "mr": "mr"}
+
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+POS_CHARACTER = 1
+CHARS_UTF8 = 1
+RATE = 1
+CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+
+def _library():
+    try:
+        import espeakng_loader
+    except ImportError:
+        path, data = ctypes.util.find_library("espeak-ng"), None
+    else:
+        path, data = espeakng_loader.get_library_path(), espeakng_loader.get_data_path()
+    if path is None:
+        raise SystemExit("libespeak-ng not found: install espeak-ng or `pip install espeakng-loader`")
+    lib = ctypes.CDLL(path)
+    lib.espeak_Initialize.restype = ctypes.c_int
+    rate = lib.espeak_Initialize(AUDIO_OUTPUT_SYNCHRONOUS, 0, data.encode() if data else None, 0)
+    if rate <= 0:
+        raise SystemExit("espeak-ng failed to initialise")
+    return lib, rate
+
+
+def synthesize(lib, rate, text, voice, words_per_minute=150):
+    chunks = []
+
+    def collect(samples, count, events):
+        if count > 0:
+            chunks.append(np.ctypeslib.as_array(samples, (count,)).copy())
+        return 0
+
+    callback = CALLBACK(collect)  # kept alive until Synth returns
+    lib.espeak_SetSynthCallback(callback)
+    lib.espeak_SetVoiceByName(voice.encode())
+    lib.espeak_SetParameter(RATE, words_per_minute, 0)
+    data = text.encode("utf-8") + b"\0"
+    if lib.espeak_Synth(data, len(data), 0, POS_CHARACTER, 0, CHARS_UTF8, None, None) != 0:
+        raise RuntimeError(f"espeak-ng could not say {text!r}")
+    audio = np.concatenate(chunks).astype(np.float64)
+    # Linear resampling to 16 kHz is plenty for a synthetic voice
+    positions = np.arange(int(len(audio) * SAMPLE_RATE / rate)) * rate / SAMPLE_RATE
+    audio = np.interp(positions, np.arange(len(audio)), audio)
+    pad = np.zeros(int(PADDING_S * SAMPLE_RATE))
+    return np.clip(np.concatenate([pad, audio, pad]), -32768, 32767).astype("<i2")
+
+
+def main(directory=CLIPS_DIR):
+    lib, rate = _library()
+    with open(os.path.join(directory, "phrases.csv"), encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        samples = synthesize(lib, rate, row["text"], VOICES[row["language"].split("-")[0]])
+        with wave.open(os.path.join(directory, row["file"]), "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(SAMPLE_RATE)
+            out.writeframes(samples.tobytes())
+        print(f"{row['file']}: {len(samples) / SAMPLE_RATE:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Writes benchmarks/fixtures/hand_landmarks.json: 21-point hands in MediaPipe's
+# normalised coordinates for every command pose, both hands, with jitter.
+# Each record: {"handedness": "Right"|"Left", "fingers": [5 bits], "landmarks": [[x, y, z] * 21]}
+import json
+import os
+import random
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUT = os.path.join(HERE, "fixtures", "hand_landmarks.json")
+
+POSES = [
+    [0, 1, 0, 0, 0], [0, 0, 0, 0, 0], [0, 1, 1, 0, 0], [1, 1, 1, 1, 1],
+    [0, 1, 1, 1, 0], [1, 0, 0, 0, 1], [1, 0, 0, 0, 0], [0, 0, 0, 0, 1],
+    [1, 1, 0, 0, 0], [0, 1, 1, 1, 1],
+]
+FINGER_X = [0.44, 0.48, 0.52, 0.56]   # index..pinky base x for a right hand
+SEGMENT = 0.05
+
+
+def make_hand(fingers, handedness, rng, jitter=0.004):
+    side = 1.0 if handedness == "Right" else -1.0
+    cx, wrist_y = 0.5 + rng.uniform(-0.15, 0.15), 0.75 + rng.uniform(-0.05, 0.05)
+    scale = rng.uniform(0.8, 1.2)
+    pts = [(cx, wrist_y, 0.0)]
+    # Thumb: CMC, MCP, IP, TIP heading outward; a folded thumb tucks its tip back in
+    tx = cx + side * 0.05 * scale
+    thumb = [(tx, wrist_y - 0.04 * scale), (tx + side * 0.03 * scale, wrist_y - 0.08 * scale),
+             (tx + side * 0.06 * scale, wrist_y - 0.11 * scale)]
+    ip_x = thumb[2][0]
+    tip_x = ip_x + side * (0.05 if fingers[0] else -0.04) * scale
+    thumb.append((tip_x, wrist_y - 0.13 * scale))
+    pts += [(x, y, 0.0) for x, y in thumb]
+    for i, up in enumerate(fingers[1:]):
+        bx = cx + side * (FINGER_X[i] - 0.5) * scale * 1.5
+        mcp_y = wrist_y - 0.18 * scale
+        if up:
+            ys = [mcp_y - k * SEGMENT * scale for k in range(4)]
+        else:
+            # PIP goes up, DIP and TIP curl back below it
+            ys = [mcp_y, mcp_y - SEGMENT * scale, mcp_y - 0.2 * SEGMENT * scale, mcp_y + 0.3 * SEGMENT * scale]
+        pts += [(bx, y, 0.0) for y in ys]
+    return [[round(x + rng.uniform(-jitter, jitter), 5), round(y + rng.uniform(-jitter, jitter), 5),
+             round(z + rng.uniform(-jitter, jitter), 5)] for x, y, z in pts]
+
+
+def main(per_pose=8, seed=11):
+    rng = random.Random(seed)
+    records = []
+    for fingers in POSES:
+        for handedness in ("Right", "Left"):
+            for _ in range(per_pose):
+                records.append({"handedness": handedness, "fingers": fingers,
+                                "landmarks": make_hand(fingers, handedness, rng)})
+    os.makedirs(os.path.dirname(OUT), exist_ok=True)
+    with open(OUT, "w") as f:
+        json.dump(records, f, separators=(",", ":"))
+    print(f"Wrote {len(records)} hands to {OUT}")
+
+
+if __name__ == "__main__":
+    main()
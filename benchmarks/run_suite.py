@@ -0,0 +1,208 @@
+# Headless benchmark suite: every hot-path benchmark in one run, results as JSON for comparing commits
+# Usage: python benchmarks/run_suite.py [--quick] [--only a,b] [--out FILE]
+#        python benchmarks/run_suite.py --compare OLD.json NEW.json [--threshold PCT]
+# Needs no camera, microphone or network: ESP32 routes go to the local stub, gestures come from the
+# recorded landmark fixtures, audio is synthesised. Each benchmark runs in a fresh interpreter so one's
+# threads, singletons (METRICS) and imports can't skew the next; a benchmark whose optional dependency
+# (cv2, numpy, PIL, speech_recognition) is missing is recorded as skipped. Results go to
+# benchmarks/results/<commit>.json by default. bench_recognizers (speech models, cloud backend) and
+# bench_startup (subprocess timings, a display for the window) stay manual.
+# --compare exits 1 when a timing got slower, or a rate lower, by more than the threshold.
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.join(ROOT, "benchmarks")
+RESULTS_DIR = os.path.join(HERE, "results")
+MARKER = "@@suite-result "
+
+# name -> (module, kwargs, quick kwargs)
+BENCHMARKS = {
+    # command parsing: legacy process_*_command parsers and IntentEngine over the multilingual corpus
+    "intents": ("bench_intents", {}, {"n": 1000, "repeat": 3}),
+    # count_fingers / get_finger_status over the recorded landmark fixtures
+    "landmarks": ("bench_landmarks", {}, {"repeat": 5}),
+    # per-frame preview conversion
+    "preview": ("bench_preview", {}, {"n": 50}),
+    "motion_gate": ("bench_motion_gate", {}, {}),
+    "roi": ("bench_roi", {}, {"seconds": 5.0}),
+    "gesture_pipeline": ("bench_gesture_pipeline", {}, {"duration": 2.0}),
+    "ui_dispatcher": ("bench_ui_dispatcher", {}, {"duration": 1.0}),
+    "vad": ("bench_vad", {}, {}),
+    "voice_pipeline": ("bench_voice_pipeline", {}, {"n": 5}),
+    # recorded camera/microphone sessions replayed faster than real time
+    "replay": ("bench_replay", {}, {"frames": 150, "utterances": 15}),
+    # command round trips against the ESP32 stub
+    "dispatch": ("bench_dispatch", {}, {"n": 300}),
+    "fanout": ("bench_fanout", {}, {}),
+    "batch": ("bench_batch", {}, {"repeats": 10}),
+    "udp": ("bench_udp", {}, {}),
+    "command_queue": ("bench_command_queue", {}, {}),
+    "event_bus": ("bench_event_bus", {}, {}),
+    "metrics": ("bench_metrics", {}, {}),
+    "scheduler": ("bench_scheduler", {}, {"n": 10_000}),
+    "usage_store": ("bench_usage_store", {}, {"years": 1}),
+    "activity_log": ("bench_activity_log", {}, {"messages": 5000}),
+    "daemon": ("bench_daemon", {}, {"duration": 1.0}),
+}
+
+# Leaf keys compared by --compare: timings should not grow, rates should not shrink
+HIGHER_IS_BETTER = ("cps", "fps", "per_s", "throughput")
+LOWER_IS_BETTER = ("_ms", "_s", "_us", "_ns", "_seconds")
+
+
+def _child(name, quick):
+    module, kwargs, quick_kwargs = BENCHMARKS[name]
+    sys.path.insert(0, HERE)
+    try:
+        bench = __import__(module)
+    except ImportError as e:
+        print(MARKER + json.dumps({"status": "skipped", "reason": f"{type(e).__name__}: {e}"}))
+        return
+    start = time.perf_counter()
+    result = bench.run(**(quick_kwargs if quick else kwargs))
+    print(MARKER + json.dumps({"status": "ok", "seconds": time.perf_counter() - start, "result": result},
+                              default=str))
+
+
+def run_one(name, quick=False, timeout=600):
+    try:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name] + ["--quick"] * quick,
+                             cwd=ROOT, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"status": "error", "error": f"timed out after {timeout} s"}
+    for line in reversed(out.stdout.splitlines()):
+        if line.startswith(MARKER):
+            return json.loads(line[len(MARKER):])
+    tail = (out.stderr.strip().splitlines() or [f"exit status {out.returncode}"])[-1]
+    return {"status": "error", "error": tail}
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run(names=None, quick=False, progress=None):
+    names = names or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"unknown benchmarks: {', '.join(unknown)}")
+    report = {
+        "commit": _git("rev-parse", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "started": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "quick": quick,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "benchmarks": {},
+    }
+    start = time.perf_counter()
+    for name in names:
+        report["benchmarks"][name] = entry = run_one(name, quick)
+        if progress:
+            progress(name, entry)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def flatten(value, prefix=""):
+    """{"a": [{"p99_ms": 1}]} -> {"a.0.p99_ms": 1}; numeric leaves only."""
+    if isinstance(value, bool):
+        return {}
+    if isinstance(value, (int, float)):
+        return {prefix: value}
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return {}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def direction(key):
+    """+1 when bigger is better, -1 when smaller is better, 0 when the key is not a measurement."""
+    leaf = key.rsplit(".", 1)[-1].lower()
+    if any(word in leaf for word in HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER) or "latency" in leaf:
+        return -1
+    return 0
+
+
+def compare(old, new, threshold=10.0):
+    """[(key, old, new, change %, regressed), ...] for measurements present in both reports."""
+    rows = []
+    for name, entry in new["benchmarks"].items():
+        before = old["benchmarks"].get(name)
+        if entry.get("status") != "ok" or not before or before.get("status") != "ok":
+            continue
+        a, b = flatten(before["result"], name), flatten(entry["result"], name)
+        for key in sorted(a.keys() & b.keys()):
+            sign = direction(key)
+            if not sign or not a[key]:
+                continue
+            change = (b[key] - a[key]) / abs(a[key]) * 100
+            rows.append((key, a[key], b[key], change, -sign * change > threshold))
+    return rows
+
+
+def _print_compare(old_path, new_path, threshold):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{(old['commit'] or '?')[:10]} -> {(new['commit'] or '?')[:10]}, threshold {threshold:g}%")
+    if old["quick"] != new["quick"] or old["platform"] != new["platform"]:
+        print("warning: the runs differ in --quick or platform; changes may not be regressions")
+    rows = compare(old, new, threshold)
+    for key, a, b, change, regressed in rows:
+        if abs(change) > threshold:
+            print(f"{'REGRESSION' if regressed else 'improved':10s} {key:60s} {a:12.4g} -> {b:12.4g} ({change:+.1f}%)")
+    regressions = sum(r[4] for r in rows)
+    print(f"{len(rows)} measurements compared, {regressions} regressed")
+    return regressions
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    quick = "--quick" in args
+    if "--child" in args:
+        _child(args[args.index("--child") + 1], quick)
+        sys.exit(0)
+    if "--compare" in args:
+        i = args.index("--compare")
+        threshold = float(args[args.index("--threshold") + 1]) if "--threshold" in args else 10.0
+        sys.exit(1 if _print_compare(args[i + 1], args[i + 2], threshold) else 0)
+    only = args[args.index("--only") + 1].split(",") if "--only" in args else None
+
+    def progress(name, entry):
+        detail = f"{entry['seconds']:.1f} s" if entry["status"] == "ok" else entry.get("reason") or entry["error"]
+        print(f"{name:18s} {entry['status']:8s} {detail}", flush=True)
+
+    report = run(only, quick, progress)
+    if "--out" in args:
+        out = args[args.index("--out") + 1]
+    else:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        tag = (report["commit"] or "nocommit")[:10] + ("-dirty" if report["dirty"] else "") + ("-quick" if quick else "")
+        out = os.path.join(RESULTS_DIR, tag + ".json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=1)
+    failed = [name for name, entry in report["benchmarks"].items() if entry["status"] == "error"]
+    print(f"{len(report['benchmarks'])} benchmarks in {report['seconds']:.0f} s -> {out}")
+    if failed:
+        print(f"failed: {', '.join(failed)}")
+        sys.exit(1)
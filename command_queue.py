@@ -0,0 +1,168 @@
+# Command queue in front of relay dispatch: drops no-op commands, collapses bursts, ranks sources
+import threading
+import time
+
+from esp32_client import decode_bits
+from metrics import METRICS
+
+# Higher wins: a command cannot override a higher-priority one for `hold` seconds
+PRIORITY = {"manual": 3, "api": 3, "chat": 2, "voice": 2, "gesture": 1, "system": 0, "timer": 0}
+
+
+class CommandQueue:
+    """
+    submit(changes, source) sits between HomeController and DeviceDispatcher.
+
+    - Priority: within `hold` seconds of a manual/API command for a device,
+      voice/chat/gesture commands for it are rejected (counted as overridden),
+      and voice/chat beat gesture the same way. submit() returns only the
+      accepted changes, so the controller's state follows what is sent.
+    - Coalescing: the first command for an idle device is sent at once, so
+      single commands add no latency; further commands within `window`
+      seconds are held and only the final intent is sent when it closes.
+    - Suppression: a change to the state the controller already has
+      (current) is not accepted, with or without a dispatcher, so a held
+      gesture or a repeated command publishes nothing. A change whose relays
+      were already sent that state (and that send has not failed) is not
+      sent. A failed route forgets the relays' state, so the next identical
+      command goes out again; a /batch reply replaces it with the board's
+      actual state bitmap, unless a later send has set those relays since.
+
+    A trace id (metrics correlation id) given to submit() rides along with
+    whatever dispatch sends its changes, and comes back with the report:
+    on_report(report, traces).
+    """
+
+    def __init__(self, dispatcher=None, registry=None, window=0.15, hold=2.0, deadline=3.0, on_report=None):
+        self.dispatcher = dispatcher
+        self.registry = registry
+        self.window = window
+        self.hold = hold
+        self.deadline = deadline
+        self.on_report = on_report
+        self._lock = threading.Lock()
+        self._last = {}         # device -> (state, priority, accepted_at)
+        self._last_sent = {}    # device -> time of the last dispatch including it
+        self._pending = {}      # device -> state, waiting for the window to close
+        self._pending_traces = []
+        self._flush_at = None
+        self._sent = {}         # (node, relay prefix) -> state last sent and not failed
+        self._sent_by = {}      # (node, relay prefix) -> number of the send that set it
+        self._sends = 0
+        # Counters
+        self.submitted = 0
+        self.overridden = 0
+        self.coalesced = 0
+        self.suppressed = 0
+        self.dispatched = 0     # changes that reached the dispatcher
+        self.routes = 0         # HTTP routes actually sent
+        self.naive_routes = 0   # routes sending every command as planned would have taken
+
+    @property
+    def sending(self):
+        return self.dispatcher is not None and self.registry is not None
+
+    def submit(self, changes, source="manual", trace=None, current=None):
+        """
+        Queue [(device, state), ...]; returns the changes accepted after the
+        priority check that change something in current ({device: state}).
+        """
+        now = time.monotonic()
+        priority = PRIORITY.get(source, 0)
+        accepted, immediate, held = [], [], False
+        with self._lock:
+            if self.sending:
+                self.naive_routes += len(self.registry.plan(changes))
+            for device, state in changes:
+                state = bool(state)
+                self.submitted += 1
+                last = self._last.get(device)
+                if last is not None and priority < last[1] and now - last[2] < self.hold:
+                    self.overridden += 1
+                    continue
+                self._last[device] = (state, priority, now)
+                if current is None or current.get(device) != state:
+                    accepted.append((device, state))
+                elif not self.sending or device in self._pending:
+                    self.suppressed += 1
+                    continue
+                # else a no-op still goes to _plan, which resends it only if a failure forgot the relays
+                if not self.sending:
+                    continue
+                if device in self._pending or now - self._last_sent.get(device, -self.window) < self.window:
+                    if device in self._pending:
+                        self.coalesced += 1
+                    self._pending[device] = state
+                    held = True
+                else:
+                    immediate.append((device, state))
+            if held and trace is not None:
+                self._pending_traces.append(trace)
+            if self._pending and self._flush_at is None:
+                self._flush_at = min(self._last_sent.get(d, now) for d in self._pending) + self.window
+                delay = max(0.0, self._flush_at - now)
+                self.dispatcher.loop.call_soon_threadsafe(self.dispatcher.loop.call_later, delay, self._flush)
+            commands, send = self._plan(immediate, now)
+        self._dispatch(commands, [trace] if immediate and trace is not None else [], send)
+        return accepted
+
+    def _flush(self):
+        # Dispatcher loop thread, when the coalescing window closes
+        now = time.monotonic()
+        with self._lock:
+            pending, self._pending, self._flush_at = self._pending, {}, None
+            traces, self._pending_traces = self._pending_traces, []
+            commands, send = self._plan(list(pending.items()), now)
+        self._dispatch(commands, traces, send)
+
+    def _plan(self, changes, now):
+        """
+        Drop changes every relay already has, mark the rest as sent; returns
+        the planned routes and the send's number (lock held).
+        """
+        self._sends += 1
+        needed = []
+        for device, state in changes:
+            targets = self.registry.devices.get(device, ())
+            if targets and all(self._sent.get(target) == state for target in targets):
+                self.suppressed += 1
+                continue
+            needed.append((device, state))
+            self._last_sent[device] = now
+            for target in targets:
+                self._sent[target] = state
+                self._sent_by[target] = self._sends
+        self.dispatched += len(needed)
+        commands = self.registry.plan(needed) if needed else []
+        self.routes += len(commands)
+        return commands, self._sends
+
+    def _dispatch(self, commands, traces, send):
+        if commands:
+            for trace in traces:
+                METRICS.mark(trace, "dispatch")
+            self.dispatcher.send_many(commands, self.deadline,
+                                      callback=lambda report: self._on_report(report, traces, send))
+
+    def _on_report(self, report, traces=(), send=None):
+        with self._lock:
+            for result in report.results:
+                prefix = result.route.strip("/").split("/")[0].split("?")[0]
+                if result.ok and prefix == "batch":
+                    for relay, state in decode_bits(result.body).items():
+                        target = (result.node, relay)
+                        # A reply overtaken by a later send to the same relay is stale
+                        if target in self._sent and (send is None or send >= self._sent_by.get(target, 0)):
+                            self._sent[target] = state
+                elif not result.ok:
+                    for target in list(self._sent):
+                        if target[0] == result.node and (prefix in ("all", "batch") or target[1] == prefix):
+                            del self._sent[target]
+        if self.on_report is not None:
+            self.on_report(report, traces)
+
+    def stats(self):
+        with self._lock:
+            return {"submitted": self.submitted, "overridden": self.overridden, "coalesced": self.coalesced,
+                    "suppressed": self.suppressed, "dispatched": self.dispatched, "pending": len(self._pending),
+                    "routes": self.routes, "routes_saved": self.naive_routes - self.routes}
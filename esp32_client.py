@@ -0,0 +1,525 @@
+# Asynchronous dispatcher for the ESP32 relay routes (/led/on, /fan/off, /all/off, /batch ...), over HTTP or UDP
+import asyncio
+import json
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, NamedTuple, Optional
+
+from metrics import METRICS
+
+# Intent engine device id -> firmware route prefix
+DEVICE_ROUTES = {"light": "led", "fan": "fan", "tv": "tv", "ac": "ac"}
+# Bit order of the /batch mask and state bitmaps (same order as the sketches' pins)
+RELAY_BITS = ("led", "fan", "tv", "ac")
+
+# UDP datagrams: b"SH\x01" (magic + version), kind, 32-bit seq, then the route text for a
+# command, or a 16-bit status and the reply body for an ack. Default firmware port 4210.
+UDP_MAGIC = b"SH\x01"
+UDP_COMMAND, UDP_ACK = 1, 2
+UDP_HEADER = struct.Struct("!3sBI")
+UDP_ACK_HEADER = struct.Struct("!3sBIH")
+UDP_PORT = 4210
+
+
+def route_for(device, state):
+    """Route for one device change, e.g. route_for("light", True) -> "/led/on"."""
+    return f"/{DEVICE_ROUTES[device]}/{'on' if state else 'off'}"
+
+
+def batch_route(relays):
+    """
+    One request for several relays, applied together by the firmware:
+    batch_route({"led": False, "tv": True}) -> "/batch?m=5&s=4" (m: relays to set,
+    s: their new states). The reply body is the resulting state bitmap, e.g. "6".
+    """
+    mask = bits = 0
+    for prefix, state in relays.items():
+        bit = 1 << RELAY_BITS.index(prefix)
+        mask |= bit
+        if state:
+            bits |= bit
+    return f"/batch?m={mask}&s={bits}"
+
+
+def decode_bits(body):
+    """State bitmap from a /batch reply -> {"led": False, "fan": True, ...}"""
+    bits = int(body.strip())
+    return {prefix: bool(bits >> i & 1) for i, prefix in enumerate(RELAY_BITS)}
+
+
+def parse_address(address, default_port=80):
+    """'192.168.1.50' or '192.168.1.50:8080' -> (host, port)"""
+    host, _, port = address.strip().partition(":")
+    return host, int(port) if port else default_port
+
+
+class CommandResult(NamedTuple):
+    node: str
+    route: str
+    ok: bool
+    status: int
+    body: str
+    latency: float
+    attempts: int
+    error: Optional[str] = None
+    transport: str = "http"
+
+
+class FanOutReport(NamedTuple):
+    results: List[CommandResult]
+    elapsed: float
+
+    @property
+    def ok(self):
+        return all(r.ok for r in self.results)
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def summary(self):
+        slowest = max(self.results, key=lambda r: r.latency, default=None)
+        return {"ok": self.ok, "sent": len(self.results), "nodes": len({r.node for r in self.results}),
+                "failed": [{"node": r.node, "route": r.route, "error": r.error, "attempts": r.attempts}
+                           for r in self.failed],
+                "latency_ms": self.elapsed * 1000, "slowest": slowest.node if slowest else None}
+
+
+class DispatchError(Exception):
+    pass
+
+
+class NodeRegistry:
+    """
+    Logical device id -> [(node, route prefix), ...] across any number of
+    relay boards, e.g. "light" -> the "led" relay on every board in the house.
+
+    plan() turns a batch of (device, state) changes into per-node routes:
+    the last change per relay wins, a node whose relays are all being
+    switched OFF gets its single /all/off route, and a node running the
+    batch firmware (batch=True) gets one /batch route for several relays;
+    otherwise each relay gets its own route.
+    """
+
+    def __init__(self, nodes, devices, limits=None, batch=(), udp=None):
+        self.nodes = dict(nodes)                   # node -> "host[:port]"
+        self.devices = {device: [tuple(target) for target in targets] for device, targets in devices.items()}
+        self.limits = dict(limits or {})           # node -> max connections
+        self.batch = set(batch)                    # nodes that accept /batch
+        self.udp = dict(udp or {})                 # node -> UDP command port
+        self._relays = {}
+        for targets in self.devices.values():
+            for node, prefix in targets:
+                if node not in self.nodes:
+                    raise DispatchError(f"Unknown controller node: {node}")
+                self._relays.setdefault(node, set()).add(prefix)
+
+    @classmethod
+    def single(cls, address, node="main", batch=False, udp=None):
+        """One board wired like the sketches: light/fan/tv/ac on led/fan/tv/ac."""
+        return cls({node: address}, {device: [(node, prefix)] for device, prefix in DEVICE_ROUTES.items()},
+                   batch=[node] if batch else (), udp={node: udp} if udp else None)
+
+    @classmethod
+    def load(cls, path):
+        """
+        JSON file: {"nodes": {"living": "192.168.1.50", "bedroom": {"address": "192.168.1.51:8080",
+        "max_connections": 4, "batch": true, "udp": 4210}}, "devices": {"light": [["living", "led"], ...], ...}}
+        "udp": true means the default UDP_PORT.
+        """
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        nodes, limits, batch, udp = {}, {}, [], {}
+        for node, spec in config["nodes"].items():
+            if isinstance(spec, str):
+                spec = {"address": spec}
+            nodes[node] = spec["address"]
+            if "max_connections" in spec:
+                limits[node] = int(spec["max_connections"])
+            if spec.get("batch"):
+                batch.append(node)
+            if spec.get("udp"):
+                udp[node] = UDP_PORT if spec["udp"] is True else int(spec["udp"])
+        return cls(nodes, config["devices"], limits, batch, udp)
+
+    def plan(self, changes):
+        """[(device, state), ...] in order -> [(node, route), ...]; unknown devices are skipped."""
+        final = {}
+        for device, state in changes:
+            for target in self.devices.get(device, ()):
+                final.pop(target, None)
+                final[target] = bool(state)
+        by_node = {}
+        for (node, prefix), state in final.items():
+            by_node.setdefault(node, []).append((prefix, state))
+        commands = []
+        for node, relays in by_node.items():
+            off = {prefix for prefix, state in relays if not state}
+            if len(off) > 1 and off == self._relays[node]:
+                commands.append((node, "/all/off"))
+            elif len(relays) > 1 and node in self.batch:
+                commands.append((node, batch_route(dict(relays))))
+            else:
+                commands += [(node, f"/{prefix}/{'on' if state else 'off'}") for prefix, state in relays]
+        return commands
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class _NodePool:
+    """Idle keep-alive connections for one controller, capped at max_connections."""
+
+    def __init__(self, host, port, max_connections):
+        self.host = host
+        self.port = port
+        self.idle = []
+        self.slots = asyncio.Semaphore(max_connections)
+
+    async def acquire(self):
+        while self.idle:
+            conn = self.idle.pop()
+            if not conn.reader.at_eof():
+                return conn
+            conn.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        return _Connection(reader, writer)
+
+    def release(self, conn, reusable):
+        if reusable:
+            self.idle.append(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed by controller")
+    parts = status_line.decode("latin-1").split(" ", 2)
+    status = int(parts[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+        keep_alive = headers.get("connection", "").lower() != "close"
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return status, body.decode("utf-8", "replace"), keep_alive
+
+
+class _UdpPeer(asyncio.DatagramProtocol):
+    """
+    One UDP socket per node. Each command gets the next sequence number and
+    is retransmitted with a doubling timeout until its ack arrives or the
+    timeout passes; acks are matched to commands by seq, so late or
+    duplicate acks are ignored. The peer applies a seq at most once.
+
+    The retransmit timeout adapts to the node like TCP's (srtt + 4 * rttvar,
+    sampled only from commands that were sent once), starting from rto and
+    never below min_rto.
+    """
+
+    def __init__(self, rto=0.03, min_rto=0.005):
+        self.transport = None
+        self.pending = {}
+        self.seq = 0
+        self.rto = rto
+        self.min_rto = min_rto
+        self.srtt = None
+        self.rttvar = 0.0
+        self.late_acks = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) < UDP_ACK_HEADER.size:
+            return
+        magic, kind, seq, status = UDP_ACK_HEADER.unpack_from(data)
+        if magic != UDP_MAGIC or kind != UDP_ACK:
+            return
+        future = self.pending.pop(seq, None)
+        if future is None or future.done():
+            self.late_acks += 1
+            return
+        future.set_result((status, data[UDP_ACK_HEADER.size:].decode("utf-8", "replace")))
+
+    def error_received(self, exc):
+        pass  # ICMP port unreachable etc.: the command simply times out
+
+    def _sample(self, rtt):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.rto = max(self.min_rto, self.srtt + 4 * self.rttvar)
+
+    async def request(self, route, timeout):
+        """(status, body, sends) for one command; raises asyncio.TimeoutError."""
+        loop = asyncio.get_running_loop()
+        rto = self.rto
+        self.seq = (self.seq + 1) & 0xFFFFFFFF or 1
+        seq = self.seq
+        packet = UDP_HEADER.pack(UDP_MAGIC, UDP_COMMAND, seq) + route.encode("ascii")
+        future = self.pending[seq] = loop.create_future()
+        sent_at = loop.time()
+        deadline = sent_at + timeout
+        sends = 0
+        try:
+            while True:
+                self.transport.sendto(packet)
+                sends += 1
+                wait = min(rto, deadline - loop.time())
+                if wait <= 0:
+                    raise asyncio.TimeoutError
+                try:
+                    status, body = await asyncio.wait_for(asyncio.shield(future), wait)
+                    if sends == 1:
+                        self._sample(loop.time() - sent_at)  # Karn: retransmitted commands are ambiguous
+                    return status, body, sends
+                except asyncio.TimeoutError:
+                    if loop.time() >= deadline:
+                        raise
+                rto *= 2
+        finally:
+            self.pending.pop(seq, None)
+            future.cancel()
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+class DeviceDispatcher:
+    """
+    Sends route commands to one or more ESP32 controllers from a private
+    asyncio loop, so Tk, voice and gesture threads never block on the network.
+    nodes maps a node name to "host" or "host:port"; limits optionally caps
+    connections (= requests in flight) per node, default max_connections.
+    Commands for different nodes always run concurrently.
+
+    udp maps nodes to the UDP port of their datagram transport: commands go
+    there first (acked, retransmitted from an initial udp_rto that adapts to
+    the node, for up to udp_timeout) and fall back to the HTTP routes when no
+    ack arrives.
+    """
+
+    def __init__(self, nodes, max_connections=2, timeout=2.0, retries=2, retry_delay=0.05, keep_alive=True,
+                 limits=None, udp=None, udp_timeout=0.25, udp_rto=0.03):
+        self.nodes = {name: parse_address(addr) for name, addr in nodes.items()}
+        self.max_connections = max_connections
+        self.limits = dict(limits or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.keep_alive = keep_alive
+        self.udp = dict(udp or {})
+        self.udp_timeout = udp_timeout
+        self.udp_rto = udp_rto
+        self.udp_fallbacks = 0
+        self.loop = None
+        self._pools = {}
+        self._peers = {}
+        self._thread = None
+        self._ready = threading.Event()
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run_loop, name="esp32-dispatcher", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _close_pools(self):
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
+        for peer in self._peers.values():
+            peer.close()
+        self._peers.clear()
+        await asyncio.sleep(0)  # let transports finish closing
+
+    def stop(self):
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_pools(), self.loop).result(timeout=2)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2)
+        self._thread = None
+        self._ready.clear()
+
+    # ---------- Thread-safe API ----------
+    def send(self, route, node=None, callback=None) -> Future:
+        """
+        Queue a command from any thread. Returns a concurrent Future holding a
+        CommandResult; callback(result) runs on the dispatcher thread when done.
+        """
+        if self._thread is None:
+            self.start()
+        node = node or next(iter(self.nodes))
+        future = asyncio.run_coroutine_threadsafe(self.request(node, route), self.loop)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(f.result()))
+        return future
+
+    def send_device(self, device, state, node=None, callback=None) -> Future:
+        return self.send(route_for(device, state), node, callback)
+
+    def send_batch(self, relays, node=None, callback=None) -> Future:
+        """
+        Set several relays of one board in a single request, e.g. {"led": False, "tv": True}.
+        The CommandResult body holds the board's resulting state bitmap (see decode_bits).
+        """
+        return self.send(batch_route(relays), node, callback)
+
+    def send_many(self, commands, deadline=None, callback=None) -> Future:
+        """
+        Fan [(node, route), ...] out to every node at once. Returns a concurrent
+        Future holding a FanOutReport; deadline (seconds) bounds the whole batch,
+        retries included. callback(report) runs on the dispatcher thread.
+        """
+        if self._thread is None:
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(self.fan_out(commands, deadline), self.loop)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(f.result()))
+        return future
+
+    # ---------- Coroutines ----------
+    def _pool(self, node):
+        pool = self._pools.get(node)
+        if pool is None:
+            if node not in self.nodes:
+                raise DispatchError(f"Unknown controller node: {node}")
+            host, port = self.nodes[node]
+            pool = self._pools[node] = _NodePool(host, port, self.limits.get(node, self.max_connections))
+        return pool
+
+    async def _attempt(self, pool, route):
+        conn = await pool.acquire()
+        reusable = False
+        try:
+            request = (f"GET {route} HTTP/1.1\r\nHost: {pool.host}\r\n"
+                       f"Connection: {'keep-alive' if self.keep_alive else 'close'}\r\n\r\n")
+            conn.writer.write(request.encode("ascii"))
+            await conn.writer.drain()
+            status, body, keep_alive = await _read_response(conn.reader)
+            reusable = self.keep_alive and keep_alive
+            return status, body
+        finally:
+            pool.release(conn, reusable)
+
+    async def _peer(self, node):
+        peer = self._peers.get(node)
+        if peer is None:
+            host, _ = self.nodes[node]
+            _, peer = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _UdpPeer(self.udp_rto), remote_addr=(host, self.udp[node]))
+            self._peers[node] = peer
+        return peer
+
+    async def _request_udp(self, node, route, until):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        timeout = self.udp_timeout if until is None else min(self.udp_timeout, until - loop.time())
+        try:
+            peer = await self._peer(node)
+            status, body, sends = await peer.request(route, max(0.0, timeout))
+        except (asyncio.TimeoutError, OSError):
+            return None
+        error = None if status == 200 else f"HTTP {status}"
+        return CommandResult(node, route, error is None, status, body, time.perf_counter() - start, sends, error,
+                             "udp")
+
+    async def request(self, node, route, until=None) -> CommandResult:
+        """
+        Send one route with per-attempt timeout and retries; never raises.
+        until is an absolute loop.time() deadline for the whole request.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        error = None
+        status, body = 0, ""
+        attempts = 0
+        try:
+            pool = self._pool(node)
+        except DispatchError as e:
+            return CommandResult(node, route, False, 0, "", 0.0, 0, str(e))
+        if node in self.udp:
+            result = await self._request_udp(node, route, until)
+            if result is not None:
+                return result
+            self.udp_fallbacks += 1
+        for attempts in range(1, self.retries + 2):
+            timeout = self.timeout if until is None else min(self.timeout, until - loop.time())
+            try:
+                # Without a deadline, waiting for a free slot is not timed: the timeout
+                # covers connect + round trip. A deadline bounds both.
+                if until is None:
+                    await pool.slots.acquire()
+                else:
+                    await asyncio.wait_for(pool.slots.acquire(), max(0.0, until - loop.time()))
+                try:
+                    status, body = await asyncio.wait_for(self._attempt(pool, route), max(0.0, timeout))
+                finally:
+                    pool.slots.release()
+                if status < 500:
+                    error = None if status == 200 else f"HTTP {status}"
+                    break
+                error = f"HTTP {status}"
+            except asyncio.TimeoutError:
+                error = "deadline exceeded" if until is not None and loop.time() >= until else "timeout"
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                error = str(e) or e.__class__.__name__
+            if until is not None and loop.time() + self.retry_delay >= until:
+                break
+            if attempts <= self.retries:
+                await asyncio.sleep(self.retry_delay)
+        return CommandResult(node, route, error is None, status, body,
+                             time.perf_counter() - start, attempts, error)
+
+    async def fan_out(self, commands, deadline=None) -> FanOutReport:
+        """All commands at once; total time follows the slowest node, not the number of commands."""
+        start = time.perf_counter()
+        until = None if deadline is None else asyncio.get_running_loop().time() + deadline
+        results = await asyncio.gather(*(self.request(node, route, until) for node, route in commands))
+        for result in results:
+            # Board round trip per route, by transport; failures are counted, not timed
+            if result.ok:
+                METRICS.observe(f"device_{result.transport}", result.latency)
+            else:
+                METRICS.count("device_failures")
+        return FanOutReport(list(results), time.perf_counter() - start)
@@ -0,0 +1,284 @@
+# Local stand-in for the ESP32 WebServer sketches (sketch_sep15a.ino / sketch_sep18a.ino)
+# Mimics the relay routes so the dispatcher can be measured without hardware:
+#   python esp32_stub.py --port 8080 --latency 0.02 --jitter 0.01 --failure-rate 0.05
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs, urlsplit
+
+from esp32_client import UDP_ACK, UDP_ACK_HEADER, UDP_COMMAND, UDP_HEADER, UDP_MAGIC
+
+DEVICES = ("led", "fan", "tv", "ac")  # also the /batch bit order
+
+
+class ESP32Stub:
+    """
+    asyncio HTTP server answering the same routes as the firmware.
+    latency/jitter add a per-request delay (seconds); failure_rate is the
+    fraction of requests answered with HTTP 500, drop_rate the fraction whose
+    connection is closed without a reply (seeded, so runs are repeatable).
+    serial=True handles one request at a time, like the Arduino WebServer loop.
+    Every relay change is logged in `applied` as (perf_counter, relay, state).
+
+    With udp=True the same routes are also served over the datagram
+    transport on udp_port (see _StubUdp); udp_loss drops that fraction of
+    datagrams in each direction.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 failure_rate=0.0, drop_rate=0.0, keep_alive=True, seed=0, serial=False,
+                 udp=False, udp_port=0, udp_loss=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.keep_alive = keep_alive
+        self.rng = random.Random(seed)
+        self.state = {device: False for device in DEVICES}
+        self.serial = serial
+        self.applied = deque(maxlen=10000)
+        self._busy = None
+        self.udp = udp
+        self.udp_port = udp_port
+        self.udp_loss = udp_loss
+        self._udp_transport = None
+        self.requests = 0
+        self.connections = 0
+        self._server = None
+        self._writers = set()
+        self._loop = None
+        self._thread = None
+
+    # ---------- Routes ----------
+    def _set(self, device, state):
+        self.state[device] = state
+        self.applied.append((time.perf_counter(), device, state))
+
+    def bits(self):
+        return sum(1 << i for i, device in enumerate(DEVICES) if self.state[device])
+
+    def handle_route(self, target):
+        """Apply a route to the simulated relays; returns (status, body)."""
+        url = urlsplit(target)
+        path = url.path
+        parts = path.strip("/").split("/")
+        if path == "/":
+            return 200, "ESP32 Device Control"
+        if len(parts) == 2 and parts[0] in self.state and parts[1] in ("on", "off"):
+            self._set(parts[0], parts[1] == "on")
+            return 200, f"{parts[0]} {parts[1].upper()}"
+        if parts == ["all", "off"]:
+            for device in self.state:
+                self._set(device, False)
+            return 200, "All devices OFF"
+        if parts == ["batch"]:
+            # /batch?m=<mask>&s=<states>: every relay in the mask at once, reply with the state bitmap
+            query = parse_qs(url.query)
+            try:
+                mask, bits = int(query.get("m", ["0"])[0]), int(query.get("s", ["0"])[0])
+            except ValueError:
+                return 400, "bad mask"
+            if not 0 <= mask < 1 << len(DEVICES):
+                return 400, "bad mask"
+            for i, device in enumerate(DEVICES):
+                if mask >> i & 1:
+                    self._set(device, bool(bits >> i & 1))
+            return 200, str(self.bits())
+        return 404, "Not found"
+
+    # ---------- HTTP ----------
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                close = not self.keep_alive
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    if line.lower().startswith(b"connection:") and b"close" in line.lower():
+                        close = True
+                self.requests += 1
+                if self.serial:
+                    await self._busy.acquire()
+                try:
+                    delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    roll = self.rng.random()
+                    if roll < self.drop_rate:
+                        break
+                    if roll < self.drop_rate + self.failure_rate:
+                        status, body = 500, "Relay error"
+                    else:
+                        parts = request_line.decode("latin-1").split()
+                        status, body = self.handle_route(parts[1] if len(parts) > 1 else "/")
+                finally:
+                    if self.serial:
+                        self._busy.release()
+                payload = body.encode()
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+                writer.write((f"HTTP/1.1 {status} {reason}\r\nContent-Type: text/plain\r\n"
+                              f"Content-Length: {len(payload)}\r\n"
+                              f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n").encode() + payload)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def start_async(self):
+        self._busy = asyncio.Lock()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.udp:
+            self._udp_transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _StubUdp(self), local_addr=(self.host, self.udp_port))
+            self.udp_port = self._udp_transport.get_extra_info("sockname")[1]
+        return self
+
+    async def stop_async(self):
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+        if self._server is not None:
+            self._server.close()
+            # Kick keep-alive clients so their handlers return before the loop closes
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ---------- Background thread helpers ----------
+    def start(self):
+        """Run the stub on its own loop thread; returns once it is listening."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start_async())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop_async())
+            pending = asyncio.all_tasks(self._loop)
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="esp32-stub", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+
+class _StubUdp(asyncio.DatagramProtocol):
+    """
+    The firmware's datagram transport: a command is applied once per
+    (sender, seq) after the stub's latency, and its ack is cached, so a
+    retransmission is answered again without switching the relay twice.
+    """
+
+    def __init__(self, stub, cache_size=64):
+        self.stub = stub
+        self.cache = OrderedDict()   # (addr, seq) -> ack datagram, None while being applied
+        self.cache_size = cache_size
+        self.transport = None
+        # Counters
+        self.received = 0
+        self.duplicates = 0
+        self.lost = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def _lose(self):
+        if self.stub.udp_loss and self.stub.rng.random() < self.stub.udp_loss:
+            self.lost += 1
+            return True
+        return False
+
+    def datagram_received(self, data, addr):
+        if self._lose() or len(data) < UDP_HEADER.size:
+            return
+        magic, kind, seq = UDP_HEADER.unpack_from(data)
+        if magic != UDP_MAGIC or kind != UDP_COMMAND:
+            return
+        self.received += 1
+        key = (addr, seq)
+        if key in self.cache:
+            self.duplicates += 1
+            if self.cache[key] is not None:
+                self._send(self.cache[key], addr)
+            return
+        self.cache[key] = None
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        delay = self.stub.latency + (self.stub.rng.uniform(0, self.stub.jitter) if self.stub.jitter else 0.0)
+        route = data[UDP_HEADER.size:].decode("ascii", "replace")
+        asyncio.get_running_loop().call_later(delay, self._apply, key, route)
+
+    def _apply(self, key, route):
+        self.stub.requests += 1
+        status, body = self.stub.handle_route(route)
+        ack = UDP_ACK_HEADER.pack(UDP_MAGIC, UDP_ACK, key[1], status) + body.encode()
+        self.cache[key] = ack
+        self._send(ack, key[0])
+
+    def _send(self, ack, addr):
+        if not self._lose():
+            self.transport.sendto(ack, addr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ESP32 relay stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="base delay per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform delay (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction answered with HTTP 500")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction dropped without reply")
+    parser.add_argument("--no-keep-alive", action="store_true", help="close after every reply like stock WebServer")
+    parser.add_argument("--serial", action="store_true", help="one request at a time like the WebServer loop")
+    parser.add_argument("--udp-port", type=int, default=None, help="also serve the UDP transport (e.g. 4210)")
+    parser.add_argument("--udp-loss", type=float, default=0.0, help="fraction of datagrams lost each way")
+    args = parser.parse_args()
+
+    stub = ESP32Stub(args.host, args.port, args.latency, args.jitter,
+                     args.failure_rate, args.drop_rate, not args.no_keep_alive, serial=args.serial,
+                     udp=args.udp_port is not None, udp_port=args.udp_port or 0, udp_loss=args.udp_loss)
+
+    async def serve():
+        await stub.start_async()
+        print(f"ESP32 stub listening on http://{stub.address}" + (f" and udp port {stub.udp_port}" if stub.udp else ""))
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\nStub stopped.")
+
+
+if __name__ == "__main__":
+    main()
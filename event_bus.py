@@ -0,0 +1,237 @@
+# In-process event bus: typed events, bounded per-subscriber queues with overflow policies, delivery metrics
+import collections
+import threading
+import time
+
+# Every event is a dict with one of these "type"s (see HomeController for their fields)
+EVENT_TYPES = ("command", "state", "dispatch", "gesture", "voice", "reminder", "usage", "error")
+POLICIES = ("inline", "drop_oldest", "block", "coalesce")
+
+
+def device_key(event):
+    """Coalescing key: the event type plus the devices it is about."""
+    devices = tuple(change["device"] for change in event.get("changes", ())) or event.get("device")
+    return event["type"], devices
+
+
+class Subscription:
+    """
+    One subscriber's queue and worker thread. Events are handed to the handler
+    one at a time in publish order, so per-device ordering holds. When the
+    queue already holds maxsize events:
+
+    - drop_oldest: the oldest queued event is discarded
+    - block: the publisher waits up to block_timeout for room, then the new
+      event is discarded (the wait is the only way a subscriber slows inputs)
+    - coalesce: a queued event with the same key(event) is replaced by the new
+      one, which moves to the back of the queue so no device's events are
+      reordered; coalescing happens whether or not the queue is full, and a
+      full queue with no match drops the oldest event
+
+    "inline" subscriptions have no queue: the handler runs on the publisher's
+    thread and must only hand the event off. worker=False keeps the queue but
+    starts no thread: the owner calls drain() from its own loop (a Tk after()
+    timer), so the handler always runs on that thread.
+    """
+
+    def __init__(self, handler, types=None, policy="drop_oldest", maxsize=256, key=device_key,
+                 block_timeout=0.05, name=None, on_error=None, worker=True):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.handler = handler
+        self.types = frozenset(types) if types else None
+        self.policy = policy
+        self.maxsize = maxsize
+        self.key = key
+        self.block_timeout = block_timeout
+        self.name = name or getattr(handler, "__qualname__", repr(handler))
+        self.on_error = on_error
+        self.running = True
+        self._cond = threading.Condition()
+        self._slots = collections.deque()   # [event, queued_at, alive]
+        self._by_key = {}                   # coalescing key -> its queued slot
+        self._depth = 0                     # live slots
+        self._latencies = collections.deque(maxlen=1024)
+        self._thread = None
+        # Counters
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.blocked_seconds = 0.0
+        if policy != "inline" and worker:
+            self._thread = threading.Thread(target=self._run, name=f"bus-{self.name}", daemon=True)
+            self._thread.start()
+
+    def wants(self, event):
+        return self.types is None or event["type"] in self.types
+
+    def offer(self, event):
+        """Publisher side; returns False when the event was dropped."""
+        if self.policy == "inline":
+            self._deliver(event, None)
+            return True
+        with self._cond:
+            if not self.running:
+                return False
+            if self.policy == "coalesce":
+                key = self.key(event)
+                slot = self._by_key.pop(key, None)
+                if slot is not None:
+                    slot[2] = False
+                    self._depth -= 1
+                    self.coalesced += 1
+            if self._depth >= self.maxsize:
+                if self.policy == "block":
+                    start = time.monotonic()
+                    self._cond.wait_for(lambda: self._depth < self.maxsize or not self.running, self.block_timeout)
+                    self.blocked_seconds += time.monotonic() - start
+                    if self._depth >= self.maxsize or not self.running:
+                        self.dropped += 1
+                        return False
+                else:
+                    self._pop_live()
+                    self.dropped += 1
+            slot = [event, time.perf_counter(), True]
+            self._slots.append(slot)
+            if self.policy == "coalesce":
+                self._by_key[key] = slot
+            self._depth += 1
+            self.max_depth = max(self.max_depth, self._depth)
+            if len(self._slots) > 2 * self.maxsize:
+                self._slots = collections.deque(s for s in self._slots if s[2])  # replaced slots left behind
+            self._cond.notify_all()
+            return True
+
+    def _pop_live(self):
+        # Lock held
+        while self._slots:
+            slot = self._slots.popleft()
+            if slot[2]:
+                self._depth -= 1
+                if self.policy == "coalesce" and self._by_key.get(self.key(slot[0])) is slot:
+                    del self._by_key[self.key(slot[0])]
+                return slot
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.running and not self._depth:
+                    self._cond.wait()
+                if not self._depth:
+                    return
+                slot = self._pop_live()
+                self._cond.notify_all()  # room for a blocked publisher
+            self._deliver(slot[0], slot[1])
+
+    def drain(self, limit=None):
+        """Deliver queued events on the calling thread (worker=False); returns how many."""
+        n = 0
+        while limit is None or n < limit:
+            with self._cond:
+                slot = self._pop_live()
+                self._cond.notify_all()
+            if slot is None:
+                break
+            self._deliver(slot[0], slot[1])
+            n += 1
+        return n
+
+    def _deliver(self, event, queued_at):
+        if queued_at is not None:
+            self._latencies.append(time.perf_counter() - queued_at)
+        try:
+            self.handler(event)
+            self.delivered += 1
+        except Exception as e:
+            self.errors += 1
+            if self.on_error is not None:
+                self.on_error(self, event, e)
+
+    def close(self, timeout=1.0):
+        """Stop after delivering what is already queued."""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self._latencies)
+            depth = self._depth
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p / 100.0 * len(latencies)))] * 1000 if latencies else None
+
+        return {"name": self.name, "policy": self.policy, "depth": depth, "max_depth": self.max_depth,
+                "delivered": self.delivered, "dropped": self.dropped, "coalesced": self.coalesced,
+                "errors": self.errors, "blocked_ms": self.blocked_seconds * 1000,
+                "latency_p50_ms": pct(50), "latency_p99_ms": pct(99)}
+
+
+class EventBus:
+    """
+    publish(event) offers the event to every subscription that wants its type.
+    Queued subscriptions cost the publisher one bounded append each, so a slow
+    logger or network client never holds up gesture or voice capture (unless
+    it chose "block", and then for at most block_timeout). Events are offered
+    in the order publish() is called; callers that need a global order (the
+    controller's seq) publish from one thread at a time, and pass their own
+    publish so the "error" events for failing handlers get their order too.
+    """
+
+    def __init__(self, publish=None):
+        self._lock = threading.Lock()
+        self._publish_error = publish or self.publish
+        self._subscriptions = []
+        # Counters
+        self.published = 0
+
+    def subscribe(self, handler, types=None, policy="drop_oldest", maxsize=256, **options):
+        """handler(event) for matching events from now on; returns the Subscription."""
+        for kind in types or ():
+            if kind not in EVENT_TYPES:
+                raise ValueError(f"unknown event type {kind!r}")
+        options.setdefault("on_error", self._on_error)
+        subscription = Subscription(handler, types, policy, maxsize, **options)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        subscription.close()
+
+    def publish(self, event):
+        if event.get("type") not in EVENT_TYPES:
+            raise ValueError(f"unknown event type {event.get('type')!r}")
+        self.published += 1
+        for subscription in self._subscriptions:
+            if subscription.wants(event):
+                subscription.offer(event)
+        return event
+
+    def _on_error(self, subscription, event, error):
+        # A failing handler is reported to everyone else; failures on error events are only counted
+        if event["type"] != "error":
+            self._publish_error({"type": "error", "where": subscription.name, "error": repr(error),
+                                 "event_seq": event.get("seq"), "at": time.time()})
+
+    @property
+    def errors(self):
+        return sum(s.errors for s in self._subscriptions)
+
+    def close(self):
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.close()
+
+    def stats(self):
+        return {"published": self.published, "subscribers": [s.stats() for s in self._subscriptions]}
@@ -0,0 +1,156 @@
+# Staged capture -> inference -> render pipeline with latest-frame-wins hand-off
+import threading
+import time
+
+from metrics import METRICS, FpsMeter
+
+
+class LatestSlot:
+    """
+    Bounded (size 1) hand-off between two stages. put() never blocks and
+    replaces an unread item, so a slow consumer always sees the newest frame
+    and stale ones are dropped instead of queued. A lossless slot makes put()
+    wait for the consumer instead (replayed recordings, where every frame
+    should be processed).
+    """
+
+    def __init__(self, lossless=False):
+        self.lossless = lossless
+        self._cond = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self.lossless:
+                self._cond.wait_for(lambda: not self._has_item or self._closed)
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Wait for the next item; returns None on timeout or once closed."""
+        with self._cond:
+            if not self._has_item and not self._closed:
+                self._cond.wait(timeout)
+            if not self._has_item:
+                return None
+            item, self._item, self._has_item = self._item, None, False
+            self._cond.notify()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Stage(threading.Thread):
+    """
+    One pipeline worker. A source stage (inbox=None) calls fn() in a loop;
+    other stages call fn(item) for each item taken from inbox. Non-None
+    results go to outbox. Returning None from a source just skips a beat.
+    """
+
+    def __init__(self, name, fn, inbox=None, outbox=None, idle_sleep=0.005):
+        super().__init__(name=f"gesture-{name}", daemon=True)
+        self.stage_name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.idle_sleep = idle_sleep
+        self.meter = FpsMeter()
+        self.busy_time = 0.0
+        self.last_duration = 0.0
+        self.error = None
+        self.running = True
+
+    def run(self):
+        try:
+            while self.running:
+                if self.inbox is None:
+                    item = None
+                else:
+                    item = self.inbox.get(timeout=0.1)
+                    if item is None:
+                        continue
+                t0 = time.perf_counter()
+                result = self.fn() if self.inbox is None else self.fn(item)
+                self.last_duration = time.perf_counter() - t0
+                self.busy_time += self.last_duration
+                if result is None:
+                    if self.inbox is None:
+                        time.sleep(self.idle_sleep)
+                    continue
+                self.meter.tick()
+                METRICS.observe(f"gesture_{self.stage_name}", self.last_duration)
+                METRICS.tick(f"gesture_{self.stage_name}")
+                if self.outbox is not None:
+                    self.outbox.put(result)
+        except Exception as e:
+            self.error = e
+            self.running = False
+
+
+class GesturePipeline:
+    """
+    capture_fn() -> frame | None
+    infer_fn(frame) -> result | None   (classification and commands happen here)
+    render_fn(result) -> None          (preview only, off the command path)
+
+    Every hand-off is a LatestSlot, so gesture-to-command latency is bounded
+    by one inference time plus the age of the newest frame, no matter how
+    slow rendering is. lossless=True makes capture wait for inference, so a
+    recording replayed as fast as possible has every frame classified and
+    the inference FPS is the highest sustainable frame rate.
+    """
+
+    def __init__(self, capture_fn, infer_fn, render_fn, lossless=False):
+        self.frames = LatestSlot(lossless)
+        self.results = LatestSlot()
+        self.stages = [
+            Stage("capture", capture_fn, outbox=self.frames),
+            Stage("inference", infer_fn, inbox=self.frames, outbox=self.results),
+            Stage("render", lambda r: render_fn(r) or True, inbox=self.results),
+        ]
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def stop(self, join_timeout=1.0):
+        for stage in self.stages:
+            stage.running = False
+        self.frames.close()
+        self.results.close()
+        for stage in self.stages:
+            if stage.is_alive() and stage is not threading.current_thread():
+                stage.join(join_timeout)
+
+    @property
+    def alive(self):
+        return all(stage.is_alive() for stage in self.stages)
+
+    @property
+    def error(self):
+        for stage in self.stages:
+            if stage.error is not None:
+                return stage.error
+        return None
+
+    def stats(self):
+        """Per-stage FPS and last step duration, plus frames dropped at each hand-off."""
+        stats = {stage.stage_name: {"fps": stage.meter.fps, "last_ms": stage.last_duration * 1000}
+                 for stage in self.stages}
+        stats["dropped"] = {"frames": self.frames.dropped, "results": self.results.dropped}
+        return stats
+
+    def summary(self):
+        s = self.stats()
+        return (f"cap {s['capture']['fps']:.0f} | inf {s['inference']['fps']:.0f} | "
+                f"ui {s['render']['fps']:.0f} fps | dropped {s['dropped']['frames']}")
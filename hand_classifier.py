@@ -0,0 +1,101 @@
+# Vectorized finger-state classifier shared by hybrid_ui.py and Gesture_Control.py
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+TIP_IDS = [4, 8, 12, 16, 20]   # Thumb, Index, Middle, Ring, Pinky
+PIP_IDS = [6, 10, 14, 18]      # compared against the four finger tips
+THUMB_IP = 3
+MARGIN = 0.02                            # normalised image units, hides landmark jitter
+
+# Bit weights: thumb is the most significant bit, pinky the least,
+# so [thumb, index, middle, ring, pinky] reads like a binary number.
+_BIT_WEIGHTS = np.array([16, 8, 4, 2, 1])
+
+# Finger pattern -> command, as printed by Gesture_Control.py
+GESTURE_COMMANDS = {
+    (0, 1, 0, 0, 0): ("light", True),    # Index finger up
+    (0, 0, 0, 0, 0): ("light", False),   # Fist
+    (0, 1, 1, 0, 0): ("fan", True),      # Peace sign
+    (1, 1, 1, 1, 1): ("fan", False),     # Open palm
+    (0, 1, 1, 1, 0): ("tv", True),       # Three fingers
+    (1, 0, 0, 0, 1): ("tv", False),      # Thumb + pinky
+    (1, 0, 0, 0, 0): ("ac", True),       # Thumbs up
+    (0, 0, 0, 0, 1): ("ac", False),      # Pinky only, as mapped in Gesture_Control.py
+}
+
+
+def _build_tables():
+    fingers = tuple(tuple((code >> (4 - i)) & 1 for i in range(5)) for code in range(32))
+    counts = tuple(sum(bits) for bits in fingers)
+    commands = tuple(GESTURE_COMMANDS.get(bits) for bits in fingers)
+    return fingers, counts, commands
+
+
+# 5-bit finger code -> finger tuple / number of raised fingers / command
+FINGERS_TABLE, FINGER_COUNT_TABLE, COMMAND_TABLE = _build_tables()
+
+
+class HandState(NamedTuple):
+    fingers: Tuple[int, int, int, int, int]
+    code: int
+    count: int
+    command: Optional[Tuple[str, bool]]
+
+
+def landmark_buffer(max_hands=2):
+    """Preallocated (max_hands, 21, 3) array for landmarks_to_array(out=...)."""
+    return np.empty((max_hands, 21, 3), dtype=np.float32)
+
+
+def landmarks_to_array(multi_hand_landmarks, out=None):
+    """
+    MediaPipe multi_hand_landmarks -> float32 array of shape (N, 21, 3).
+    Pass a preallocated out array to avoid allocating per frame.
+    """
+    n = len(multi_hand_landmarks)
+    if out is None or out.shape[0] < n:
+        out = landmark_buffer(n)
+    out[:n] = [[(p.x, p.y, p.z) for p in hand.landmark] for hand in multi_hand_landmarks]
+    return out[:n]
+
+
+def handedness_labels(results, n):
+    """Handedness label per hand from a MediaPipe result, defaulting to "Right"."""
+    if getattr(results, "multi_handedness", None):
+        return [h.classification[0].label for h in results.multi_handedness]
+    return ["Right"] * n
+
+
+def finger_codes(landmarks, handedness=None, margin=MARGIN):
+    """
+    Finger bits for N hands in one pass.
+    landmarks: (N, 21, 2+) array; handedness: sequence of "Right"/"Left".
+    Returns (bits (N, 5) uint8, codes (N,) int).
+    """
+    lm = np.asarray(landmarks)
+    n = lm.shape[0]
+    bits = np.empty((n, 5), dtype=np.uint8)
+    # Thumb moves sideways: outward is +x for a right hand, -x for a left one
+    thumb = lm[:, 4, 0] - lm[:, THUMB_IP, 0]
+    if handedness is not None:
+        thumb *= [-1.0 if label == "Left" else 1.0 for label in handedness]
+    np.greater(thumb, margin, out=bits[:, 0])
+    # Other fingers are up when the tip is above (smaller y than) its PIP joint
+    np.greater(lm[:, PIP_IDS, 1] - lm[:, TIP_IDS[1:], 1], margin, out=bits[:, 1:])
+    return bits, bits @ _BIT_WEIGHTS
+
+
+def classify(landmarks, handedness=None, margin=MARGIN):
+    """Classify every hand in a frame; returns a list of HandState."""
+    _, codes = finger_codes(landmarks, handedness, margin)
+    return [HandState(FINGERS_TABLE[code], code, FINGER_COUNT_TABLE[code], COMMAND_TABLE[code])
+            for code in codes.tolist()]
+
+
+def classify_results(results):
+    """Convenience wrapper for a MediaPipe Hands result (empty list when no hands)."""
+    hands = getattr(results, "multi_hand_landmarks", None)
+    if not hands:
+        return []
+    return classify(landmarks_to_array(hands), handedness_labels(results, len(hands)))
@@ -0,0 +1,426 @@
+# Headless smart home core: device state, command processing and change events, shared by every client
+import collections
+import contextlib
+import os
+import threading
+import time
+
+from command_queue import CommandQueue
+from esp32_client import DeviceDispatcher, NodeRegistry
+from event_bus import EventBus
+from intent_engine import DEVICES, IntentEngine
+from metrics import METRICS
+from scheduler import DAY, Scheduler, next_time_of_day
+from usage_store import DEFAULT_PATH, UsageStore
+from voice_pipeline import RecognitionPipeline
+
+# Named multi-device changes; boards with the batch firmware switch them in one request
+SCENES = {
+    "movie": {"light": False, "tv": True, "ac": True, "fan": False},
+    "sleep": {"light": False, "tv": False, "ac": True, "fan": True},
+    "morning": {"light": True, "fan": True, "tv": False, "ac": False},
+    "away": {"light": False, "fan": False, "tv": False, "ac": False},
+}
+
+REMIND_AFTER = 2 * 3600  # "Fan has been ON for 2 hours, do you want to turn it OFF?"
+
+
+class HomeController:
+    """
+    Owns the device model; every input (Tk window, API clients, voice,
+    gesture) changes it through set() / toggle_all() / process_command().
+
+    Each operation is published as a "command" event with the requested
+    changes, goes through a CommandQueue (source priority, burst coalescing,
+    no-op suppression), records usage for the accepted changes, fans their
+    relay routes out to every board at once (planned by a NodeRegistry) and
+    publishes the accepted changes:
+
+        {"type": "state", "seq": n, "at": ts, "source": "voice",
+         "scope": "device" | "all" | "scene", "changes": [{"device": "fan", "state": true}, ...]}
+
+    Other event types: "dispatch" (aggregated ESP32 report), "gesture", "voice"
+    (status text from VoiceInput), "reminder" ({"device": "fan", "on_for": s}),
+    "usage" (ON seconds of the devices that are ON, every usage_tick seconds)
+    and "error" (a failing subscriber or timer).
+
+    Every operation carries a metrics trace id ("trace" in its command,
+    state and dispatch events). Inputs that know when they started (a
+    captured frame, the end of an utterance) pass their own from
+    METRICS.start(); otherwise one starts here. The board's answer closes it,
+    so METRICS has "<source>_to_ack" for each input.
+
+    Events go out through an EventBus in seq order, after the controller's
+    lock is released, so a listener may wait on another thread (Tk) that is
+    itself changing the controller. subscribe() defaults to a queued
+    (drop_oldest) subscriber so a slow listener cannot hold up voice or
+    gesture input; policy="inline" calls the listener on a thread that
+    published (not always the one that made the change) and is only for
+    listeners that hand the event off without waiting.
+
+    With a Scheduler, a device switched ON arms a reminder every remind_after
+    seconds and, if auto_off has a delay for it, an auto-off timer; switching
+    it OFF cancels both. schedule() adds timed switches of its own (source
+    "timer"), which the scheduler keeps across restarts.
+    """
+
+    def __init__(self, usage=None, dispatcher=None, registry=None, intents=None, devices=DEVICES,
+                 gesture_cooldown=1.0, dispatch_deadline=3.0, scheduler=None, remind_after=REMIND_AFTER,
+                 auto_off=None, usage_tick=60.0):
+        self.usage = usage
+        self.dispatcher = dispatcher
+        self.registry = registry
+        self.queue = CommandQueue(dispatcher, registry, deadline=dispatch_deadline, on_report=self._on_dispatch_done)
+        self.intents = intents or IntentEngine()
+        self.state = {device: False for device in devices}
+        self.gesture_cooldown = gesture_cooldown
+        self.last_gesture_time = 0.0
+        self.seq = 0
+        self._lock = threading.RLock()
+        self._depth = 0                         # nesting of _locked() on the thread holding _lock
+        self._outbox = collections.deque()      # stamped events not yet handed to the bus, in seq order
+        self._delivering = threading.Lock()     # held by the one thread draining the outbox
+        self.bus = EventBus(publish=self.publish)   # failing listeners are reported in seq order too
+        # Counters
+        self.commands = 0
+        self.events = 0
+        if usage is not None:
+            for device in self.state:
+                usage.record(device, False, "system")  # everything starts OFF
+        self.scheduler = scheduler
+        self.remind_after = remind_after
+        self.auto_off = dict(auto_off or {})
+        if scheduler is not None:
+            for timer in scheduler.pending():
+                if timer.kind in ("remind", "auto_off"):
+                    scheduler.cancel(timer.id)  # armed by the previous run's ON states
+            scheduler.on_due = self._on_timer
+            if usage_tick:
+                scheduler.after("usage-tick", "usage", usage_tick, usage_tick)
+            scheduler.start()
+
+    # ---------- Events ----------
+    def subscribe(self, listener, types=None, policy="drop_oldest", maxsize=256, **options):
+        """
+        listener(event) for every event (of `types`) from now on; policy and
+        maxsize pick the subscriber's queue (see event_bus.Subscription).
+        Returns a function that unsubscribes.
+        """
+        subscription = self.bus.subscribe(listener, types, policy, maxsize, **options)
+        return lambda: self.bus.unsubscribe(subscription)
+
+    def publish(self, event):
+        """Stamp the event with the next seq; it reaches the bus once no caller holds the lock."""
+        with self._locked():
+            self.seq += 1
+            event["seq"] = self.seq
+            event.setdefault("at", time.time())
+            self.events += 1
+            self._outbox.append(event)
+        return event
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # The controller lock; leaving the outermost block delivers what was published inside it
+        with self._lock:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                outermost = not self._depth
+        if outermost:
+            self._deliver()
+
+    def _deliver(self):
+        # One thread at a time drains the outbox, so listeners see seq order; a thread that finds
+        # another one delivering leaves its events to it (including a listener publishing from
+        # inside delivery)
+        while self._outbox:
+            if not self._delivering.acquire(blocking=False):
+                return
+            try:
+                while self._outbox:
+                    self.bus.publish(self._outbox.popleft())
+            finally:
+                self._delivering.release()
+
+    def snapshot(self):
+        with self._lock:
+            return {"seq": self.seq, "devices": dict(self.state)}
+
+    # ---------- Commands ----------
+    def _apply(self, changes, source, scope="device", trace=None):
+        """Queue, record and publish one operation (lock held); returns its event."""
+        self.commands += 1
+        trace = METRICS.start(source) if trace is None else trace
+        self.publish({"type": "command", "source": source, "scope": scope, "trace": trace,
+                      "changes": [{"device": device, "state": bool(state)} for device, state in changes]})
+        t0 = time.perf_counter()
+        accepted = self.queue.submit(changes, source, trace, current=self.state)
+        METRICS.observe("queue_submit", time.perf_counter() - t0)
+        for device, state in accepted:
+            if self.scheduler is not None and self.state[device] != state:
+                self._arm(device, state)
+            self.state[device] = state
+            if self.usage is not None:
+                self.usage.record(device, state, source)
+        event = {"type": "state", "source": source, "scope": scope if len(accepted) == len(changes) else "device",
+                 "trace": trace, "changes": [{"device": device, "state": state} for device, state in accepted]}
+        if not accepted:
+            return {**event, "seq": self.seq}  # overridden by a higher-priority source: nothing happened
+        return self.publish(event)
+
+    def set(self, device, state, source="manual", trace=None):
+        """Set one device; raises KeyError for an unknown device id."""
+        with self._locked():
+            if device not in self.state:
+                raise KeyError(device)
+            return self._apply([(device, bool(state))], source, trace=trace)
+
+    def toggle_all(self, state=True, source="manual", trace=None):
+        with self._locked():
+            # One /all/off per board when OFF
+            return self._apply([(device, bool(state)) for device in self.state], source, "all", trace)
+
+    def scene(self, name, source="manual", trace=None):
+        """Apply a named scene from SCENES; raises KeyError for an unknown name."""
+        changes = [(device, state) for device, state in SCENES[name].items() if device in self.state]
+        with self._locked():
+            return self._apply(changes, source, "scene", trace)
+
+    def process_command(self, text, source="voice", trace=None):
+        """Apply every intent in free text (voice, chat, API); returns the parsed intents."""
+        t0 = time.perf_counter()
+        intents = [i for i in self.intents.parse(text.lower()) if i.device in self.state]
+        METRICS.observe("parse", time.perf_counter() - t0)
+        if intents:
+            with self._locked():
+                self._apply(intents, source, trace=trace)
+        return intents
+
+    def gesture(self, fingers_up, trace=None):
+        """Open palm (1 finger up) / fist (0): all ON / OFF, at most once per cooldown."""
+        if fingers_up not in (0, 1):
+            return False
+        with self._locked():
+            now = time.time()
+            if now - self.last_gesture_time <= self.gesture_cooldown:
+                return False
+            self.last_gesture_time = now
+            self.publish({"type": "gesture", "fingers": fingers_up, "trace": trace})
+            self.toggle_all(fingers_up == 1, "gesture", trace)
+        return True
+
+    # ---------- Timers ----------
+    def _arm(self, device, state):
+        if state:
+            self.scheduler.after(f"remind:{device}", "remind", self.remind_after, self.remind_after, {"device": device})
+            if self.auto_off.get(device):
+                self.scheduler.after(f"auto_off:{device}", "auto_off", self.auto_off[device], payload={"device": device})
+        else:
+            self.scheduler.cancel(f"remind:{device}")
+            self.scheduler.cancel(f"auto_off:{device}")
+
+    def schedule(self, device, state, after=None, at=None, every=None, timer_id=None):
+        """
+        Switch device ("all" for every device) to state in `after` seconds or
+        at local "HH:MM"; every=seconds (or "day") repeats it. The same
+        timer_id replaces an earlier timer (default: one per device and state).
+        Raises KeyError for an unknown device, ValueError without a time.
+        """
+        if device != "all" and device not in self.state:
+            raise KeyError(device)
+        if self.scheduler is None:
+            raise ValueError("no scheduler")
+        if at is not None:
+            due = next_time_of_day(at)
+        elif after is not None:
+            due = time.time() + float(after)
+        else:
+            raise ValueError("after or at is required")
+        interval = DAY if every == "day" else (float(every) if every is not None else None)
+        timer_id = timer_id or f"set:{device}:{'on' if state else 'off'}"
+        return self.scheduler.schedule(timer_id, "set", due, interval, {"device": device, "state": bool(state)})
+
+    def timers(self):
+        return [timer._asdict() for timer in self.scheduler.pending()] if self.scheduler is not None else []
+
+    def cancel_timer(self, timer_id):
+        return self.scheduler is not None and self.scheduler.cancel(timer_id)
+
+    def _on_timer(self, timer):
+        # Scheduler thread
+        try:
+            self._run_timer(timer)
+        except Exception as e:
+            self.publish({"type": "error", "where": f"timer {timer.id}", "error": repr(e)})
+            raise
+
+    def _run_timer(self, timer):
+        device = timer.payload.get("device")
+        if timer.kind == "usage":
+            if self.usage is not None and any(self.state.values()):
+                self.publish({"type": "usage", "on_for": {d: self.usage.on_duration(d) for d, on in self.state.items() if on}})
+        elif timer.kind == "remind":
+            with self._locked():
+                if not self.state.get(device):
+                    self.scheduler.cancel(timer.id)
+                    return
+                on_for = self.usage.on_duration(device) if self.usage is not None else None
+                self.publish({"type": "reminder", "device": device, "on_for": on_for or self.remind_after})
+        elif timer.kind == "auto_off":
+            self.set(device, False, "timer")
+        elif timer.kind == "set":
+            if device == "all":
+                self.toggle_all(timer.payload["state"], "timer")
+            elif device in self.state:
+                self.set(device, timer.payload["state"], "timer")
+
+    # ---------- ESP32 ----------
+    def _on_dispatch_done(self, report, traces=()):
+        # Dispatcher loop thread, once every route of one send has answered or failed
+        METRICS.observe("dispatch", report.elapsed)
+        for trace in traces:
+            METRICS.mark(trace, "ack", end=True)
+        self.publish({"type": "dispatch", "traces": list(traces), **report.summary()})
+
+    # ---------- Usage ----------
+    def usage_summary(self, period="day"):
+        return self.usage.summary(period) if self.usage is not None else {}
+
+    def stats(self):
+        with self._lock:
+            return {"seq": self.seq, "commands": self.commands, "events": self.events,
+                    "listener_errors": self.bus.errors, "bus": self.bus.stats(), "queue": self.queue.stats(),
+                    "scheduler": self.scheduler.stats() if self.scheduler is not None else None}
+
+    def close(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.bus.close()
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        if self.usage is not None:
+            self.usage.close()
+
+
+def build_controller(usage_path=None):
+    """
+    Controller wired from the environment: SMART_HOME_NODES=<nodes.json> maps
+    devices onto any number of relay boards (see NodeRegistry.load), or
+    SMART_HOME_ESP32=<ip[:port]> drives a single board (SMART_HOME_BATCH=1
+    when it runs the /batch firmware, SMART_HOME_UDP=<port> to send commands
+    over its UDP transport first).
+
+    Timers live in the usage database. SMART_HOME_AUTO_OFF="fan=30,light=60"
+    turns devices OFF that many minutes after they go ON;
+    SMART_HOME_ALL_OFF_AT="23:30" switches everything OFF every night.
+    """
+    registry = dispatcher = None
+    if os.environ.get("SMART_HOME_NODES"):
+        registry = NodeRegistry.load(os.environ["SMART_HOME_NODES"])
+    elif os.environ.get("SMART_HOME_ESP32"):
+        udp = os.environ.get("SMART_HOME_UDP")
+        registry = NodeRegistry.single(os.environ["SMART_HOME_ESP32"], batch=os.environ.get("SMART_HOME_BATCH") == "1",
+                                       udp=int(udp) if udp else None)
+    if registry is not None:
+        dispatcher = DeviceDispatcher(registry.nodes, limits=registry.limits, udp=registry.udp).start()
+    usage = UsageStore(usage_path) if usage_path else UsageStore()
+    auto_off = {}
+    for rule in filter(None, os.environ.get("SMART_HOME_AUTO_OFF", "").split(",")):
+        device, _, minutes = rule.partition("=")
+        auto_off[device.strip()] = float(minutes) * 60
+    controller = HomeController(usage=usage, dispatcher=dispatcher, registry=registry,
+                                scheduler=Scheduler(usage_path or DEFAULT_PATH), auto_off=auto_off)
+    if os.environ.get("SMART_HOME_ALL_OFF_AT"):
+        controller.schedule("all", False, at=os.environ["SMART_HOME_ALL_OFF_AT"], every="day", timer_id="nightly-off")
+    return controller
+
+
+class VoiceInput:
+    """
+    Microphone -> recognizer -> controller.process_command() on a background
+    thread. Status text goes out as {"type": "voice", "status": ...} events;
+    a fatal error, or the end of a replayed recording, also sets "stopped":
+    true. source is any input_sources audio source; the default is the
+    microphone, or whatever SMART_HOME_MIC / SMART_HOME_RECORD_MIC ask for.
+    """
+
+    def __init__(self, controller, recognizer, language="en-IN", language_name="English", source=None):
+        self.controller = controller
+        self.recognizer = recognizer
+        self.language = language
+        self.language_name = language_name
+        self.source = source
+        self.running = False
+        self._thread = None
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="voice-input", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+
+    def _status(self, text, **extra):
+        self.controller.publish({"type": "voice", "status": text, **extra})
+
+    def _run(self):
+        from input_sources import microphone_source
+        from voice_frontend import VoiceFrontend  # needs speech_recognition
+
+        recognizer, language = self.recognizer, self.language
+        listening = f"🎤 Listening in {self.language_name}..."
+        # One microphone stream for the whole session: no per-command calibration,
+        # and each utterance is handed over as soon as the speaker stops
+        frontend = VoiceFrontend(on_speech=self._on_speech_activity, source=self.source or microphone_source()).start()
+        # Capture keeps segmenting while earlier utterances are still being decoded;
+        # results are applied in the order they were spoken. Each utterance carries its
+        # metrics trace, started when the speaker stopped.
+        pipeline = RecognitionPipeline(lambda item: (recognizer.transcribe(item[0], language), item[1]),
+                                       self._on_recognized, self._on_recognition_error).start()
+        self._status(listening)
+        try:
+            while self.running:
+                utterance = frontend.next_utterance(timeout=0.5, stamped=True)
+                if frontend.error is not None:
+                    raise frontend.error
+                if utterance is None and frontend.finished and not pipeline.stats()["pending"]:
+                    self.running = False
+                    self._status("Recording finished.", stopped=True)
+                    break
+                if utterance is None or not self.running:
+                    continue
+                self._status("Processing audio...")
+                ended_at, audio = utterance
+                pipeline.submit((audio, METRICS.start("voice", ended_at)), timeout=0.5)
+        except Exception as e:
+            self.running = False
+            self._status(f"⚠️ Voice error: {e}", stopped=True)
+        finally:
+            frontend.stop()
+            pipeline.stop()
+
+    def _on_recognized(self, result):
+        (text, backend, latency), trace = result
+        METRICS.observe(f"recognition_{backend}", latency)
+        METRICS.mark(trace, "recognized")
+        self._status(f"Recognized ({backend}): {text}")
+        self.controller.process_command(text, "voice", trace)
+
+    def _on_recognition_error(self, error):
+        import speech_recognition as sr
+
+        if isinstance(error, sr.UnknownValueError):
+            self._status("Could not understand audio")
+        elif isinstance(error, sr.RequestError):
+            self._status(f"Service error: {error}")
+        else:
+            self._status(f"⚠️ Voice error: {error}")
+
+    def _on_speech_activity(self, speaking):
+        if speaking:
+            self._status("🎤 Hearing you...")
@@ -0,0 +1,402 @@
+# Headless controller daemon: local HTTP + WebSocket API over HomeController, state changes pushed to every client
+#   python home_daemon.py --host 0.0.0.0 --port 8765 [--voice] [--db usage.db]
+#
+# HTTP (JSON bodies and replies, keep-alive):
+#   GET  /state                      {"seq": n, "devices": {"light": false, ...}}
+#   GET  /usage?period=day|week      seconds ON per device
+#   GET  /stats                      controller and server counters
+#   GET  /timers                     pending timers, earliest first
+#   GET  /metrics                    per-stage latency histograms and loop FPS (Prometheus text format)
+#   POST /devices/<id>  {"state": true}
+#   POST /all           {"state": false}
+#   POST /command       {"text": "turn on the fan and the light"}
+#   POST /scene         {"name": "movie"}
+#   POST /timers        {"device": "fan" | "all", "state": false, "after": 1800 | "at": "23:30", "every": "day"}
+#   DELETE /timers/<id>
+# WebSocket (GET /events with Upgrade): a {"type": "snapshot"} message first, then
+# every controller event as it happens. Clients may send the same operations as
+# {"op": "set" | "all" | "scene" | "command" | "state" | "timers" | "schedule" | "cancel" | "metrics", "id": ..., ...};
+# the reply carries the id.
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from home_core import VoiceInput, build_controller
+from metrics import METRICS
+from usage_store import SOURCES
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_MESSAGE = 64 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+# ---------- WebSocket framing (RFC 6455) ----------
+def _mask(payload, key):
+    n = len(payload)
+    if not n:
+        return payload
+    stream = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(stream, "big")).to_bytes(n, "big")
+
+
+def ws_frame(payload, opcode=OP_TEXT, mask=False):
+    """One final frame; clients must mask (mask=True), servers must not."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n | (0x80 if mask else 0))
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126 | (0x80 if mask else 0), n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127 | (0x80 if mask else 0), n)
+    if mask:
+        key = os.urandom(4)
+        return header + key + _mask(payload, key)
+    return header + payload
+
+
+async def read_ws_message(reader, max_size=MAX_MESSAGE):
+    """(opcode, payload) of the next message, continuation frames joined; control frames come through as-is."""
+    opcode, parts, size = None, [], 0
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        fin, frame_op, length = b0 & 0x80, b0 & 0x0F, b1 & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        size += length
+        if size > max_size:
+            raise ValueError("message too large")
+        key = await reader.readexactly(4) if b1 & 0x80 else None
+        payload = await reader.readexactly(length)
+        if key is not None:
+            payload = _mask(payload, key)
+        if frame_op >= OP_CLOSE:
+            return frame_op, payload
+        if frame_op != OP_CONT:
+            opcode = frame_op
+        parts.append(payload)
+        if fin:
+            return opcode, b"".join(parts)
+
+
+def ws_accept(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+async def read_request(reader):
+    """(method, target, headers, body) of the next HTTP request, or None at EOF."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_MESSAGE:
+        raise ValueError("body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def _state(payload):
+    state = payload["state"]
+    if not isinstance(state, bool):
+        raise TypeError("state must be true or false")
+    return state
+
+
+class HomeDaemon:
+    """
+    asyncio HTTP/WebSocket server for one HomeController. Commands from any
+    client run on the loop thread (controller calls are short and
+    thread-safe); events arrive on the daemon's own bus queue, are serialised
+    and framed once there, then written to every WebSocket client. A client whose unsent backlog
+    exceeds max_buffer is disconnected instead of slowing the others down.
+    """
+
+    def __init__(self, controller, host="127.0.0.1", port=8765, max_buffer=256 * 1024):
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self.max_buffer = max_buffer
+        self.loop = None
+        self._server = None
+        self._clients = set()      # WebSocket writers receiving events
+        self._writers = set()      # every open connection
+        self._unsubscribe = None
+        self._thread = None
+        # Counters
+        self.requests = 0
+        self.messages = 0
+        self.connections = 0
+        self.events_sent = 0
+        self.slow_clients = 0
+
+    # ---------- Operations ----------
+    def execute(self, op, payload):
+        """Run one API operation; returns (HTTP status, reply dict)."""
+        source = payload.get("source", "api")
+        if source not in SOURCES:
+            source = "api"
+        try:
+            if op == "state":
+                return 200, self.controller.snapshot()
+            if op == "set":
+                return 200, self.controller.set(payload["device"], _state(payload), source)
+            if op == "all":
+                return 200, self.controller.toggle_all(_state(payload), source)
+            if op == "scene":
+                return 200, self.controller.scene(str(payload["name"]), source)
+            if op == "command":
+                intents = self.controller.process_command(str(payload["text"]), source)
+                return 200, {"intents": [{"device": i.device, "state": i.action} for i in intents],
+                             "seq": self.controller.seq}
+            if op == "usage":
+                return 200, self.controller.usage_summary(payload.get("period", "day"))
+            if op == "stats":
+                return 200, {"controller": self.controller.stats(), "server": self.stats()}
+            if op == "timers":
+                return 200, {"timers": self.controller.timers()}
+            if op == "metrics":
+                return 200, METRICS.summary()
+            if op == "schedule":
+                timer = self.controller.schedule(payload["device"], _state(payload), payload.get("after"),
+                                                 payload.get("at"), payload.get("every"), payload.get("timer"))
+                return 200, timer._asdict()
+            if op == "cancel":
+                if not self.controller.cancel_timer(str(payload["timer"])):
+                    return 404, {"error": f"no timer {payload['timer']!r}"}
+                return 200, {"cancelled": payload["timer"]}
+        except KeyError as e:
+            return (404 if op in ("set", "schedule") else 400), {"error": f"unknown or missing {e}"}
+        except (TypeError, ValueError) as e:
+            return 400, {"error": str(e)}
+        return 404, {"error": f"unknown operation {op!r}"}
+
+    def route(self, method, target, body):
+        """Map an HTTP request onto execute()."""
+        url = urlsplit(target)
+        parts = url.path.strip("/").split("/")
+        if method == "GET" and url.path == "/metrics":
+            return 200, METRICS.prometheus()
+        if method == "GET" and parts[0] in ("state", "usage", "stats", "timers") and len(parts) == 1:
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            return self.execute(parts[0], query)
+        if method == "DELETE" and parts[0] == "timers" and len(parts) == 2:
+            return self.execute("cancel", {"timer": parts[1]})
+        if method != "POST":
+            return 405, {"error": "method not allowed"}
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            return 400, {"error": f"bad JSON: {e}"}
+        if parts[0] == "devices" and len(parts) == 2:
+            return self.execute("set", {**payload, "device": parts[1]})
+        if parts[0] in ("all", "command", "scene") and len(parts) == 1:
+            return self.execute(parts[0], payload)
+        if parts[0] == "timers" and len(parts) == 1:
+            return self.execute("schedule", payload)
+        return 404, {"error": "not found"}
+
+    # ---------- HTTP ----------
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError:
+                    self._respond(writer, 413, {"error": "request too large"}, close=True)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                self.requests += 1
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(reader, writer, headers)
+                    break
+                status, reply = self.route(method, target, body)
+                close = headers.get("connection", "").lower() == "close"
+                self._respond(writer, status, reply, close)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def _respond(writer, status, reply, close=False):
+        # Text replies (/metrics) go out as-is, everything else as JSON
+        if isinstance(reply, str):
+            payload, content_type = reply.encode(), "text/plain; version=0.0.4"
+        else:
+            payload, content_type = json.dumps(reply).encode(), "application/json"
+        writer.write((f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\nContent-Type: {content_type}\r\n"
+                      f"Content-Length: {len(payload)}\r\n"
+                      f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n").encode() + payload)
+
+    # ---------- WebSocket ----------
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            self._respond(writer, 400, {"error": "missing Sec-WebSocket-Key"}, close=True)
+            return
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {ws_accept(key)}\r\n\r\n").encode())
+        # Snapshot and subscription happen in the same loop step, so no event falls in between
+        writer.write(ws_frame(json.dumps({"type": "snapshot", **self.controller.snapshot()})))
+        self._clients.add(writer)
+        try:
+            while True:
+                opcode, payload = await read_ws_message(reader)
+                if opcode == OP_CLOSE:
+                    writer.write(ws_frame(payload[:2], OP_CLOSE))
+                    break
+                if opcode == OP_PING:
+                    writer.write(ws_frame(payload, OP_PONG))
+                    continue
+                if opcode != OP_TEXT:
+                    continue
+                self.messages += 1
+                try:
+                    message = json.loads(payload)
+                    status, reply = self.execute(message.get("op"), message)
+                    reply = {"type": "reply", "id": message.get("id"), "status": status, "reply": reply}
+                except (ValueError, AttributeError) as e:
+                    reply = {"type": "reply", "id": None, "status": 400, "reply": {"error": f"bad JSON: {e}"}}
+                writer.write(ws_frame(json.dumps(reply)))
+                await writer.drain()
+        finally:
+            self._clients.discard(writer)
+
+    def _broadcast(self, frame):
+        for writer in list(self._clients):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.slow_clients += 1
+                self._clients.discard(writer)
+                writer.close()
+                continue
+            writer.write(frame)
+            self.events_sent += 1
+
+    def _on_event(self, event):
+        # Bus worker thread: serialise and frame once here, the loop only writes
+        if self._clients:
+            self.loop.call_soon_threadsafe(self._broadcast, ws_frame(json.dumps(event)))
+
+    # ---------- Lifecycle ----------
+    async def start_async(self):
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        # Queued: a burst of events costs the input thread one append, never a socket write
+        self._unsubscribe = self.controller.subscribe(self._on_event, policy="drop_oldest", maxsize=1024, name="daemon")
+        return self
+
+    async def stop_async(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start(self):
+        """Serve from a background loop thread (e.g. next to the Tk window); returns once listening."""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start_async())
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop_async())
+            pending = asyncio.all_tasks(loop)
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="home-daemon", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def stats(self):
+        return {"connections": self.connections, "open": len(self._writers), "subscribers": len(self._clients),
+                "requests": self.requests, "messages": self.messages, "events_sent": self.events_sent,
+                "slow_clients": self.slow_clients}
+
+
+def start_voice(controller, language="en-IN"):
+    """Microphone input for a daemon without a window; no cloud fallback with SMART_HOME_OFFLINE=1."""
+    from recognizers import build_recognizer
+
+    recognizer = build_recognizer(cloud=os.environ.get("SMART_HOME_OFFLINE") != "1")
+    recognizer.warm(language)
+    return VoiceInput(controller, recognizer, language).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless smart home controller with a local HTTP/WebSocket API")
+    parser.add_argument("--host", default="127.0.0.1", help="0.0.0.0 to serve phones and panels on the LAN")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default=None, help="usage database (default: SMART_HOME_DB or usage.db)")
+    parser.add_argument("--voice", action="store_true",
+                        help="listen on the local microphone (SMART_HOME_MIC=<wav> replays a recording instead)")
+    parser.add_argument("--language", default="en-IN")
+    args = parser.parse_args()
+
+    controller = build_controller(args.db)
+    daemon = HomeDaemon(controller, args.host, args.port)
+
+    async def serve():
+        await daemon.start_async()
+        print(f"Smart home daemon listening on http://{daemon.address}", flush=True)
+        if args.voice:
+            start_voice(controller, args.language)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\nDaemon stopped.")
+    finally:
+        controller.close()
+
+
+if __name__ == "__main__":
+    main()
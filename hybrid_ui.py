@@ -1,24 +1,97 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+import importlib
+import json
+import os
+import sys
 import threading
 import time
-import re
-from datetime import datetime
-from PIL import Image, ImageTk
-
-# Optional imports
-try:
-    import cv2
-except Exception:
-    cv2 = None
-try:
-    import mediapipe as mp
-except Exception:
-    mp = None
-try:
-    import speech_recognition as sr
-except Exception:
-    sr = None
+
+PROCESS_START = time.perf_counter()
+
+from activity_log import ActivityLog
+from gesture_pipeline import GesturePipeline
+from home_core import VoiceInput, build_controller
+from home_daemon import HomeDaemon
+from lazy_loader import LazyLoader
+from metrics import METRICS
+from preview_renderer import PreviewRenderer
+from roi_tracker import ResolutionController, RoiTracker
+from ui_dispatcher import UiDispatcher
+
+# Optional heavy imports. They are loaded on first use, or by the background
+# warm-up once the window is idle; require() binds them to these names. The
+# warm-up does not go through require(), so factories must reach their
+# dependencies through COMPONENTS.get(), never through these globals.
+cv2 = mp = hand_classifier = MotionGate = build_recognizer = camera_source = None
+
+COMPONENTS = LazyLoader()
+COMPONENTS.register("speech_recognition", lambda: importlib.import_module("speech_recognition"))
+COMPONENTS.register("voice_frontend", lambda: importlib.import_module("voice_frontend").VoiceFrontend,
+                    after=("speech_recognition",))
+COMPONENTS.register("recognizers", lambda: importlib.import_module("recognizers").build_recognizer,
+                    after=("speech_recognition",))
+COMPONENTS.register("cv2", lambda: importlib.import_module("cv2"))
+COMPONENTS.register("hand_classifier", lambda: importlib.import_module("hand_classifier"))
+COMPONENTS.register("motion_gate", lambda: importlib.import_module("motion_gate").MotionGate, after=("cv2",))
+COMPONENTS.register("input_sources", lambda: importlib.import_module("input_sources").camera_source, after=("cv2",))
+COMPONENTS.register("mediapipe", lambda: importlib.import_module("mediapipe"))
+COMPONENTS.register("hands_model",
+                    lambda: COMPONENTS.get("mediapipe").solutions.hands.Hands(max_num_hands=1,
+                                                                              min_detection_confidence=0.7,
+                                                                              min_tracking_confidence=0.7),
+                    kind="init", after=("mediapipe",))
+
+
+def _build_speech_recognizer():
+    # Offline command grammar first; Google only as fallback unless SMART_HOME_OFFLINE=1
+    recognizer = COMPONENTS.get("recognizers")(cloud=os.environ.get("SMART_HOME_OFFLINE") != "1")
+    recognizer.warm("en-IN")
+    return recognizer
+
+
+COMPONENTS.register("speech_recognizer", _build_speech_recognizer, kind="init", after=("recognizers",))
+
+_MODULE_NAMES = {"recognizers": "build_recognizer", "cv2": "cv2", "hand_classifier": "hand_classifier",
+                 "motion_gate": "MotionGate", "input_sources": "camera_source", "mediapipe": "mp"}
+VOICE_COMPONENTS = ("speech_recognition", "voice_frontend", "recognizers", "speech_recognizer")
+GESTURE_COMPONENTS = ("cv2", "hand_classifier", "motion_gate", "input_sources", "mediapipe", "hands_model")
+WARMUP_ORDER = VOICE_COMPONENTS + GESTURE_COMPONENTS
+
+
+def require(*names):
+    """
+    Load components and bind imported modules to this module's names; False if
+    any is missing. Components that failed before are tried again, so starting
+    voice or gesture a second time recovers from a busy device.
+    """
+    ok = True
+    for name in names:
+        value = COMPONENTS.get(name, retry=True)
+        if value is None:
+            ok = False
+        elif name in _MODULE_NAMES:
+            globals()[_MODULE_NAMES[name]] = value
+    return ok
+
+
+# Intent engine device id -> UI device label
+DEVICE_LABELS = {
+    "light": "💡 Light",
+    "fan": "🌬️ Fan",
+    "tv": "📺 TV",
+    "ac": "❄️ AC",
+}
+LABEL_DEVICES = {label: device for device, label in DEVICE_LABELS.items()}
+HOME_EVENT_INTERVAL_MS = 33
+
+
+def _window_event_key(event):
+    # Only voice status text is coalesced; every other event is applied
+    if event["type"] == "voice" and not event.get("stopped"):
+        return "voice"
+    return event["seq"]
+
 
 class SmartHomeUI:
     def __init__(self, root):
@@ -27,6 +100,8 @@ class SmartHomeUI:
         self.root.geometry("1366x768")
         self.root.configure(bg="#F5F7FA")
         self.root.minsize(1000, 640)
+        # All worker-thread UI work goes through one coalescing, rate-limited tick
+        self.ui = UiDispatcher(root, rate=30)
 
         # ---------- Styles ----------
         style = ttk.Style()
@@ -50,6 +125,8 @@ class SmartHomeUI:
         ttk.Button(action_bar, text="All ON", command=lambda: self.toggle_all(True)).pack(side="left", padx=8, pady=8)
         ttk.Button(action_bar, text="All OFF", command=lambda: self.toggle_all(False)).pack(side="left", padx=(0,8), pady=8)
         ttk.Button(action_bar, text="Help", command=self.show_help).pack(side="right", padx=8, pady=8)
+        ttk.Button(action_bar, text="Diagnostics", command=self.show_diagnostics).pack(side="right", pady=8)
+        self.diagnostics = None
 
         # ---------- Main Layout ----------
         main_frame = tk.Frame(root, bg="#F5F7FA", padx=16, pady=16)
@@ -117,11 +194,21 @@ class SmartHomeUI:
 
         self.gesture_canvas = tk.Label(gesture_frame, bg="black")
         self.gesture_canvas.pack(padx=10, pady=(5,10), fill="both", expand=True)
+        # Preview is capped separately from inference and scaled to the widget
+        self.preview = PreviewRenderer(self.gesture_canvas, max_fps=20)
 
         self.gesture_button = ttk.Button(gesture_frame, text="Start Camera", command=self.toggle_gesture)
         self.gesture_button.pack(pady=(0, 10))
         # ---------- Extra Gesture Button ----------
         ttk.Button(gesture_frame, text="Capture Snapshot", command=lambda: self.show_toast("Snapshot Captured")).pack(pady=2)
+        # Skip hand detection while nothing moves in front of the camera
+        self.motion_gate = None  # created with the rest of the gesture stack on first start
+        self.motion_gate_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(gesture_frame, text="Idle power saving", variable=self.motion_gate_var,
+                        command=self.toggle_motion_gate).pack(pady=2)
+        # Crop inference around the tracked hand and scale it to hold the FPS budget
+        self.roi_tracker = RoiTracker()
+        self.resolution = ResolutionController(target_fps=15)
 
         # ---------- Components Module (Bottom-left) ----------
         comp_frame = self.create_card(main_frame, "⚡ Components Control")
@@ -141,7 +228,8 @@ class SmartHomeUI:
             row = tk.Frame(dev_grid, bg="white")
             row.grid(row=i, column=0, sticky="ew", pady=4)
             row.columnconfigure(1, weight=1)
-            ttk.Checkbutton(row, text=device, variable=var, command=self.update_devices, style="TCheckbutton")\
+            ttk.Checkbutton(row, text=device, variable=var, command=lambda d=device: self.on_device_toggled(d),
+                            style="TCheckbutton")\
                 .grid(row=0, column=0, sticky="w")
             chip_var = tk.StringVar()
             chip = tk.Label(row, textvariable=chip_var, font=("Segoe UI", 10, "bold"), bd=0, relief="solid", padx=10, pady=2)
@@ -154,21 +242,38 @@ class SmartHomeUI:
         tk.Label(comp_frame, text="Activity Log", font=("Segoe UI", 12, "bold"), bg="white").pack(anchor="w", padx=10, pady=(8, 0))
         self.log_area = scrolledtext.ScrolledText(comp_frame, height=8, wrap=tk.WORD, font=("Segoe UI", 10))
         self.log_area.pack(fill="both", expand=True, padx=10, pady=(4, 10))
+        # Bounded, batched log; set SMART_HOME_LOG=<file> to mirror it to a rotating file
+        self.activity = ActivityLog(file_path=os.environ.get("SMART_HOME_LOG")).attach(root, self.log_area)
 
         # ---------- Voice/Gesture State ----------
         self.running_voice = False
         self.running_gesture = False
-        self.cap = None
+        self.speech_recognizer = None
+        self.voice_input = None
+        self.camera = None
         self.mp_hands = None
         self.hands = None
         self.mp_draw = None
-        if mp is not None:
-            self.mp_hands = mp.solutions.hands
-            self.hands = self.mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.7)
-            self.mp_draw = mp.solutions.drawing_utils
 
-        self.last_gesture_time = 0.0
-        self.gesture_cooldown = 1.0  # seconds
+        # Device state, command parsing, ESP32 routes (SMART_HOME_ESP32 / SMART_HOME_NODES) and the
+        # usage log live in the headless core; this window is one of its clients and only
+        # mirrors the events it publishes. SMART_HOME_API=[host:]port also serves the same
+        # core to phones, wall panels and scripts while the window is open.
+        self.home = build_controller()
+        self.usage = self.home.usage
+        # The window's events wait in their own queue (voice status coalesced to the latest) and are
+        # drained by a Tk timer, so publishing never waits on the Tk thread
+        self._home_events = self.home.bus.subscribe(
+            self._on_home_event, types=("state", "dispatch", "gesture", "voice", "reminder", "error"),
+            policy="coalesce", maxsize=1024, key=_window_event_key, name="window", worker=False)
+        self._home_events_after = self.root.after(HOME_EVENT_INTERVAL_MS, self._drain_home_events)
+        self.api = None
+        api = os.environ.get("SMART_HOME_API")
+        if api:
+            host, _, port = api.rpartition(":")
+            self.api = HomeDaemon(self.home, host or "127.0.0.1", int(port)).start()
+
+        self.landmark_buffer = None
 
         # ---------- Status Bar ----------
         self.status_bar = tk.Label(root, text="Ready", bd=1, relief=tk.SUNKEN, anchor=tk.W, bg="#333", fg="white")
@@ -179,6 +284,30 @@ class SmartHomeUI:
         # Initialize canvas black
         self._clear_gesture_canvas()
 
+        # Heavy modules load after the window is up (SMART_HOME_WARMUP=0: only on first use)
+        self.startup = {"window_ms": None, "components": COMPONENTS.report()}
+        self.root.after_idle(self._on_window_ready)
+
+    # ---------- Startup Methods ----------
+    def _on_window_ready(self):
+        # Idle callbacks run after Tk's own redraw, so the window is on screen here
+        self.startup["window_ms"] = (time.perf_counter() - PROCESS_START) * 1000
+        self.log(f"Window ready in {self.startup['window_ms']:.0f} ms", "status")
+        if os.environ.get("SMART_HOME_WARMUP", "1") != "0":
+            self.root.after(300, lambda: COMPONENTS.warm(WARMUP_ORDER, on_done=self._on_warmed))
+
+    def _on_warmed(self, report):
+        self.startup["components"] = report
+        self.log(f"Warm-up: {COMPONENTS.summary()}", "status")
+
+    def when_loaded(self, names, then, on_error):
+        """Run then() on the Tk thread once components are loaded; loading (and retrying) happens off the Tk thread."""
+        if COMPONENTS.loaded(*names):
+            then() if require(*names) else on_error()
+            return
+        threading.Thread(target=lambda: self.safe_update(then if require(*names) else on_error),
+                         name="lazy-load", daemon=True).start()
+
     # ---------- Utility Methods ----------
     def create_card(self, parent, title):
         frame = tk.Frame(parent, bg="white", relief="raised", bd=2)
@@ -192,12 +321,8 @@ class SmartHomeUI:
         self.root.after(duration, toast.destroy)
 
     def log(self, text, type_="status"):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_area.tag_configure("voice", foreground="blue")
-        self.log_area.tag_configure("gesture", foreground="green")
-        self.log_area.tag_configure("status", foreground="black")
-        self.log_area.insert(tk.END, f"[{timestamp}] {text}\n", type_)
-        self.log_area.see(tk.END)
+        # Safe from any thread: the widget is updated in batches on the Tk thread
+        self.activity.record(text, type_)
 
     def update_chip(self, device):
         chip_var, chip = self.chips[device]
@@ -207,177 +332,256 @@ class SmartHomeUI:
                        fg="#1B5E20" if self.devices[device].get() else "#B71C1C")
 
     def update_devices(self):
+        # Coalesced: several changes in one tick repaint each chip once
         for device in self.devices:
-            self.update_chip(device)
+            self.ui.post(("chip", device), self.update_chip, device)
+
+    def on_device_toggled(self, device):
+        self.home.set(LABEL_DEVICES[device], self.devices[device].get(), "manual")
+
+    # ---------- Core Events ----------
+    def _drain_home_events(self):
+        # Tk thread: apply whatever the controller published since the last tick
+        self._home_events.drain()
+        if self._home_events.running:
+            self._home_events_after = self.root.after(HOME_EVENT_INTERVAL_MS, self._drain_home_events)
+
+    def _on_home_event(self, event):
+        # Tk thread, from _drain_home_events
+        if event["type"] == "voice":
+            self.voice_text_var.set(event["status"])
+            if event.get("stopped"):
+                self._on_voice_stopped()
+        else:
+            self._apply_home_event(event)
+
+    def _apply_home_event(self, event):
+        kind = event["type"]
+        if kind == "state":
+            for change in event["changes"]:
+                self.devices[DEVICE_LABELS[change["device"]]].set(change["state"])
+            self.update_devices()
+            source = event["source"]
+            if event["scope"] == "all":
+                state = "ON" if event["changes"][0]["state"] else "OFF"
+                self.show_toast(f"All devices turned {state}")
+                self.log(f"All devices set to {state}", "status")
+            elif source != "manual":
+                for change in event["changes"]:
+                    device, state = DEVICE_LABELS[change["device"]], "ON" if change["state"] else "OFF"
+                    self.show_toast(f"{device} turned {state} via {source}")
+                    self.log(f"{source.capitalize()} command → {device} set to {state}", "voice")
+        elif kind == "dispatch":
+            self._on_dispatch_done(event)
+        elif kind == "gesture":
+            state = "ON" if event["fingers"] == 1 else "OFF"
+            self.log(f"Gesture detected: {event['fingers']} fingers → All devices {state}", "gesture")
+        elif kind == "reminder":
+            # Timed by the core's scheduler while the device stays ON
+            label, hours = DEVICE_LABELS.get(event["device"], event["device"]), event["on_for"] / 3600
+            self.show_toast(f"{label} has been ON for {hours:.0f} hours")
+            self.log(f"{label} has been ON for {hours:.1f} hours, turn it OFF?", "status")
+        elif kind == "error":
+            self.log(f"⚠️ {event['where']}: {event['error']}", "status")
+
+    # ---------- Usage Methods ----------
+
+    def usage_summary(self, period="day"):
+        usage = self.home.usage_summary(period)
+        return ", ".join(f"{DEVICE_LABELS.get(d, d)} - {seconds / 3600:.1f} hrs" for d, seconds in usage.items())
+
+    # ---------- ESP32 Methods ----------
+    def _on_dispatch_done(self, report):
+        boards = f"{report['sent']} route(s) on {report['nodes']} board(s)"
+        if report["ok"]:
+            self.status_bar.config(text=f"ESP32 {boards} OK ({report['latency_ms']:.0f} ms)")
+            return
+        self.status_bar.config(text=f"ESP32 {boards}: {len(report['failed'])} failed")
+        for failure in report["failed"]:
+            self.log(f"ESP32 {failure['node']} {failure['route']} failed after {failure['attempts']} attempt(s): "
+                     f"{failure['error']}", "status")
 
     # ---------- Voice Methods ----------
     def toggle_voice(self):
-        if sr is None:
-            messagebox.showerror("Voice Error", "SpeechRecognition not available.")
-            return
         if not self.running_voice:
-            self.running_voice = True
-            self.voice_button.config(text="Stop Listening")
-            self.voice_progress.start(12)
-            self.show_toast("Voice module started")
-            threading.Thread(target=self.voice_loop, daemon=True).start()
+            self.voice_button.state(["disabled"])
+            self.set_voice_status("Loading speech modules...")
+            self.when_loaded(VOICE_COMPONENTS, self._start_voice, self._voice_unavailable)
         else:
             self.running_voice = False
+            if self.voice_input is not None:
+                self.voice_input.stop()
             self.voice_button.config(text="Start Listening")
             self.voice_progress.stop()
-            self.voice_text_var.set("Voice module stopped.")
+            self.set_voice_status("Voice module stopped.")
             self.show_toast("Voice module stopped")
 
-    def voice_loop(self):
-        recognizer = sr.Recognizer()
-        language_code = self.language_codes.get(self.language_var.get(), "en-IN")
-        while self.running_voice:
-            try:
-                with sr.Microphone() as source:
-                    self.safe_update(self.voice_text_var.set, f"🎤 Listening in {self.language_var.get()}...")
-                    recognizer.adjust_for_ambient_noise(source, duration=0.6)
-                    audio = recognizer.listen(source, timeout=5, phrase_time_limit=4)
-                if not self.running_voice:
-                    break
-                self.safe_update(self.voice_text_var.set, "Processing audio...")
-                try:
-                    text = recognizer.recognize_google(audio, language=language_code).lower()
-                    self.safe_update(self.voice_text_var.set, f"Recognized: {text}")
-                    self.process_voice_command(text)
-                except sr.UnknownValueError:
-                    self.safe_update(self.voice_text_var.set, "Could not understand audio")
-                except sr.RequestError as e:
-                    self.safe_update(self.voice_text_var.set, f"Service error: {e}")
-            except sr.WaitTimeoutError:
-                self.safe_update(self.voice_text_var.set, "Timeout: No speech detected")
-            except Exception as e:
-                self.safe_update(self.voice_text_var.set, f"⚠️ Voice error: {e}")
-            time.sleep(0.1)
-
-    def process_voice_command(self, command: str):
-        on_patterns = [r"\bturn\s+on\b", r"\bswitch\s+on\b", r"\bstart\b", "चालू करा", "चालू"]
-        off_patterns = [r"\bturn\s+off\b", r"\bswitch\s+off\b", r"\bstop\b", "बंद करा", "बंद"]
-        action = None
-        if any(re.search(p, command) for p in on_patterns):
-            action = True
-        elif any(re.search(p, command) for p in off_patterns):
-            action = False
-
-        mapping = {
-            ("light", "बत्ती"): "💡 Light",
-            ("fan", "पंख", "पंखा"): "🌬️ Fan",
-            ("tv", "television"): "📺 TV",
-            ("ac", "air conditioner", "cooler"): "❄️ AC",
-        }
+    def _voice_unavailable(self):
+        self.voice_button.state(["!disabled"])
+        self.set_voice_status("Voice module unavailable.")
+        messagebox.showerror("Voice Error", "SpeechRecognition not available.")
 
-        device = None
-        for keys, name in mapping.items():
-            if any(k in command for k in keys):
-                device = name
-                break
+    def _start_voice(self):
+        self.voice_button.state(["!disabled"])
+        self.speech_recognizer = COMPONENTS.get("speech_recognizer")
+        if not self.running_voice:
+            self.running_voice = True
+            self.voice_button.config(text="Stop Listening")
+            self.voice_progress.start(12)
+            self.show_toast("Voice module started")
+            language = self.language_var.get()
+            self.voice_input = VoiceInput(self.home, self.speech_recognizer,
+                                          self.language_codes.get(language, "en-IN"), language).start()
 
-        if device is not None and action is not None:
-            changed = self.devices[device].get() != action
-            self.devices[device].set(action)
-            self.update_devices()
-            self.show_toast(f"{device} turned {'ON' if action else 'OFF'} via voice")
-            self.log(f"Voice command → {device} set to {'ON' if action else 'OFF'}", "voice")
+    def _on_voice_stopped(self):
+        # Fatal microphone/recognizer error: the input thread has already exited
+        if self.running_voice:
+            self.toggle_voice()
 
     # ---------- Gesture Methods ----------
     def toggle_gesture(self):
-        if cv2 is None or mp is None:
-            messagebox.showerror("Gesture Error", "OpenCV/MediaPipe not available.")
+        if not self.running_gesture:
+            self.gesture_button.state(["disabled"])
+            self.set_gesture_status("Loading camera modules...")
+            self.when_loaded(GESTURE_COMPONENTS, self._start_gesture, self._gesture_unavailable)
+        else:
+            self.running_gesture = False
+            self.gesture_button.config(text="Start Camera")
+            self.show_toast("Gesture module stopped")
+
+    def _gesture_unavailable(self):
+        self.gesture_button.state(["!disabled"])
+        self.set_gesture_status("Gesture module unavailable.")
+        messagebox.showerror("Gesture Error", "OpenCV/MediaPipe not available.")
+
+    def _prepare_gesture(self):
+        if self.hands is not None:
             return
+        self.mp_hands = mp.solutions.hands
+        self.hands = COMPONENTS.get("hands_model")
+        self.mp_draw = mp.solutions.drawing_utils
+        # Landmarks are drawn on the RGB frame, so colours are given in RGB
+        self.landmark_style = self.mp_draw.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=2)
+        self.connection_style = self.mp_draw.DrawingSpec(color=(0, 255, 0), thickness=2)
+        self.motion_gate = MotionGate(enabled=self.motion_gate_var.get())
+        self.landmark_buffer = hand_classifier.landmark_buffer()
+
+    def _start_gesture(self):
+        self.gesture_button.state(["!disabled"])
+        self._prepare_gesture()
         if not self.running_gesture:
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW) if hasattr(cv2, "CAP_DSHOW") else cv2.VideoCapture(0)
-            if not self.cap or not self.cap.isOpened():
-                messagebox.showerror("Camera Error", "Could not open webcam.")
+            # The webcam, or a recording when SMART_HOME_CAMERA is set (see input_sources)
+            try:
+                self.camera = camera_source().open()
+            except OSError as e:
+                self.camera = None
+                messagebox.showerror("Camera Error", str(e))
                 self.running_gesture = False
                 self.gesture_button.config(text="Start Camera")
                 return
-            try:
-                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 960)
-                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 540)
-            except Exception:
-                pass
+            self.roi_tracker.reset()
             self.running_gesture = True
             self.gesture_button.config(text="Stop Camera")
             self.show_toast("Gesture module started")
             threading.Thread(target=self.gesture_loop, daemon=True).start()
-        else:
-            self.running_gesture = False
-            self.gesture_button.config(text="Start Camera")
-            self.show_toast("Gesture module stopped")
-
-    def count_fingers(self, handLms, handedness_label):
-        tips = [4, 8, 12, 16, 20]
-        lm = handLms.landmark
-        fingers = []
-
-        thumb_tip = lm[tips[0]].x
-        thumb_ip = lm[tips[0]-1].x
-        if handedness_label == "Right":
-            fingers.append(1 if thumb_tip > thumb_ip + 0.02 else 0)
-        else:
-            fingers.append(1 if thumb_tip < thumb_ip - 0.02 else 0)
-
-        for i in range(1, 5):
-            tip_y = lm[tips[i]].y
-            pip_y = lm[tips[i]-2].y
-            fingers.append(1 if tip_y < pip_y - 0.02 else 0)
-
-        return sum(fingers)
-
-    def _set_gesture_image(self, imgtk):
-        self.gesture_canvas.configure(image=imgtk)
-        self.gesture_canvas.image = imgtk
 
     def gesture_loop(self):
+        # Capture, inference and render run as separate stages; this thread only supervises
+        pipeline = GesturePipeline(self._capture_frame, self._infer_frame, self._render_frame,
+                                   lossless=not self.camera.live).start()
         try:
-            while self.running_gesture and self.cap and self.cap.isOpened():
-                ret, frame = self.cap.read()
-                if not ret:
-                    time.sleep(0.02)
-                    continue
-                frame = cv2.flip(frame, 1)
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.hands.process(rgb_frame) if self.hands else None
-                action_taken = False
-
-                if results and results.multi_hand_landmarks:
-                    handedness_list = ["Right"] * len(results.multi_hand_landmarks)
-                    if hasattr(results, "multi_handedness") and results.multi_handedness:
-                        handedness_list = [h.classification[0].label for h in results.multi_handedness]
-
-                    for handLms, hand_label in zip(results.multi_hand_landmarks, handedness_list):
-                        if self.mp_draw:
-                            self.mp_draw.draw_landmarks(frame, handLms, self.mp_hands.HsAND_CONNECTIONS)
-                        fingers_up = self.count_fingers(handLms, hand_label)
-                        current_time = time.time()
-                        if current_time - self.last_gesture_time > self.gesture_cooldown:
-                            self.last_gesture_time = current_time
-                            if fingers_up == 1:
-                                self.toggle_all(True)
-                                action_taken = True
-                            elif fingers_up == 0:
-                                self.toggle_all(False)
-                                action_taken = True
-                        if action_taken:
-                            self.log(f"Gesture detected: {fingers_up} fingers → All devices {'ON' if fingers_up==1 else 'OFF'}", "gesture")
-
-                imgtk = ImageTk.PhotoImage(image=Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
-                self.safe_update(self._set_gesture_image, imgtk)
-                time.sleep(0.02)
+            last_stats = time.perf_counter()
+            while self.running_gesture and pipeline.alive:
+                time.sleep(0.1)
+                if time.perf_counter() - last_stats >= 1.0:
+                    last_stats = time.perf_counter()
+                    summary = pipeline.summary()
+                    if self.motion_gate is not None and self.motion_gate.enabled and self.motion_gate.idle:
+                        summary += " | idle"
+                    elif self.roi_tracker.box is not None:
+                        summary += f" | tracking @ {self.resolution.scale:.0%}"
+                    self.set_gesture_status(summary)
+            if pipeline.error is not None:
+                self.set_gesture_status(f"⚠️ Gesture error: {pipeline.error}")
+            if self.camera.finished:
+                self.set_gesture_status("Recording finished.")
         finally:
-            if self.cap:
-                self.cap.release()
-            self._clear_gesture_canvas()
+            pipeline.stop()
+            self.camera.close()
+            self.ui.post("preview", self._clear_gesture_canvas)  # replaces any frame still pending
             self.running_gesture = False
             self.safe_update(self.gesture_button.config, {"text": "Start Camera"})
 
+    def _capture_frame(self):
+        captured = self.camera.read()
+        if captured is None:
+            if self.camera.finished:
+                self.running_gesture = False
+            return None
+        frame, captured_at = captured
+        return cv2.flip(frame, 1, frame), captured_at  # in place, the frame is ours
+
+    def toggle_motion_gate(self):
+        if self.motion_gate is not None:
+            self.motion_gate.enabled = self.motion_gate_var.get()
+
+    def _infer_frame(self, captured):
+        frame, captured_at = captured
+        # Idle scene: skip MediaPipe, the frame is still previewed
+        if self.motion_gate is not None and not self.motion_gate.should_infer(frame):
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, frame), [], None
+        # Single in-place BGR->RGB conversion, shared by MediaPipe and the preview
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, frame)
+
+        # Crop to the tracked hand (full frame when lost), then scale to the FPS budget
+        roi = self.roi_tracker.roi(rgb_frame.shape)
+        x0, y0, x1, y1 = roi
+        crop = rgb_frame[y0:y1, x0:x1]
+        size = self.resolution.size_for(x1 - x0, y1 - y0)
+        if size != (x1 - x0, y1 - y0):
+            crop = cv2.resize(crop, size, interpolation=cv2.INTER_LINEAR)
+        elif (x1 - x0, y1 - y0) != rgb_frame.shape[1::-1]:
+            crop = crop.copy()  # MediaPipe needs a contiguous image
+        t0 = time.perf_counter()
+        results = self.hands.process(crop) if self.hands else None
+        self.resolution.record(time.perf_counter() - t0)
+        METRICS.observe("gesture_mediapipe", time.perf_counter() - t0)
+
+        found = bool(results and results.multi_hand_landmarks)
+        if self.motion_gate is not None:
+            self.motion_gate.report(found)
+        if not found:
+            self.roi_tracker.update(None, rgb_frame.shape)
+            return rgb_frame, [], roi
+
+        # All hands in the frame are classified in one vectorized call, in full-frame coordinates
+        hands = results.multi_hand_landmarks
+        landmarks = hand_classifier.landmarks_to_array(hands, self.landmark_buffer)
+        self.roi_tracker.to_frame(landmarks, roi, rgb_frame.shape)
+        self.roi_tracker.update(landmarks, rgb_frame.shape)
+        with METRICS.span("gesture_classify"):
+            classified = hand_classifier.classify(landmarks, hand_classifier.handedness_labels(results, len(hands)))
+        for hand in classified:
+            # Cooldown and all ON/OFF are handled by the core; the trace runs from frame capture to the relays
+            trace = METRICS.start("gesture", captured_at) if hand.count in (0, 1) else None
+            self.home.gesture(hand.count, trace)
+        return rgb_frame, hands, roi
+
+    def _render_frame(self, result):
+        if not self.preview.ready():
+            return
+        rgb_frame, hand_landmarks, roi = result
+        if self.mp_draw and hand_landmarks:
+            # Landmarks are relative to the inference crop, so draw into that view
+            x0, y0, x1, y1 = roi
+            for handLms in hand_landmarks:
+                self.mp_draw.draw_landmarks(rgb_frame[y0:y1, x0:x1], handLms, self.mp_hands.HAND_CONNECTIONS,
+                                            self.landmark_style, self.connection_style)
+        self.preview.render(rgb_frame)
+        self.ui.post("preview", self.preview.present)
+
     def _clear_gesture_canvas(self):
-        self.gesture_canvas.configure(image="", bg="black")
-        self.gesture_canvas.image = None
+        self.preview.clear()
 
     # ---------- Chatbot Methods ----------
     def send_chat_event(self, event):
@@ -388,26 +592,73 @@ class SmartHomeUI:
         if user_text:
             self.chat_area.insert(tk.END, f"You: {user_text}\n")
             self.chat_input.delete(0, tk.END)
-            self.chat_area.insert(tk.END, f"Bot: {user_text[::-1]}\n")  # simple reversal for demo
+            if "usage" in user_text.lower() or "summary" in user_text.lower():
+                period = "week" if "week" in user_text.lower() else "day"
+                self.chat_area.insert(tk.END, f"Bot: Usage this {period}: {self.usage_summary(period)}\n")
+            elif intents := self.home.process_command(user_text, source="chat"):
+                reply = ", ".join(f"{DEVICE_LABELS[i.device]} {'ON' if i.action else 'OFF'}" for i in intents)
+                self.chat_area.insert(tk.END, f"Bot: Done - {reply}\n")
+            else:
+                self.chat_area.insert(tk.END, f"Bot: {user_text[::-1]}\n")  # simple reversal for demo
             self.chat_area.see(tk.END)
 
     def clear_chat(self):
         self.chat_area.delete("1.0", tk.END)
 
     # ---------- Toggle Methods ----------
-    def toggle_all(self, state=True):
-        for device in self.devices:
-            self.devices[device].set(state)
-            self.update_chip(device)
-        self.show_toast(f"All devices turned {'ON' if state else 'OFF'}")
-        self.log(f"All devices set to {'ON' if state else 'OFF'}", "status")
+    def toggle_all(self, state=True, source="manual"):
+        self.home.toggle_all(state, source)
 
     # ---------- Helper ----------
     def safe_update(self, func, *args, **kwargs):
-        try:
-            self.root.after(0, lambda: func(*args, **kwargs))
-        except Exception:
-            pass
+        self.ui.call(func, *args, **kwargs)
+
+    def set_voice_status(self, text):
+        self.ui.post("voice_status", self.voice_text_var.set, text)
+
+    def set_gesture_status(self, text):
+        self.ui.post("gesture_status", self.gesture_text_var.set, text)
+
+    # ---------- Diagnostics ----------
+    def show_diagnostics(self):
+        # Live latency table from METRICS; refreshes once a second while the window is open
+        if self.diagnostics is not None:
+            self.diagnostics.master.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("Diagnostics")
+        window.geometry("760x480")
+        self.diagnostics = scrolledtext.ScrolledText(window, font=("Consolas", 10), wrap=tk.NONE)
+        self.diagnostics.pack(fill="both", expand=True)
+
+        def close():
+            self.root.after_cancel(self._diagnostics_after)
+            self.diagnostics = None
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        self._refresh_diagnostics()
+
+    def _refresh_diagnostics(self):
+        if self.diagnostics is None:
+            return
+        summary = METRICS.summary()
+        if not summary["enabled"]:
+            lines = ["Instrumentation is off (SMART_HOME_METRICS=0)."]
+        else:
+            lines = [f"{'stage':28s} {'count':>7s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}"]
+            for stage, s in summary["stages"].items():
+                lines.append(f"{stage:28s} {s['count']:7d} {s['p50_ms']:9.2f} {s['p95_ms']:9.2f} "
+                             f"{s['p99_ms']:9.2f} {s['max_ms']:9.2f}")
+            lines.append("")
+            lines += [f"{loop:28s} {fps:7.1f} fps" for loop, fps in summary["loops"].items()]
+            lines += [f"{name:28s} {n:7d}" for name, n in summary["counters"].items()]
+        bus = self.home.bus.stats()["subscribers"]
+        lines += [""] + [f"bus {s['name'][:24]:24s} depth {s['depth']:4d} (max {s['max_depth']}), dropped {s['dropped']}, "
+                         f"coalesced {s['coalesced']}" for s in bus]
+        self.diagnostics.delete("1.0", tk.END)
+        self.diagnostics.insert(tk.END, "\n".join(lines))
+        self._diagnostics_after = self.root.after(1000, self._refresh_diagnostics)
 
     # ---------- Help ----------
     def show_help(self):
@@ -417,12 +668,32 @@ class SmartHomeUI:
     def on_closing(self):
         self.running_voice = False
         self.running_gesture = False
-        if self.cap:
-            self.cap.release()
+        if self.voice_input is not None:
+            self.voice_input.stop()
+        if self.api is not None:
+            self.api.stop()
+        self.home.bus.unsubscribe(self._home_events)
+        self.root.after_cancel(self._home_events_after)
+        self.home.close()
+        self.activity.close()
+        self.ui.close()
         self.root.destroy()
 
 
+def _report_startup(app, deadline):
+    # --startup-report: print timings as JSON once the warm-up is done, then exit
+    warmed = os.environ.get("SMART_HOME_WARMUP", "1") == "0" or COMPONENTS.attempted(*WARMUP_ORDER)
+    if (app.startup["window_ms"] is not None and warmed) or time.monotonic() > deadline:
+        app.startup["components"] = COMPONENTS.report()
+        print(json.dumps(app.startup), flush=True)
+        app.on_closing()
+        return
+    app.root.after(100, _report_startup, app, deadline)
+
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = SmartHomeUI(root)
+    if "--startup-report" in sys.argv:
+        root.after(100, _report_startup, app, time.monotonic() + 60)
     root.mainloop()
@@ -0,0 +1,463 @@
+# Camera and microphone sources: live devices, recorders, and replay of recordings at any speed
+# Usage: python input_sources.py record-camera FILE [--seconds N] | record-mic FILE [--seconds N] | info FILE
+# Replay in the app: SMART_HOME_CAMERA=<frames> / SMART_HOME_MIC=<wav>, SMART_HOME_REPLAY_SPEED=max for soak tests.
+# Frames are stored raw (960x540 BGR is ~1.5 MB a frame, ~45 MB/s at 30 fps) so a replay can memory-map
+# them with no decoding on the capture path.
+import argparse
+import os
+import struct
+import threading
+import time
+import wave
+
+import numpy as np
+
+from voice_frontend import SAMPLE_RATE, SAMPLE_WIDTH
+
+# Frame recordings: a 64-byte header, then fixed-size records of (float64 seconds since the first
+# frame, height x width x channels uint8 pixels), so a replay can memory-map the whole file
+FRAME_MAGIC = b"SHFRAME1"
+FRAME_HEADER = struct.Struct("<8sIIId")  # magic, width, height, channels, wall-clock start
+FRAME_HEADER_SIZE = 64
+
+
+def _frame_record(width, height, channels):
+    return np.dtype([("t", "<f8"), ("frame", "u1", (height, width, channels))])
+
+
+def _pace(due):
+    delay = due - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+
+class CameraSource:
+    """
+    The webcam. Every frame source has the same interface:
+
+    open() -> self, raising OSError when the device or file is unavailable
+    read() -> (BGR frame, perf_counter() when captured), or None for no frame
+    close()
+    live      -- frames arrive on the source's clock; a slow consumer drops them
+    finished  -- True once a recording has run out
+    """
+
+    live = True
+    finished = False
+
+    def __init__(self, index=0, width=960, height=540):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.cap = None
+
+    def open(self):
+        import cv2
+
+        if hasattr(cv2, "CAP_DSHOW"):
+            self.cap = cv2.VideoCapture(self.index, cv2.CAP_DSHOW)
+        else:
+            self.cap = cv2.VideoCapture(self.index)
+        if not self.cap or not self.cap.isOpened():
+            raise OSError(f"Could not open webcam {self.index}")
+        try:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        except Exception:
+            pass
+        return self
+
+    def read(self):
+        if not (self.cap and self.cap.isOpened()):
+            return None
+        ret, frame = self.cap.read()
+        return (frame, time.perf_counter()) if ret else None
+
+    def close(self):
+        if self.cap:
+            self.cap.release()
+
+
+class FrameRecorder:
+    """Wraps a frame source and appends every frame it delivers to a frame recording."""
+
+    def __init__(self, source, path):
+        self.source = source
+        self.path = path
+        self.frames = 0
+        self._file = None
+        self._shape = None
+        self._first = None
+
+    @property
+    def live(self):
+        return self.source.live
+
+    @property
+    def finished(self):
+        return self.source.finished
+
+    def open(self):
+        self.source.open()
+        return self
+
+    def read(self):
+        item = self.source.read()
+        if item is not None:
+            self._write(*item)
+        return item
+
+    def _write(self, frame, captured_at):
+        if self._file is None:
+            height, width = frame.shape[:2]
+            channels = frame.shape[2] if frame.ndim == 3 else 1
+            self._shape, self._first = frame.shape, captured_at
+            self._file = open(self.path, "wb")
+            self._file.write(FRAME_HEADER.pack(FRAME_MAGIC, width, height, channels, time.time())
+                             .ljust(FRAME_HEADER_SIZE, b"\0"))
+        elif frame.shape != self._shape:
+            raise ValueError(f"frame size changed from {self._shape} to {frame.shape} while recording")
+        self._file.write(struct.pack("<d", captured_at - self._first))
+        self._file.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        self.frames += 1
+
+    def close(self):
+        self.source.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FrameReplay:
+    """
+    A frame recording played back as a camera. speed=1.0 keeps the recorded
+    timing (2.0 twice as fast); like a real camera, frames the consumer was too
+    slow for are skipped. speed=None delivers every frame as fast as the
+    consumer takes them (live is False, so GesturePipeline waits instead of
+    dropping). Frames are copied out of the memory map, so they can be
+    modified in place. loop=True starts over at the end.
+    """
+
+    finished = False
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.live = speed is not None
+        self.started = None    # wall-clock time the recording started
+        self.frames = None
+        self.delivered = 0
+        self.skipped = 0
+        self._index = 0
+        self._origin = None
+
+    def open(self):
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(FRAME_HEADER.size)
+        except OSError as e:
+            raise OSError(f"Could not open recording {self.path}: {e}") from e
+        if len(header) < FRAME_HEADER.size or header[:8] != FRAME_MAGIC:
+            raise OSError(f"{self.path} is not a frame recording")
+        _, width, height, channels, self.started = FRAME_HEADER.unpack(header)
+        record = _frame_record(width, height, channels)
+        count = (os.path.getsize(self.path) - FRAME_HEADER_SIZE) // record.itemsize  # a torn last frame is ignored
+        if count <= 0:
+            raise OSError(f"{self.path} holds no frames")
+        self.frames = np.memmap(self.path, dtype=record, mode="r", offset=FRAME_HEADER_SIZE, shape=(count,))
+        self._index, self._origin, self.finished = 0, None, False
+        return self
+
+    @property
+    def duration(self):
+        return float(self.frames["t"][-1]) if self.frames is not None else 0.0
+
+    def read(self):
+        if self.frames is None or self.finished:
+            return None
+        if self._index >= len(self.frames):
+            if not self.loop:
+                self.finished = True
+                return None
+            self._index = 0
+            if self._origin is not None:
+                # Next lap starts one average frame interval after the last frame
+                lap = self.duration * (1 + 1 / max(1, len(self.frames) - 1))
+                self._origin += lap / self.speed if self.speed else 0.0
+        if self.speed:
+            if self._origin is None:
+                self._origin = time.perf_counter() - float(self.frames["t"][self._index]) / self.speed
+            # Skip to the newest frame that is already due
+            now, times = time.perf_counter(), self.frames["t"]
+            while (self._index + 1 < len(self.frames)
+                   and self._origin + float(times[self._index + 1]) / self.speed <= now):
+                self._index += 1
+                self.skipped += 1
+            _pace(self._origin + float(times[self._index]) / self.speed)
+        frame = np.array(self.frames["frame"][self._index])
+        self._index += 1
+        self.delivered += 1
+        return frame, time.perf_counter()
+
+    def close(self):
+        self.frames = None
+
+
+class MicrophoneSource:
+    """
+    The microphone, as int16 mono chunks. Every audio source has the same interface:
+
+    open() -> self
+    read() -> bytes of int16 samples, or None once a recording has run out
+    close()
+    mark(start, end)  -- optional: VoiceFrontend reports each utterance's speech, in samples (no pre-roll)
+    live / finished   -- as for frame sources
+    """
+
+    live = True
+    finished = False
+
+    def __init__(self, sample_rate=SAMPLE_RATE, device_index=None, chunk=1600):
+        self.sample_rate = sample_rate
+        self.device_index = device_index
+        self.chunk = chunk
+        self._microphone = None
+        self._stream = None
+
+    def open(self):
+        import speech_recognition as sr
+
+        self._microphone = sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                                         chunk_size=self.chunk)
+        self._stream = self._microphone.__enter__().stream
+        return self
+
+    def read(self):
+        return self._stream.read(self.chunk)
+
+    def close(self):
+        if self._microphone is not None:
+            self._microphone.__exit__(None, None, None)
+            self._microphone = None
+
+
+class AudioRecorder:
+    """
+    Wraps an audio source: everything read goes to a 16-bit PCM WAV, and each
+    utterance span reported through mark() to a .txt next to it ("start end"
+    in seconds per line, the layout bench_vad.py reads).
+    """
+
+    def __init__(self, source, path):
+        self.source = source
+        self.path = path
+        self.markers_path = os.path.splitext(path)[0] + ".txt"
+        self.sample_rate = getattr(source, "sample_rate", SAMPLE_RATE)
+        self.samples = 0
+        self._wav = None
+        self._markers = None
+
+    @property
+    def live(self):
+        return self.source.live
+
+    @property
+    def finished(self):
+        return self.source.finished
+
+    def open(self):
+        self.source.open()
+        self._wav = wave.open(self.path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(SAMPLE_WIDTH)
+        self._wav.setframerate(self.sample_rate)
+        self._markers = open(self.markers_path, "w")
+        return self
+
+    def read(self):
+        data = self.source.read()
+        if data:
+            self._wav.writeframes(data)  # the header is patched on every write, so a crash keeps the audio
+            self.samples += len(data) // SAMPLE_WIDTH
+        return data
+
+    def mark(self, start, end):
+        self._markers.write(f"{start / self.sample_rate:.3f} {end / self.sample_rate:.3f}\n")
+        self._markers.flush()
+        mark = getattr(self.source, "mark", None)
+        if mark is not None:
+            mark(start, end)
+
+    def close(self):
+        self.source.close()
+        for f in (self._wav, self._markers):
+            if f is not None:
+                f.close()
+        self._wav = self._markers = None
+
+
+def _pcm_layout(path):
+    """(data offset, sample count, sample rate) of a mono 16-bit PCM WAV."""
+    with wave.open(path, "rb") as w:
+        if w.getnchannels() != 1 or w.getsampwidth() != SAMPLE_WIDTH:
+            raise OSError(f"{path}: replay needs mono 16-bit PCM")
+        rate, count = w.getframerate(), w.getnframes()
+    with open(path, "rb") as f:
+        f.seek(12)
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise OSError(f"{path}: no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"data":
+                return f.tell(), count, rate
+            f.seek(size + (size & 1), 1)
+
+
+class AudioReplay:
+    """
+    A WAV recording played back as a microphone, memory-mapped, in chunk_ms
+    reads. speed=1.0 keeps real time; speed=None reads as fast as the consumer
+    goes (live is False, so VoiceFrontend queues utterances instead of
+    dropping them). markers holds the recorded utterance spans, in seconds.
+    """
+
+    finished = False
+
+    def __init__(self, path, speed=1.0, chunk_ms=100, loop=False):
+        self.path = path
+        self.speed = speed
+        self.chunk_ms = chunk_ms
+        self.loop = loop
+        self.live = speed is not None
+        self.sample_rate = SAMPLE_RATE
+        self.samples = None
+        self.markers = []
+        self._position = 0
+        self._origin = None
+
+    def open(self):
+        try:
+            offset, count, self.sample_rate = _pcm_layout(self.path)
+        except (OSError, EOFError, wave.Error) as e:
+            raise OSError(f"Could not open recording {self.path}: {e}") from e
+        self.samples = np.memmap(self.path, dtype="<i2", mode="r", offset=offset, shape=(count,))
+        markers_path = os.path.splitext(self.path)[0] + ".txt"
+        if os.path.exists(markers_path):
+            with open(markers_path) as f:
+                self.markers = [tuple(map(float, line.split())) for line in f if line.strip()]
+        self._position, self._origin, self.finished = 0, None, False
+        return self
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate if self.samples is not None else 0.0
+
+    def read(self):
+        if self.samples is None or self.finished:
+            return None
+        if self._position >= len(self.samples):
+            if not self.loop or not len(self.samples):
+                self.finished = True
+                return None
+            self._position = 0
+            if self._origin is not None and self.speed:
+                self._origin += self.duration / self.speed
+        chunk = self.sample_rate * self.chunk_ms // 1000
+        data = self.samples[self._position:self._position + chunk]
+        self._position += len(data)
+        if self.speed:
+            if self._origin is None:
+                self._origin = time.perf_counter()
+            _pace(self._origin + self._position / self.sample_rate / self.speed)  # a chunk is ready once it has been "spoken"
+        return data.tobytes()
+
+    def close(self):
+        self.samples = None
+
+
+def replay_speed():
+    """SMART_HOME_REPLAY_SPEED: 1 = real time (default), 4 = four times as fast, max (or 0) = as fast as possible."""
+    value = os.environ.get("SMART_HOME_REPLAY_SPEED", "1")
+    return None if value in ("max", "0") else float(value)
+
+
+def camera_source(index=0):
+    """
+    The webcam, or SMART_HOME_CAMERA=<frame recording> to replay one instead;
+    SMART_HOME_RECORD_CAMERA=<file> records whatever is captured.
+    """
+    replay = os.environ.get("SMART_HOME_CAMERA")
+    loop = os.environ.get("SMART_HOME_REPLAY_LOOP") == "1"
+    source = FrameReplay(replay, replay_speed(), loop) if replay else CameraSource(index)
+    record = os.environ.get("SMART_HOME_RECORD_CAMERA")
+    return FrameRecorder(source, record) if record else source
+
+
+def microphone_source(device_index=None):
+    """The microphone, or SMART_HOME_MIC=<WAV> to replay one; SMART_HOME_RECORD_MIC=<WAV> records it."""
+    replay = os.environ.get("SMART_HOME_MIC")
+    loop = os.environ.get("SMART_HOME_REPLAY_LOOP") == "1"
+    source = AudioReplay(replay, replay_speed(), loop=loop) if replay else MicrophoneSource(device_index=device_index)
+    record = os.environ.get("SMART_HOME_RECORD_MIC")
+    return AudioRecorder(source, record) if record else source
+
+
+def _record_camera(path, seconds):
+    recorder = FrameRecorder(CameraSource(), path).open()
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            recorder.read()
+    finally:
+        recorder.close()
+    print(f"{recorder.frames} frames -> {path}")
+
+
+def _record_mic(path, seconds):
+    from voice_frontend import VoiceFrontend
+
+    recorder = AudioRecorder(MicrophoneSource(), path)
+    frontend = VoiceFrontend(source=recorder).start()
+    stop = threading.Event()
+    try:
+        stop.wait(seconds)
+    finally:
+        frontend.stop()
+    if frontend.error is not None:
+        raise SystemExit(f"Microphone error: {frontend.error}")
+    seconds = recorder.samples / recorder.sample_rate
+    print(f"{seconds:.1f} s of audio -> {path}, utterance markers -> {recorder.markers_path}")
+
+
+def _info(path):
+    if path.lower().endswith(".wav"):
+        source = AudioReplay(path).open()
+        print(f"{path}: {source.duration:.1f} s at {source.sample_rate} Hz, {len(source.markers)} utterance markers")
+    else:
+        source = FrameReplay(path).open()
+        frames = source.frames
+        height, width = frames.dtype["frame"].shape[:2]
+        fps = (len(frames) - 1) / source.duration if source.duration else 0.0
+        print(f"{path}: {len(frames)} frames of {width}x{height} over {source.duration:.1f} s ({fps:.1f} fps), "
+              f"recorded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(source.started))}")
+    source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record camera/microphone input for replay, or describe a recording")
+    parser.add_argument("command", choices=("record-camera", "record-mic", "info"))
+    parser.add_argument("path")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    args = parser.parse_args()
+    if args.command == "record-camera":
+        _record_camera(args.path, args.seconds)
+    elif args.command == "record-mic":
+        _record_mic(args.path, args.seconds)
+    else:
+        _info(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# Shared command parser for voice, chatbot text, replayed logs and scripts
+import re
+from functools import lru_cache
+from itertools import chain
+from typing import NamedTuple, Optional, Tuple
+
+# ---------- Vocabulary ----------
+# Canonical device ids used across the project (ESP32 routes use "led" for light).
+DEVICES = ("light", "fan", "tv", "ac")
+
+# Aliases per device. Latin aliases are matched on word boundaries, Devanagari
+# aliases as plain substrings (matras are not \w, so \b does not work there).
+DEVICE_ALIASES = {
+    "light": ["light", "lights", "lamp", "bulb", "led", "बत्ती", "लाइट", "लाईट", "दिवा", "दिवे"],
+    "fan": ["fan", "fans", "पंखा", "पंखे", "पंख", "फैन", "फॅन"],
+    "tv": ["tv", "t.v.", "television", "टीवी", "टीव्ही", "टी.व्ही."],
+    "ac": ["ac", "a.c.", "air conditioner", "air conditioning", "cooler", "एसी", "ए.सी.", "कूलर"],
+}
+
+# Action phrases per polarity (English, Hindi, Marathi). Longer phrases are
+# tried first, so "turn on" wins over the bare "on" at the same position.
+# The bare words in BARE_ACTIONS only count straight after a device ("fan off")
+# or in a clause with one of VERBS ("turn the fan off"): "what is on the tv"
+# is not a command.
+ACTION_PHRASES = {
+    True: [
+        "turn on", "switch on", "power on", "start", "activate", "enable", "on",
+        "चालू करो", "चालू कर दो", "चला दो", "चलाओ", "जला दो", "ऑन करो", "ऑन",
+        "चालू करा", "सुरू करा", "लावा", "चालू",
+    ],
+    False: [
+        "turn off", "switch off", "power off", "shut off", "shut down", "stop",
+        "deactivate", "disable", "off",
+        "बंद करो", "बंद कर दो", "बुझा दो", "ऑफ करो", "ऑफ",
+        "बंद करा", "विझवा", "बंद",
+    ],
+}
+
+BARE_ACTIONS = {"on", "off", "ऑन", "ऑफ", "चालू", "बंद"}
+VERBS = ["turn", "switch", "power", "put", "keep", "set"]
+
+# A clause that starts with a question word, or holds one of the Devanagari ones
+# or a "?", asks about the devices ("is the light on"); a clause with a negation
+# ("don't turn on the fan", "पंखा बंद मत करो") forbids its action. Both change nothing.
+QUESTION_WORDS = ["is", "are", "was", "were", "do", "does", "did", "has", "have", "what", "which",
+                  "who", "why", "how", "when", "where", "whether", "क्या", "काय", "?"]
+NEGATIONS = ["don't", "don’t", "dont", "do not", "doesn't", "never", "not", "नहीं", "नही", "मत", "नको", "नका"]
+
+# Clause separators: each clause carries at most one action.
+SEPARATORS = ["and", "then", "also", "और", "फिर", "आणि", "मग", ",", ";", "."]
+
+# "or" between two actions makes a question ("is the fan on or off"), not a command.
+ALTERNATIVES = ["or", "या", "किंवा"]
+
+
+class Intent(NamedTuple):
+    device: str
+    action: bool
+
+
+def _alternation(phrases):
+    parts = []
+    for phrase in sorted(set(phrases), key=lambda p: (-len(p), p)):
+        body = r"\s+".join(re.escape(w) for w in phrase.split())
+        if phrase.isascii() and phrase[0].isalnum():
+            body = r"\b" + body + (r"\b" if phrase[-1].isalnum() else "")
+        parts.append(body)
+    return "|".join(parts)
+
+
+def _words(phrases):
+    # Devanagari words must stand alone: या is also part of words like किया
+    return "|".join(_alternation([p]) if p.isascii() else rf"(?<!\S){re.escape(p)}(?!\S)" for p in phrases)
+
+
+def _build_pattern():
+    groups = [
+        ("on", _alternation(ACTION_PHRASES[True])),
+        ("off", _alternation(ACTION_PHRASES[False])),
+    ]
+    groups += [(f"dev_{device}", _alternation(DEVICE_ALIASES[device])) for device in DEVICES]
+    groups.append(("sep", _alternation(SEPARATORS)))
+    groups += [("alt", _words(ALTERNATIVES)), ("neg", _words(NEGATIONS)), ("ask", _words(QUESTION_WORDS)),
+               ("verb", _alternation(VERBS))]
+    # Cheap first-character guard so most positions are rejected before
+    # the alternation is tried
+    phrases = SEPARATORS + ALTERNATIVES + NEGATIONS + QUESTION_WORDS + VERBS
+    phrases += [p for ps in ACTION_PHRASES.values() for p in ps]
+    phrases += [a for aliases in DEVICE_ALIASES.values() for a in aliases]
+    first = sorted({c for p in phrases for c in (p[0].lower(), p[0].upper())})
+    guard = "(?=[" + "".join(re.escape(c) for c in first) + "])"
+    body = "|".join(f"(?P<{name}>{body})" for name, body in groups)
+    return re.compile(f"{guard}(?:{body})", re.IGNORECASE)
+
+
+class IntentEngine:
+    """
+    Compiled matcher that turns an utterance into (device, action) intents.
+    Build it once and share it; parse() is a pure function of the text, so
+    results are cached and identical on every call.
+    """
+
+    def __init__(self, cache_size=4096):
+        self.pattern = _build_pattern()
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def _parse(self, text: str) -> Tuple[Intent, ...]:
+        """
+        Scan the text once and return intents in utterance order.
+        A clause's devices take the clause's action; a clause without an
+        action inherits the previous one ("turn on the fan and the tv then
+        turn off the ac"), and devices before the first action of the
+        utterance wait for it ("fan and light on", "पंखा चालू करा"). A
+        device after an action takes it only if no other action word claims
+        it before the clause ends ("light on fan off"). Questions ("is the
+        light on", "is the fan on or off") and negated clauses ("don't turn
+        on the fan") change nothing.
+        """
+        if not text:
+            return ()
+        intents = []
+        pending = []          # devices before the utterance's first action, waiting for it
+        waiting = []          # devices in this clause before its action
+        tentative = []        # devices after the clause's action, until the clause ends or another action claims them
+        clause_action = None
+        last_action = None
+        clause_start, clause_last = 0, None   # where the clause's intents start, last_action before it
+        seen = negated = question = verb = after_device = False
+        decided = 0           # intents added by the last token, when it was an action
+        choice = 0            # intents an "or" right after their action put in question
+        for m in chain(self.pattern.finditer(text), (None,)):
+            kind = m.lastgroup if m is not None else "sep"
+            if kind == "sep":
+                if clause_action is None and last_action is not None:
+                    intents.extend(Intent(d, last_action) for d in waiting)
+                    waiting = []
+                intents.extend(Intent(d, clause_action) for d in tentative)
+                if negated or question:
+                    del intents[clause_start:]
+                    last_action = clause_last
+                    waiting = []
+                pending += waiting
+                waiting, tentative = [], []
+                clause_action = None
+                clause_start, clause_last = len(intents), last_action
+                seen = negated = question = verb = after_device = False
+                decided = choice = 0
+                continue
+            if kind == "alt":
+                choice, decided = decided, 0
+            elif kind == "neg":
+                negated = True
+            elif kind == "ask":
+                # English question words only open a question at the start of a clause
+                question = question or not seen or not m.group().isalpha() or not m.group().isascii()
+            elif kind == "verb":
+                verb = True
+                after_device = False
+            elif kind == "on" or kind == "off":
+                if choice:
+                    # "on or off": the question leaves those devices alone
+                    del intents[-choice:]
+                    clause_action, last_action = None, clause_last
+                    decided = choice = 0
+                elif m.group().lower() in BARE_ACTIONS and not (after_device or verb):
+                    pass      # "what is on the tv": not an action
+                else:
+                    clause_action = last_action = kind == "on"
+                    claimed = pending + waiting + tentative
+                    intents.extend(Intent(d, clause_action) for d in claimed)
+                    decided = len(claimed)
+                    pending, waiting, tentative = [], [], []
+                after_device = False
+            else:
+                device = kind[4:]
+                (tentative if clause_action is not None else waiting).append(device)
+                decided = choice = 0
+                after_device = True
+            seen = True
+        if pending and last_action is not None:
+            intents.extend(Intent(d, last_action) for d in pending)
+        return tuple(intents)
+
+    def parse_device(self, text: str, device: str) -> Optional[bool]:
+        """Return the final action for one device, or None if it was not addressed."""
+        action = None
+        for intent in self.parse(text):
+            if intent.device == device:
+                action = intent.action
+        return action
+
+
+_default_engine = None
+
+
+def get_engine() -> IntentEngine:
+    """Shared engine, compiled on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = IntentEngine()
+    return _default_engine
+
+
+def parse_command(text: str) -> Tuple[Intent, ...]:
+    return get_engine().parse(text)
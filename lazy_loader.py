@@ -0,0 +1,117 @@
+# Deferred imports and background warm-up of heavy components, with per-component timings
+import importlib
+import threading
+import time
+
+
+class LazyModule:
+    """Module proxy that imports on first attribute access (import cost moves to first use)."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        module = self._module if self._module is not None else self._load()
+        return getattr(module, attr)
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+class LazyLoader:
+    """
+    Named components (imports or initialised objects) built on first get().
+
+    register(name, factory, kind, after) declares a component; dependencies
+    in `after` are loaded first so every timing covers only its own work.
+    get() is thread-safe and loads each component once; a factory that
+    raises marks the component unavailable (get() returns None, the error is
+    in report()) until get(name, retry=True) tries it again, so a camera or
+    microphone that was busy once is not lost for the session. warm() loads
+    components on a daemon thread, for warming models while the window sits
+    idle.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._values = {}
+        self._failed = set()
+        self._locks = {}
+        self.timings = {}     # name -> {"kind", "ms", "error", "thread"}
+
+    def register(self, name, factory, kind="import", after=()):
+        self._factories[name] = (factory, kind, tuple(after))
+        self._locks[name] = threading.Lock()
+
+    def get(self, name, retry=False):
+        if name in self._values and not (retry and name in self._failed):
+            return self._values[name]
+        factory, kind, after = self._factories[name]
+        for dependency in after:
+            if self.get(dependency, retry) is None:
+                with self._locks[name]:
+                    self._values[name] = None
+                    self._failed.add(name)
+                    self.timings[name] = {"kind": kind, "ms": 0.0, "thread": threading.current_thread().name,
+                                          "error": f"needs {dependency}"}
+                return None
+        with self._locks[name]:
+            if name not in self._values or (retry and name in self._failed):
+                t0 = time.perf_counter()
+                error = None
+                try:
+                    value = factory()
+                except Exception as e:
+                    value, error = None, f"{type(e).__name__}: {e}"
+                self.timings[name] = {"kind": kind, "ms": (time.perf_counter() - t0) * 1000,
+                                      "thread": threading.current_thread().name, "error": error}
+                self._values[name] = value
+                if error is None:
+                    self._failed.discard(name)
+                else:
+                    self._failed.add(name)
+        return self._values[name]
+
+    def loaded(self, *names):
+        """True when every component has been loaded successfully."""
+        return all(name in self._values and name not in self._failed for name in names)
+
+    def attempted(self, *names):
+        """True when every component has been tried, whether or not it loaded."""
+        return all(name in self._values for name in names)
+
+    def available(self, *names):
+        return all(self.get(name) is not None for name in names)
+
+    def warm(self, names=None, on_done=None):
+        """Load components in the background, in order; on_done(report) runs on that thread."""
+        names = list(self._factories) if names is None else names
+
+        def run():
+            for name in names:
+                self.get(name)
+            if on_done is not None:
+                on_done(self.report())
+
+        thread = threading.Thread(target=run, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def report(self):
+        return {name: dict(timing) for name, timing in self.timings.items()}
+
+    def summary(self):
+        parts = []
+        for name, timing in self.timings.items():
+            cost = "n/a" if timing["error"] else f"{timing['ms']:.0f} ms"
+            parts.append(f"{name} {cost}")
+        return ", ".join(parts)
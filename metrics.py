@@ -0,0 +1,229 @@
+# Process-wide latency instrumentation: log-bucket histograms, loop FPS, input -> device ack traces
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+
+# Histogram buckets: quarter powers of two from ~7.6 us to 128 s (each bucket ~19% wide)
+BUCKETS_PER_OCTAVE = 4
+MIN_SECONDS = 2.0 ** -17
+BOUNDS = [MIN_SECONDS * 2.0 ** (i / BUCKETS_PER_OCTAVE) for i in range(24 * BUCKETS_PER_OCTAVE + 1)]
+EXPORTED = BOUNDS[::2 * BUCKETS_PER_OCTAVE]  # every 4x, for the Prometheus text format
+
+
+class FpsMeter:
+    """Rate of tick() calls over a sliding window of recent timestamps."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._ticks = deque()
+        self._lock = threading.Lock()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            self._ticks.append(now)
+            while self._ticks and now - self._ticks[0] > self.window:
+                self._ticks.popleft()
+
+    @property
+    def fps(self):
+        with self._lock:
+            if len(self._ticks) < 2:
+                return 0.0
+            span = self._ticks[-1] - self._ticks[0]
+            return (len(self._ticks) - 1) / span if span > 0 else 0.0
+
+
+class Histogram:
+    """Fixed log-spaced buckets: observe() is O(1), percentiles are accurate to one bucket (~19%)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(BOUNDS, seconds)  # first bound >= seconds; len(BOUNDS) is +Inf
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile, in seconds (None when empty)."""
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if not count:
+            return None
+        rank, seen = pct / 100.0 * count, 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BOUNDS[index], largest) if index < len(BOUNDS) else largest
+        return largest
+
+    def cumulative(self, bounds=EXPORTED):
+        """[(le, count <= le), ...] for the given bucket bounds, then ("+Inf", count)."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        out, seen, index = [], 0, 0
+        for bound in bounds:
+            while index < len(BOUNDS) and BOUNDS[index] <= bound * (1 + 1e-9):
+                seen += counts[index]
+                index += 1
+            out.append((bound, seen))
+        out.append(("+Inf", count))
+        return out
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    Stages (capture, inference, classify, recognition, parse, queue, request,
+    dispatch, ...) each get a histogram of durations; loops get an FPS meter;
+    counters count. Every call returns at once when enabled is False, so the
+    instrumentation can stay in the hot paths (SMART_HOME_METRICS=0).
+
+    Traces follow one input to the relays: start(kind) hands out a correlation
+    id (optionally back-dated to when the frame or utterance was captured),
+    which the controller carries through its events and the command queue;
+    mark(id, "ack") when the board answers records "<kind>_to_ack". Only the
+    newest max_traces open traces are kept, so commands that never reach a
+    board (suppressed, overridden) cost nothing.
+    """
+
+    def __init__(self, enabled=True, max_traces=1024):
+        self.enabled = enabled
+        self.max_traces = max_traces
+        self.histograms = {}
+        self.loops = {}
+        self.counters = {}
+        self._traces = OrderedDict()  # id -> (kind, start)
+        self._next_trace = 0
+        self._lock = threading.Lock()
+
+    # ---------- Recording ----------
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def span(self, stage):
+        """with metrics.span("parse"): ... records the block's duration."""
+        return _Span(self, stage) if self.enabled else _NULL_SPAN
+
+    def tick(self, loop):
+        if not self.enabled:
+            return
+        meter = self.loops.get(loop)
+        if meter is None:
+            with self._lock:
+                meter = self.loops.setdefault(loop, FpsMeter())
+        meter.tick()
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    # ---------- Traces ----------
+    def start(self, kind, at=None):
+        """New correlation id for an input of this kind (None when disabled); at is a perf_counter() time."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._next_trace += 1
+            trace = self._next_trace
+            self._traces[trace] = (kind, time.perf_counter() if at is None else at)
+            if len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+        return trace
+
+    def mark(self, trace, stage, end=False):
+        """Record time from the trace's start to now as "<kind>_to_<stage>"; end closes the trace."""
+        if trace is None or not self.enabled:
+            return
+        with self._lock:
+            entry = self._traces.pop(trace, None) if end else self._traces.get(trace)
+        if entry is not None:
+            kind, start = entry
+            self.observe(f"{kind}_to_{stage}", time.perf_counter() - start)
+
+    # ---------- Reading ----------
+    def summary(self):
+        """{"stages": {stage: {count, p50_ms, p95_ms, p99_ms, max_ms}}, "loops": {loop: fps}, "counters": ...}."""
+
+        def ms(value):
+            return None if value is None else value * 1000
+
+        with self._lock:
+            histograms, loops, counters = dict(self.histograms), dict(self.loops), dict(self.counters)
+        return {"enabled": self.enabled,
+                "stages": {stage: {"count": h.count, "p50_ms": ms(h.percentile(50)), "p95_ms": ms(h.percentile(95)),
+                                   "p99_ms": ms(h.percentile(99)), "max_ms": ms(h.max)}
+                           for stage, h in sorted(histograms.items())},
+                "loops": {loop: meter.fps for loop, meter in sorted(loops.items())},
+                "counters": counters}
+
+    def prometheus(self, prefix="smart_home"):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms, loops, counters = dict(self.histograms), dict(self.loops), dict(self.counters)
+        lines = [f"# HELP {prefix}_stage_seconds Time spent per pipeline stage, or from input to a trace mark.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage, histogram in sorted(histograms.items()):
+            for bound, count in histogram.cumulative():
+                le = bound if bound == "+Inf" else f"{bound:.9g}"
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.9g}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines += [f"# HELP {prefix}_loop_fps Iterations per second over the last two seconds.",
+                  f"# TYPE {prefix}_loop_fps gauge"]
+        lines += [f'{prefix}_loop_fps{{loop="{loop}"}} {meter.fps:.3f}' for loop, meter in sorted(loops.items())]
+        lines += [f"# TYPE {prefix}_events_total counter"]
+        lines += [f'{prefix}_events_total{{name="{name}"}} {n}' for name, n in sorted(counters.items())]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.histograms, self.loops, self.counters = {}, {}, {}
+            self._traces.clear()
+
+
+METRICS = Metrics(enabled=os.environ.get("SMART_HOME_METRICS", "1") != "0")
@@ -0,0 +1,88 @@
+# Cheap frame-differencing gate that decides when MediaPipe needs to run
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Runs hand detection only when it can matter.
+
+    Each frame is shrunk to a small grayscale thumbnail and compared with the
+    previous one. Inference is allowed when enough pixels changed, while a
+    hand was seen within hold_seconds, or every idle_interval seconds as a
+    safety net. All buffers are allocated once per frame size.
+    """
+
+    def __init__(self, size=(160, 90), pixel_threshold=18, min_changed=0.004,
+                 hold_seconds=2.0, idle_interval=0.5, enabled=True):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.hold_seconds = hold_seconds
+        self.idle_interval = idle_interval
+        self.enabled = enabled
+        w, h = size
+        self._small = None
+        self._gray = np.empty((h, w), dtype=np.uint8)
+        self._prev = np.empty((h, w), dtype=np.uint8)
+        self._diff = np.empty((h, w), dtype=np.uint8)
+        self._has_prev = False
+        self.last_hand = float("-inf")
+        self.last_infer = float("-inf")
+        self.last_motion = float("-inf")
+        # Counters
+        self.frames = 0
+        self.inferred = 0
+        self.motion_frames = 0
+
+    def motion(self, frame, color_code=cv2.COLOR_BGR2GRAY):
+        """Fraction of thumbnail pixels that changed since the previous frame."""
+        w, h = self.size
+        if self._small is None or self._small.shape[2] != frame.shape[2]:
+            self._small = np.empty((h, w, frame.shape[2]), dtype=np.uint8)
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_NEAREST)
+        cv2.cvtColor(self._small, color_code, dst=self._gray)
+        if not self._has_prev:
+            self._gray, self._prev = self._prev, self._gray
+            self._has_prev = True
+            return 1.0
+        cv2.absdiff(self._gray, self._prev, dst=self._diff)
+        self._gray, self._prev = self._prev, self._gray
+        changed = cv2.countNonZero(cv2.threshold(self._diff, self.pixel_threshold, 255,
+                                                 cv2.THRESH_BINARY, dst=self._diff)[1])
+        return changed / float(w * h)
+
+    def should_infer(self, frame, now=None, color_code=cv2.COLOR_BGR2GRAY):
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        if not self.enabled:
+            self.inferred += 1
+            return True
+        moving = self.motion(frame, color_code) >= self.min_changed
+        if moving:
+            self.motion_frames += 1
+            self.last_motion = now
+        run = (moving
+               or now - self.last_hand < self.hold_seconds
+               or now - self.last_infer >= self.idle_interval)
+        if run:
+            self.last_infer = now
+            self.inferred += 1
+        return run
+
+    def report(self, hand_found, now=None):
+        """Tell the gate whether the last inference saw a hand."""
+        if hand_found:
+            self.last_hand = time.monotonic() if now is None else now
+
+    @property
+    def idle(self):
+        now = time.monotonic()
+        return now - self.last_hand >= self.hold_seconds and now - self.last_motion >= self.hold_seconds
+
+    def stats(self):
+        skipped = self.frames - self.inferred
+        return {"frames": self.frames, "inferred": self.inferred, "skipped": skipped,
+                "skip_ratio": skipped / self.frames if self.frames else 0.0}
@@ -0,0 +1,114 @@
+# Buffer-reusing preview renderer for the gesture canvas
+import threading
+import time
+
+from PIL import Image, ImageTk
+
+from lazy_loader import lazy_module
+
+# Only needed once frames arrive, so they are imported on the first render()
+cv2 = lazy_module("cv2")
+np = lazy_module("numpy")
+
+
+def fit_size(frame_w, frame_h, box_w, box_h):
+    """Largest size with the frame's aspect ratio that fits in the box (never upscales)."""
+    if box_w <= 1 or box_h <= 1:
+        return frame_w, frame_h
+    scale = min(box_w / frame_w, box_h / frame_h, 1.0)
+    return max(1, int(frame_w * scale)), max(1, int(frame_h * scale))
+
+
+class PreviewRenderer:
+    """
+    Renders RGB frames into one persistent ImageTk.PhotoImage.
+
+    render(rgb) runs on the worker thread: optional downscale into a
+    preallocated buffer, then a copy into a reusable PIL image.
+    present() runs on the Tk thread and pastes that image into the
+    PhotoImage. A new frame is only prepared once the previous one has been
+    presented and max_fps allows it, so nothing queues up and steady-state
+    rendering allocates no new buffers.
+    """
+
+    def __init__(self, label, max_fps=20, fit_to_widget=True):
+        self.label = label
+        self.max_fps = max_fps
+        self.fit_to_widget = fit_to_widget
+        self.photo = None
+        self._photo_size = None
+        self._image = None
+        self._scaled = None
+        self._pending = None
+        self._lock = threading.Lock()
+        self._last_render = 0.0
+        self._box = (0, 0)
+        # Counters for the diagnostics line / benchmark
+        self.rendered = 0
+        self.skipped = 0
+        self.allocations = 0
+        if fit_to_widget:
+            label.bind("<Configure>", self._on_configure, add="+")
+
+    def _on_configure(self, event):
+        self._box = (event.width, event.height)
+
+    # ---------- Worker thread ----------
+    def ready(self):
+        """True if a new frame should be drawn now (previous one shown, FPS cap allows)."""
+        now = time.perf_counter()
+        with self._lock:
+            busy = self._pending is not None
+        if busy or (self.max_fps and now - self._last_render < 1.0 / self.max_fps):
+            self.skipped += 1
+            return False
+        self._last_render = now
+        return True
+
+    def render(self, rgb):
+        """Copy a frame into the next reusable image; call present() on the Tk thread after."""
+        h, w = rgb.shape[:2]
+        size = fit_size(w, h, *self._box) if self.fit_to_widget else (w, h)
+        if size != (w, h):
+            if self._scaled is None or self._scaled.shape[:2] != (size[1], size[0]):
+                self._scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+                self.allocations += 1
+            cv2.resize(rgb, size, dst=self._scaled, interpolation=cv2.INTER_LINEAR)
+            rgb = self._scaled
+
+        image = self._image
+        if image is None or image.size != size:
+            image = self._image = Image.new("RGB", size)
+            self.allocations += 1
+        image.frombytes(np.ascontiguousarray(rgb))
+        with self._lock:
+            self._pending = image
+        self.rendered += 1
+
+    # ---------- Tk thread ----------
+    def present(self):
+        with self._lock:
+            image = self._pending
+        if image is None:
+            return
+        if self.photo is None or self._photo_size != image.size:
+            self.photo = ImageTk.PhotoImage(image=image)
+            self._photo_size = image.size
+            self.allocations += 1
+            self.label.configure(image=self.photo)
+            self.label.image = self.photo
+        else:
+            self.photo.paste(image)
+        with self._lock:
+            self._pending = None
+
+    def clear(self):
+        with self._lock:
+            self._pending = None
+        self.photo = None
+        self._photo_size = None
+        self.label.configure(image="", bg="black")
+        self.label.image = None
+
+    def stats(self):
+        return {"rendered": self.rendered, "skipped": self.skipped, "allocations": self.allocations}
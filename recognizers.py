@@ -0,0 +1,203 @@
+# Pluggable speech recognisers: offline grammar/keyword backends for the fixed
+# command vocabulary, with Google recognition as an optional fallback.
+#
+# Backends take a speech_recognition AudioData and raise the same exceptions
+# as recognize_google (sr.UnknownValueError / sr.RequestError), so callers
+# handle every backend the same way.
+#
+# The Vosk backend needs `pip install vosk` and a model unpacked under models/ (or VOSK_MODELS):
+# download vosk-model-small-en-in-0.4 and vosk-model-small-hi-0.22 from
+# https://alphacephei.com/vosk/models and unzip them there. Without a model it reports itself
+# unavailable and the next backend (Google, when cloud fallback is on) is used.
+import abc
+import json
+import os
+import threading
+import time
+
+import speech_recognition as sr
+
+from intent_engine import ACTION_PHRASES, DEVICE_ALIASES, NEGATIONS, QUESTION_WORDS, SEPARATORS, VERBS, get_engine
+
+try:
+    import vosk
+except Exception:
+    vosk = None
+
+MODELS_DIR = os.environ.get("VOSK_MODELS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+
+# Language code -> model directory name hints, tried in order. Marathi commands
+# use the Hindi model: the Devanagari command words are shared.
+MODEL_HINTS = {"en": ["en-in", "en-us", "en"], "hi": ["hi"], "mr": ["mr", "hi"]}
+
+FILLER_WORDS = ["the", "a", "please", "can", "you", "all", "to", "कृपया", "सब", "सगळे"]
+
+
+def command_vocabulary(devanagari):
+    """Every word the command grammar can produce, for one script."""
+    phrases = [p for ps in ACTION_PHRASES.values() for p in ps]
+    phrases += [a for aliases in DEVICE_ALIASES.values() for a in aliases]
+    phrases += [s for s in SEPARATORS if s.isalpha()] + FILLER_WORDS
+    # Without these a grammar decoder would hear "don't turn on the fan" as "turn on the fan"
+    phrases += VERBS + [w for w in NEGATIONS + QUESTION_WORDS if "’" not in w]
+    words = {w for p in phrases for w in p.split()
+             if w.isascii() != devanagari and "." not in w and any(ch.isalpha() for ch in w)}
+    return sorted(words)
+
+
+class CommandRecognizer(abc.ABC):
+    """Base interface: recognize(audio, language) -> lowercase text."""
+    name = "base"
+    offline = False
+
+    def available(self, language):
+        return True
+
+    def warm(self, language):
+        """Load models ahead of the first utterance (no-op for most backends)."""
+
+    @abc.abstractmethod
+    def recognize(self, audio, language):
+        """Lowercase transcript; raises sr.UnknownValueError / sr.RequestError."""
+
+
+class GoogleRecognizer(CommandRecognizer):
+    """Free Google Web Speech API (network, free-form text)."""
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio, language):
+        return self.recognizer.recognize_google(audio, language=language).lower()
+
+
+class VoskGrammarRecognizer(CommandRecognizer):
+    """
+    Offline Kaldi/Vosk decoding constrained to the command grammar, which
+    keeps small models fast and accurate on the closed vocabulary.
+    Models are looked up in MODELS_DIR (e.g. models/vosk-model-small-en-in-0.4).
+    """
+    name = "vosk"
+    offline = True
+
+    def __init__(self, models_dir=MODELS_DIR, sample_rate=16000):
+        self.models_dir = models_dir
+        self.sample_rate = sample_rate
+        self._models = {}
+        self._lock = threading.Lock()
+        self._grammars = {script: json.dumps(command_vocabulary(script) + ["[unk]"], ensure_ascii=False)
+                          for script in (False, True)}
+        if vosk is not None:
+            vosk.SetLogLevel(-1)
+
+    def model_path(self, language):
+        if vosk is None or not os.path.isdir(self.models_dir):
+            return None
+        names = sorted(os.listdir(self.models_dir))
+        for hint in MODEL_HINTS.get(language.split("-")[0].lower(), []):
+            for name in names:
+                if f"-{hint}" in name.lower() and os.path.isdir(os.path.join(self.models_dir, name)):
+                    return os.path.join(self.models_dir, name)
+        return None
+
+    def available(self, language):
+        return self.model_path(language) is not None
+
+    def warm(self, language):
+        if self.available(language):
+            self._model(language)
+
+    def _model(self, language):
+        path = self.model_path(language)
+        if path is None:
+            raise sr.RequestError(f"No offline model for {language} in {self.models_dir}")
+        with self._lock:
+            if path not in self._models:
+                self._models[path] = vosk.Model(path)
+            return self._models[path]
+
+    def recognize(self, audio, language):
+        model = self._model(language)
+        grammar = self._grammars[not language.lower().startswith("en")]
+        recognizer = vosk.KaldiRecognizer(model, self.sample_rate, grammar)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        text = " ".join(w for w in text.split() if w != "[unk]")
+        if not text:
+            raise sr.UnknownValueError()
+        return text.lower()
+
+
+class SphinxKeywordRecognizer(CommandRecognizer):
+    """PocketSphinx keyword spotting for English commands (needs pocketsphinx)."""
+    name = "sphinx"
+    offline = True
+
+    def __init__(self, sensitivity=0.8):
+        self.recognizer = sr.Recognizer()
+        self.keywords = [(w, sensitivity) for w in command_vocabulary(devanagari=False) if len(w) > 1]
+
+    def available(self, language):
+        if not language.lower().startswith("en"):
+            return False
+        try:
+            import pocketsphinx  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+    def recognize(self, audio, language):
+        return self.recognizer.recognize_sphinx(audio, keyword_entries=self.keywords).strip().lower()
+
+
+class FallbackRecognizer(CommandRecognizer):
+    """
+    Tries backends in order. A result that parses into at least one device
+    intent is accepted straight away; otherwise later backends (normally
+    the cloud one, for free-form chat) get a chance. last_backend and
+    last_latency describe the recognize() call that produced the result.
+    """
+    name = "fallback"
+
+    def __init__(self, backends):
+        self.backends = backends
+        self.offline = all(b.offline for b in backends)
+        self.last_backend = None
+        self.last_latency = 0.0
+
+    def warm(self, language):
+        for backend in self.backends:
+            backend.warm(language)
+
+    def recognize(self, audio, language):
+        text, self.last_backend, self.last_latency = self.transcribe(audio, language)
+        return text
+
+    def transcribe(self, audio, language):
+        """Thread-safe variant of recognize(): returns (text, backend name, latency)."""
+        result, error = None, None
+        for backend in self.backends:
+            if not backend.available(language):
+                continue
+            t0 = time.perf_counter()
+            try:
+                text = backend.recognize(audio, language)
+            except (sr.UnknownValueError, sr.RequestError) as e:
+                error = e
+                continue
+            result = (text, backend.name, time.perf_counter() - t0)
+            if get_engine().parse(text):
+                return result
+        # No command anywhere: return the most general (last) transcript, e.g. for chat
+        if result is not None:
+            return result
+        raise error or sr.UnknownValueError()
+
+
+def build_recognizer(cloud=True, models_dir=MODELS_DIR):
+    """Offline backends first, Google last when cloud fallback is enabled."""
+    backends = [VoskGrammarRecognizer(models_dir), SphinxKeywordRecognizer()]
+    if cloud:
+        backends.append(GoogleRecognizer())
+    return FallbackRecognizer(backends)
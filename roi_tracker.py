@@ -0,0 +1,140 @@
+# Region-of-interest tracking and inference-resolution control for hand detection
+import time
+
+
+class RoiTracker:
+    """
+    Crops inference to a padded box around the last detected hand.
+
+    The box is sticky: it only moves when the hand gets close to its edge,
+    which keeps MediaPipe's own frame-to-frame tracking stable. After
+    lost_after frames without a hand it falls back to the full frame.
+    Boxes are (x0, y0, x1, y1) in pixels.
+    """
+
+    def __init__(self, padding=0.6, edge_margin=0.15, min_fraction=0.3, lost_after=2, enabled=True):
+        self.padding = padding              # extra size around the hand, relative to its box
+        self.edge_margin = edge_margin      # re-centre when the hand is this close to the crop edge
+        self.min_fraction = min_fraction    # smallest crop side, relative to the frame side
+        self.lost_after = lost_after
+        self.enabled = enabled
+        self.box = None
+        self.misses = 0
+        # Counters
+        self.frames = 0
+        self.tracked_frames = 0
+        self.pixels = 0
+        self.full_pixels = 0
+
+    def roi(self, frame_shape):
+        """Box to run inference on for the next frame."""
+        h, w = frame_shape[:2]
+        self.frames += 1
+        self.full_pixels += w * h
+        if not self.enabled or self.box is None:
+            self.pixels += w * h
+            return 0, 0, w, h
+        x0, y0, x1, y1 = self.box
+        self.tracked_frames += 1
+        self.pixels += (x1 - x0) * (y1 - y0)
+        return self.box
+
+    @staticmethod
+    def to_frame(landmarks, roi, frame_shape):
+        """Map (N, 21, 3) landmarks normalised to the crop into full-frame normalised coordinates, in place."""
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = roi
+        landmarks[..., 0] *= (x1 - x0) / w
+        landmarks[..., 0] += x0 / w
+        landmarks[..., 1] *= (y1 - y0) / h
+        landmarks[..., 1] += y0 / h
+        return landmarks
+
+    def update(self, landmarks, frame_shape):
+        """Feed full-frame normalised landmarks (N, 21, 3), or None when no hand was found."""
+        if not self.enabled:
+            self.box = None
+            return
+        if landmarks is None or len(landmarks) == 0:
+            self.misses += 1
+            if self.misses >= self.lost_after:
+                self.box = None
+            return
+        self.misses = 0
+        h, w = frame_shape[:2]
+        xs, ys = landmarks[..., 0], landmarks[..., 1]
+        hx0, hx1 = float(xs.min()) * w, float(xs.max()) * w
+        hy0, hy1 = float(ys.min()) * h, float(ys.max()) * h
+        if self.box is not None and self._inside(hx0, hy0, hx1, hy1):
+            return
+        side = max(hx1 - hx0, hy1 - hy0) * (1.0 + 2 * self.padding)
+        side = max(side, self.min_fraction * min(w, h))
+        cx, cy = (hx0 + hx1) / 2, (hy0 + hy1) / 2
+        bw, bh = min(int(side), w), min(int(side), h)
+        x0 = int(min(max(cx - bw / 2, 0), w - bw))
+        y0 = int(min(max(cy - bh / 2, 0), h - bh))
+        self.box = (x0, y0, x0 + bw, y0 + bh)
+
+    def _inside(self, hx0, hy0, hx1, hy1):
+        x0, y0, x1, y1 = self.box
+        mx, my = (x1 - x0) * self.edge_margin, (y1 - y0) * self.edge_margin
+        return hx0 >= x0 + mx and hy0 >= y0 + my and hx1 <= x1 - mx and hy1 <= y1 - my
+
+    def reset(self):
+        self.box = None
+        self.misses = 0
+
+    def stats(self):
+        return {"tracked_ratio": self.tracked_frames / self.frames if self.frames else 0.0,
+                "pixel_ratio": self.pixels / self.full_pixels if self.full_pixels else 1.0}
+
+
+class ResolutionController:
+    """
+    Picks an inference scale that holds a target inference FPS.
+
+    record() takes each inference duration; a smoothed average above the
+    frame budget steps the scale down, one comfortably below it steps back up.
+    A cooldown between steps avoids oscillating.
+    """
+
+    def __init__(self, target_fps=15.0, scales=(1.0, 0.75, 0.5, 0.35), smoothing=0.2,
+                 low_water=0.6, cooldown=1.0):
+        self.budget = 1.0 / target_fps
+        self.scales = scales
+        self.smoothing = smoothing
+        self.low_water = low_water
+        self.cooldown = cooldown
+        self.level = 0
+        self.average = None
+        self._last_change = float("-inf")
+
+    @property
+    def scale(self):
+        return self.scales[self.level]
+
+    def size_for(self, width, height, min_side=192):
+        """Inference size for a crop, never shrinking its short side below min_side."""
+        scale = min(1.0, max(self.scale, min_side / float(min(width, height))))
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def record(self, duration, now=None):
+        now = time.monotonic() if now is None else now
+        if self.average is None:
+            self.average = duration
+        else:
+            self.average += self.smoothing * (duration - self.average)
+        if now - self._last_change < self.cooldown:
+            return
+        if self.average > self.budget and self.level < len(self.scales) - 1:
+            self.level += 1
+        elif self.average < self.budget * self.low_water and self.level > 0:
+            # Only step up if the larger scale is predicted to still fit (cost ~ pixels)
+            ratio = (self.scales[self.level - 1] / self.scale) ** 2
+            if self.average * ratio > self.budget:
+                return
+            self.level -= 1
+        else:
+            return
+        self._last_change = now
+        self.average = None
@@ -0,0 +1,257 @@
+# Timer scheduler: one thread over a heap of due times; pending timers persist in SQLite across restarts
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timers (
+    id       TEXT PRIMARY KEY,
+    kind     TEXT NOT NULL,
+    due      REAL NOT NULL,
+    interval REAL,
+    payload  TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+DAY = 86400.0
+
+
+class Timer(NamedTuple):
+    id: str
+    kind: str
+    due: float        # Unix time
+    interval: float   # seconds between runs, None for a one-shot timer
+    payload: dict
+
+
+def next_time_of_day(hhmm, now=None):
+    """Unix time of the next local "HH:MM" after now."""
+    now = datetime.fromtimestamp(time.time() if now is None else now)
+    hour, minute = (int(part) for part in str(hhmm).split(":"))
+    at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if at <= now:
+        at += timedelta(days=1)
+    return at.timestamp()
+
+
+class Scheduler:
+    """
+    Timers are plain data (id, kind, due, interval, payload), so they can be
+    stored; when one is due, on_due(timer) runs on the scheduler thread and
+    decides what the kind means. on_due must be quick: every other timer
+    waits behind it.
+
+    schedule() with an id that is already pending replaces it, so rescheduling
+    is the same call. Both schedule() and cancel() are O(log n) or better:
+    replaced and cancelled timers leave their heap entry behind and are
+    skipped when it comes up; the heap is rebuilt once most of it is stale.
+    The thread sleeps until the earliest due time and is only woken when a
+    timer is scheduled ahead of it.
+
+    With a path, pending timers are written to its timers table in batches
+    (at most every flush_interval seconds, and on stop()) and loaded again on
+    the next start. A one-shot timer that came due while nothing was running
+    fires right after start; a recurring one skips the runs it missed.
+    """
+
+    def __init__(self, path=None, on_due=None, flush_interval=0.5, max_sleep=30.0):
+        self.path = path
+        self.on_due = on_due
+        self.flush_interval = flush_interval
+        self.max_sleep = max_sleep  # re-read the clock at least this often (wall clock jumps)
+        self.running = False
+        self._cond = threading.Condition()
+        self._heap = []           # (due, generation, id)
+        self._timers = {}         # id -> (Timer, generation)
+        self._generation = 0
+        self._stale = 0           # heap entries whose timer was replaced or cancelled
+        self._dirty = {}          # id -> Timer, or None to delete; not yet written
+        self._flush_at = 0.0
+        self._thread = None
+        self._conn = None
+        # Counters
+        self.scheduled = 0
+        self.cancelled = 0
+        self.fired = 0
+        self.errors = 0
+        self.compactions = 0
+        self.written = 0
+        if path is not None:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._load()
+
+    def _load(self):
+        now = time.time()
+        for timer_id, kind, due, interval, payload in self._conn.execute("SELECT id, kind, due, interval, payload FROM timers"):
+            if interval and due <= now:
+                due += interval * ((now - due) // interval + 1)
+            self._generation += 1
+            self._timers[timer_id] = (Timer(timer_id, kind, due, interval, json.loads(payload)), self._generation)
+        self._heap = [(timer.due, generation, timer.id) for timer, generation in self._timers.values()]
+        heapq.heapify(self._heap)
+
+    # ---------- Timers ----------
+    def schedule(self, timer_id, kind, due, interval=None, payload=None):
+        """Add or replace timer_id, due at Unix time `due` and then every `interval` seconds if given."""
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+        timer = Timer(str(timer_id), kind, float(due), interval, payload or {})
+        with self._cond:
+            wake = not self._heap or timer.due < self._heap[0][0]
+            self._push(timer)
+            self._mark(timer.id, timer)
+            self.scheduled += 1
+            if wake:
+                self._cond.notify()
+        return timer
+
+    def after(self, timer_id, kind, delay, interval=None, payload=None):
+        return self.schedule(timer_id, kind, time.time() + delay, interval, payload)
+
+    def cancel(self, timer_id):
+        """Returns False when no such timer is pending."""
+        with self._cond:
+            if self._timers.pop(timer_id, None) is None:
+                return False
+            self._stale += 1
+            self._mark(timer_id, None)
+            self.cancelled += 1
+            self._compact()
+            return True
+
+    def get(self, timer_id):
+        with self._cond:
+            entry = self._timers.get(timer_id)
+            return entry[0] if entry else None
+
+    def pending(self):
+        """Every pending timer, earliest first."""
+        with self._cond:
+            return sorted((timer for timer, _ in self._timers.values()), key=lambda t: t.due)
+
+    def __len__(self):
+        return len(self._timers)
+
+    def _push(self, timer):
+        # Lock held (or not started yet)
+        self._generation += 1
+        if timer.id in self._timers:
+            self._stale += 1
+        self._timers[timer.id] = (timer, self._generation)
+        heapq.heappush(self._heap, (timer.due, self._generation, timer.id))
+        self._compact()
+
+    def _mark(self, timer_id, timer):
+        if self._conn is None:
+            return
+        if not self._dirty:
+            self._flush_at = time.monotonic() + self.flush_interval
+            self._cond.notify()
+        self._dirty[timer_id] = timer
+
+    def _compact(self):
+        if self._stale > 1024 and self._stale * 2 > len(self._heap):
+            self._heap = [(timer.due, generation, timer.id) for timer, generation in self._timers.values()]
+            heapq.heapify(self._heap)
+            self._stale = 0
+            self.compactions += 1
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, generation, timer_id = heapq.heappop(self._heap)
+            entry = self._timers.get(timer_id)
+            if entry is None or entry[1] != generation:
+                self._stale -= 1
+                continue
+            timer = entry[0]
+            if timer.interval:
+                following = timer._replace(due=timer.due + timer.interval * ((now - timer.due) // timer.interval + 1))
+                del self._timers[timer_id]
+                self._push(following)
+                self._mark(timer_id, following)
+            else:
+                del self._timers[timer_id]
+                self._mark(timer_id, None)
+            due.append(timer)
+        return due
+
+    # ---------- Thread ----------
+    def start(self):
+        if self._thread is None:
+            self.running = True
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop firing and write out pending changes."""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        elif self._dirty:
+            self._write(self._dirty)
+            self._dirty = {}
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _wait_time(self, now):
+        wait = self.max_sleep
+        if self._heap:
+            wait = min(wait, self._heap[0][0] - now)
+        if self._dirty:
+            wait = min(wait, self._flush_at - time.monotonic())
+        return wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.running and self._wait_time(time.time()) > 0:
+                    self._cond.wait(self._wait_time(time.time()))
+                running = self.running
+                due = self._pop_due(time.time()) if running else []
+                dirty = {}
+                if self._dirty and (not running or time.monotonic() >= self._flush_at):
+                    dirty, self._dirty = self._dirty, {}
+            for timer in due:
+                self.fired += 1
+                try:
+                    if self.on_due is not None:
+                        self.on_due(timer)
+                except Exception:
+                    self.errors += 1
+            if dirty:
+                self._write(dirty)
+            if not running:
+                break
+
+    def _write(self, dirty):
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO timers (id, kind, due, interval, payload) VALUES (?, ?, ?, ?, ?)",
+                             ((t.id, t.kind, t.due, t.interval, json.dumps(t.payload))
+                              for t in dirty.values() if t is not None))
+            conn.executemany("DELETE FROM timers WHERE id = ?", ((i,) for i, t in dirty.items() if t is None))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            self.errors += 1
+            return
+        self.written += len(dirty)
+
+    def stats(self):
+        with self._cond:
+            return {"pending": len(self._timers), "heap": len(self._heap), "scheduled": self.scheduled,
+                    "cancelled": self.cancelled, "fired": self.fired, "errors": self.errors,
+                    "compactions": self.compactions, "written": self.written, "unwritten": len(self._dirty)}
@@ -1,5 +1,7 @@
 #include <WiFi.h>
 #include <WebServer.h>
+#include <WiFiUdp.h>
+#include "soc/gpio_struct.h"
 
 // ---------------- WiFi Credentials ----------------
 const char* ssid = "vivo T3x 5G";
@@ -12,8 +14,31 @@ const int fanPin = 5;    // Fan
 const int tvPin = 18;    // TV
 const int acPin = 19;    // AC
 
+// Bit order of the /batch mask and state bitmap: bit 0 Light, 1 Fan, 2 TV, 3 AC
+const int devicePins[] = {ledPin, fanPin, tvPin, acPin};
+const int deviceCount = 4;
+
 WebServer server(80);
 
+// ---------------- UDP command transport ----------------
+// Datagram: 'S' 'H' 0x01, kind (1 = command, 2 = ack), 4-byte big-endian seq, then the
+// route text ("/fan/on", "/batch?m=5&s=4"). The ack echoes the seq, adds a 2-byte status
+// and the reply body. Retransmissions (same sender and seq) are answered from the cache
+// below instead of being applied twice. HTTP stays available as the fallback.
+const int udpPort = 4210;
+const int udpCacheSize = 8;
+WiFiUDP udp;
+
+struct UdpReply {
+  IPAddress ip;
+  uint16_t port;
+  uint32_t seq;
+  uint16_t status;
+  String body;
+};
+UdpReply udpCache[udpCacheSize];
+int udpCacheNext = 0;
+
 // ---------------- Helper to control devices ----------------
 void setDevice(int pin, bool state) {
   digitalWrite(pin, state ? HIGH : LOW);
@@ -29,6 +54,109 @@ void handleDevice(String device, bool state) {
   server.send(200, "text/plain", device + (state ? " ON" : " OFF"));
 }
 
+// Current relay states as a bitmap (read back from the output latch)
+int stateBits() {
+  int bits = 0;
+  for (int i = 0; i < deviceCount; i++) {
+    if ((GPIO.out >> devicePins[i]) & 1) bits |= 1 << i;
+  }
+  return bits;
+}
+
+// Set every relay in the mask with one register write each for ON and OFF,
+// so they switch together; returns the new state bitmap
+String applyBatch(long mask, long bits, uint16_t &status) {
+  if (mask < 0 || mask >= (1 << deviceCount)) {
+    status = 400;
+    return "bad mask";
+  }
+  uint32_t on = 0, off = 0;
+  for (int i = 0; i < deviceCount; i++) {
+    if (!(mask & (1 << i))) continue;
+    if (bits & (1 << i)) on |= 1UL << devicePins[i];
+    else off |= 1UL << devicePins[i];
+  }
+  GPIO.out_w1ts = on;   // all relay pins are below GPIO 32
+  GPIO.out_w1tc = off;
+  status = 200;
+  return String(stateBits());
+}
+
+// /batch?m=<mask>&s=<states>: several devices in one request, reply with the new bitmap
+void handleBatch() {
+  uint16_t status;
+  String body = applyBatch(server.arg("m").toInt(), server.arg("s").toInt(), status);
+  server.send(status, "text/plain", body);
+}
+
+// ---------------- UDP Handlers ----------------
+long queryArg(const String &query, const char *key) {
+  String prefix = String(key) + "=";
+  int start = 0;
+  while (start < (int)query.length()) {
+    int end = query.indexOf('&', start);
+    if (end < 0) end = query.length();
+    if (query.substring(start, end).startsWith(prefix)) return query.substring(start + prefix.length(), end).toInt();
+    start = end + 1;
+  }
+  return 0;
+}
+
+// Same routes as the HTTP endpoints, for the datagram transport
+String runRoute(const String &route, uint16_t &status) {
+  static const char *names[] = {"led", "fan", "tv", "ac"};
+  int q = route.indexOf('?');
+  String path = q < 0 ? route : route.substring(0, q);
+  String query = q < 0 ? "" : route.substring(q + 1);
+  status = 200;
+  if (path == "/batch") return applyBatch(queryArg(query, "m"), queryArg(query, "s"), status);
+  if (path == "/all/off") {
+    for (int i = 0; i < deviceCount; i++) setDevice(devicePins[i], false);
+    return "All devices OFF";
+  }
+  for (int i = 0; i < deviceCount; i++) {
+    String prefix = String("/") + names[i] + "/";
+    if (path == prefix + "on" || path == prefix + "off") {
+      bool state = path.endsWith("/on");
+      setDevice(devicePins[i], state);
+      return String(names[i]) + (state ? " ON" : " OFF");
+    }
+  }
+  status = 404;
+  return "Not found";
+}
+
+void handleUdp() {
+  int size = udp.parsePacket();
+  if (size <= 0) return;
+  uint8_t packet[129];
+  int n = udp.read(packet, 128);
+  if (n < 8 || packet[0] != 'S' || packet[1] != 'H' || packet[2] != 1 || packet[3] != 1) return;
+  packet[n] = 0;
+  uint32_t seq = (uint32_t)packet[4] << 24 | (uint32_t)packet[5] << 16 | (uint32_t)packet[6] << 8 | packet[7];
+  IPAddress ip = udp.remoteIP();
+  uint16_t port = udp.remotePort();
+  int slot = -1;
+  for (int i = 0; i < udpCacheSize; i++) {
+    if (udpCache[i].seq == seq && udpCache[i].port == port && udpCache[i].ip == ip) slot = i;
+  }
+  if (slot < 0) {  // new command: apply it once and remember the reply
+    slot = udpCacheNext;
+    udpCacheNext = (udpCacheNext + 1) % udpCacheSize;
+    udpCache[slot].ip = ip;
+    udpCache[slot].port = port;
+    udpCache[slot].seq = seq;
+    udpCache[slot].body = runRoute(String((char *)packet + 8), udpCache[slot].status);
+  }
+  UdpReply &reply = udpCache[slot];
+  uint8_t header[10] = {'S', 'H', 1, 2, packet[4], packet[5], packet[6], packet[7],
+                        (uint8_t)(reply.status >> 8), (uint8_t)reply.status};
+  udp.beginPacket(ip, port);
+  udp.write(header, sizeof(header));
+  udp.write((const uint8_t *)reply.body.c_str(), reply.body.length());
+  udp.endPacket();
+}
+
 void setup() {
   Serial.begin(115200);
 
@@ -81,10 +209,17 @@ void setup() {
     server.send(200, "text/plain", "All devices OFF");
   });
 
+  // Several devices in one request (see handleBatch)
+  server.on("/batch", handleBatch);
+
   server.begin();
   Serial.println("HTTP server started");
+  udp.begin(udpPort);
+  Serial.print("UDP commands on port ");
+  Serial.println(udpPort);
 }
 
 void loop() {
   server.handleClient();
+  handleUdp();
 }
\ No newline at end of file
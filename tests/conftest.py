@@ -0,0 +1,6 @@
+# The modules live at the repository root and the parser cases in benchmarks/; make both importable
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
@@ -0,0 +1,112 @@
+# CommandQueue and HomeController: no-op suppression, source priority, /batch and failure reports
+from command_queue import CommandQueue
+from esp32_client import CommandResult, FanOutReport, NodeRegistry
+from home_core import HomeController
+
+
+class RecordingDispatcher:
+    """send_many() without a network: keeps the routes and the report callback."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_many(self, commands, deadline=None, callback=None):
+        self.sent.append((commands, callback))
+
+
+def report(commands, ok=True, body="ok"):
+    return FanOutReport([CommandResult(node, route, ok, 200 if ok else 500, body, 0.01, 1,
+                                       None if ok else "HTTP 500") for node, route in commands], 0.01)
+
+
+def events_of(controller, kind="state"):
+    events = []
+    controller.subscribe(events.append, types=[kind], policy="inline")
+    return events
+
+
+# ---------- Controller without a board ----------
+
+def test_repeated_command_publishes_nothing():
+    home = HomeController()
+    states = events_of(home)
+    home.set("fan", True)
+    home.set("fan", True)
+    assert [e["changes"] for e in states] == [[{"device": "fan", "state": True}]]
+    assert home.queue.suppressed == 1
+
+
+def test_held_gesture_publishes_once():
+    home = HomeController(gesture_cooldown=0.0)
+    states = events_of(home)
+    for _ in range(5):
+        home.gesture(1)
+    assert len(states) == 1
+    assert all(home.state.values())
+    # Everything already OFF: a fist changes nothing
+    home = HomeController(gesture_cooldown=0.0)
+    states = events_of(home)
+    home.gesture(0)
+    assert states == []
+
+
+def test_command_text_applies_only_the_changes():
+    home = HomeController()
+    states = events_of(home)
+    home.set("light", True)
+    home.process_command("turn on the light and the fan")
+    assert [e["changes"] for e in states][-1] == [{"device": "fan", "state": True}]
+
+
+def test_lower_priority_source_is_overridden():
+    home = HomeController()
+    home.set("fan", True, source="manual")
+    home.set("fan", False, source="gesture")
+    assert home.state["fan"] is True
+    assert home.queue.overridden == 1
+
+
+# ---------- Queue in front of a board ----------
+
+def make_queue(batch=False):
+    dispatcher = RecordingDispatcher()
+    queue = CommandQueue(dispatcher, NodeRegistry.single("127.0.0.1", batch=batch), window=0.0)
+    return queue, dispatcher
+
+
+def test_no_op_is_not_sent_again():
+    queue, dispatcher = make_queue()
+    assert queue.submit([("fan", True)], current={"fan": False}) == [("fan", True)]
+    assert queue.submit([("fan", True)], current={"fan": True}) == []
+    assert [commands for commands, _ in dispatcher.sent] == [[("main", "/fan/on")]]
+
+
+def test_failed_route_is_resent():
+    queue, dispatcher = make_queue()
+    queue.submit([("fan", True)], current={"fan": False})
+    commands, callback = dispatcher.sent[-1]
+    callback(report(commands, ok=False))
+    # The controller already shows ON, but the board never confirmed it
+    queue.submit([("fan", True)], current={"fan": True})
+    assert len(dispatcher.sent) == 2
+
+
+def test_batch_reply_replaces_the_sent_state():
+    queue, dispatcher = make_queue(batch=True)
+    queue.submit([("fan", True), ("light", True)], current={"fan": False, "light": False})
+    commands, callback = dispatcher.sent[-1]
+    assert commands == [("main", "/batch?m=3&s=3")]
+    callback(report(commands, body="1"))  # the fan relay did not switch
+    queue.submit([("fan", True)], current={"fan": True})
+    assert dispatcher.sent[-1][0] == [("main", "/fan/on")]
+
+
+def test_stale_batch_reply_is_ignored():
+    queue, dispatcher = make_queue(batch=True)
+    queue.submit([("fan", True), ("light", True)], current={"fan": False, "light": False})
+    first, first_callback = dispatcher.sent[-1]
+    queue.submit([("fan", False)], current={"fan": True, "light": True})
+    # The first /batch reply (fan ON) arrives after the fan was switched OFF again
+    first_callback(report(first, body="3"))
+    queue.submit([("fan", False)], current={"fan": False})
+    assert len(dispatcher.sent) == 2
@@ -0,0 +1,51 @@
+# IntentEngine: multi-clause commands, action inheritance, questions and negations
+import pytest
+
+from bench_intents import CASES
+from intent_engine import IntentEngine, Intent
+
+ENGINE = IntentEngine()
+
+MORE_CASES = [
+    ("light on", (("light", True),)),
+    ("put the tv on", (("tv", True),)),
+    ("please turn on the ac", (("ac", True),)),
+    ("turn on fan and light and tv", (("fan", True), ("light", True), ("tv", True))),
+    # A clause with no action of its own takes the previous clause's action
+    ("turn the fan on and the light", (("fan", True), ("light", True))),
+    ("turn off the fan, the light", (("fan", False), ("light", False))),
+    ("fan on and light", (("fan", True), ("light", True))),
+    ("switch the ac on then the fan off", (("ac", True), ("fan", False))),
+    ("दिवा चालू करा", (("light", True),)),
+    # A bare on/off needs a verb or a device right before it
+    ("on", ()),
+    ("the tv", ()),
+    ("turn it on", ()),
+    # Questions and negations switch nothing
+    ("light on?", ()),
+    ("fan on or off", ()),
+    ("who turned the fan on", ()),
+    ("never switch off the fan", ()),
+]
+
+
+@pytest.mark.parametrize("text, expected", CASES + MORE_CASES)
+def test_parse(text, expected):
+    assert tuple(ENGINE.parse(text)) == expected
+
+
+def test_negated_clause_keeps_the_previous_action():
+    # The dropped clause must not leak its action into the next one
+    assert ENGINE.parse("turn on the fan, don't turn off the light, and the tv") == (
+        Intent("fan", True), Intent("tv", True))
+
+
+def test_parse_is_deterministic_without_the_cache():
+    uncached = IntentEngine(cache_size=0)
+    for text, expected in CASES:
+        assert tuple(uncached.parse(text)) == expected
+
+
+def test_parse_device_returns_the_last_action():
+    assert ENGINE.parse_device("turn on the fan then turn off the fan", "fan") is False
+    assert ENGINE.parse_device("turn on the fan", "light") is None
@@ -0,0 +1,111 @@
+# UiDispatcher and ActivityLog failure paths, on a fake Tk root
+import logging
+
+from activity_log import ActivityLog
+from ui_dispatcher import UiDispatcher
+
+
+class FakeRoot:
+    """after()/after_cancel()/bind() recorded instead of run; fail_after makes the next after() raise."""
+
+    def __init__(self):
+        self.timers = []
+        self.bindings = {}
+        self.fail_after = 0
+
+    def after(self, ms, func):
+        if self.fail_after:
+            self.fail_after -= 1
+            raise RuntimeError("main thread is not in main loop")
+        self.timers.append(func)
+        return f"after#{len(self.timers)}"
+
+    def after_cancel(self, timer_id):
+        pass
+
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+
+    def run_timers(self):
+        timers, self.timers = self.timers, []
+        for func in timers:
+            func()
+
+
+class FakeEvent:
+    def __init__(self, widget):
+        self.widget = widget
+
+
+def test_failed_schedule_is_retried_on_the_next_post():
+    root = FakeRoot()
+    ui = UiDispatcher(root)
+    applied = []
+    root.fail_after = 1
+    ui.post("status", applied.append, "first")
+    assert not ui.closed
+    assert root.timers == []
+    ui.post("status", applied.append, "second")
+    root.run_timers()
+    assert applied == ["second"]
+
+
+def test_handler_error_is_logged_and_the_rest_still_run(caplog):
+    root = FakeRoot()
+    ui = UiDispatcher(root)
+    applied = []
+    ui.call(lambda: 1 / 0)
+    ui.call(applied.append, "call")
+    ui.post("label", applied.append, "post")
+    with caplog.at_level(logging.ERROR, logger="ui_dispatcher"):
+        root.run_timers()
+    assert applied == ["call", "post"]
+    assert ui.errors == 1
+    assert "ZeroDivisionError" in caplog.text
+
+
+def test_only_the_root_destroy_closes():
+    root = FakeRoot()
+    ui = UiDispatcher(root)
+    root.bindings["<Destroy>"](FakeEvent(widget=object()))  # a child widget going away
+    assert not ui.closed
+    root.bindings["<Destroy>"](FakeEvent(widget=root))
+    assert ui.closed
+    ui.post("status", print, "late")
+    assert root.timers == []
+
+
+class FakeText:
+    """Just enough of a Tk text widget for ActivityLog.flush()."""
+
+    def __init__(self):
+        self.text = ""
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def yview(self):
+        return 0.0, 1.0
+
+    def insert(self, index, *chunks):
+        self.text += "".join(chunks[0::2])
+
+    def index(self, index):
+        return f"{self.text.count(chr(10)) + 1}.0"
+
+    def see(self, index):
+        pass
+
+
+def test_record_only_appends_and_the_timer_flushes():
+    root = FakeRoot()
+    widget = FakeText()
+    log = ActivityLog(flush_interval=0.1).attach(root, widget)
+    assert len(root.timers) == 1  # the flush timer, started by attach()
+    for i in range(10):
+        log.record(f"line {i}")
+    assert len(root.timers) == 1 and widget.text == ""
+    root.run_timers()
+    assert widget.text.count("line ") == 10
+    assert len(root.timers) == 1  # rescheduled
+    log.close()
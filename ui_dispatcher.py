@@ -0,0 +1,106 @@
+# Coalescing Tk update dispatcher: latest value per target, drained in one tick at a fixed rate
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class UiDispatcher:
+    """
+    Worker threads hand UI work to the Tk thread through two channels:
+
+    post(target, func, *args)  keeps only the latest pending call per target
+                               (preview image, status labels, chips); older
+                               ones are dropped and counted.
+    call(func, *args)          ordered one-off actions that must all run
+                               (commands, button state changes).
+
+    A single root.after() tick is scheduled when work arrives, no sooner than
+    1/rate seconds after the previous one, and drains everything pending:
+    calls first, in order, then the latest value of every target. A handler
+    that raises is logged with its traceback and counted; the rest still run.
+    If root.after() fails (a worker posting before mainloop has started),
+    the work stays pending and the next post tries again; only close() or
+    the root's <Destroy> stop the dispatcher.
+    """
+
+    def __init__(self, root, rate=30.0):
+        self.root = root
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._latest = {}       # target -> (posted_at, func, args, kwargs)
+        self._calls = []        # (posted_at, func, args, kwargs)
+        self._scheduled = False
+        self._last_tick = 0.0
+        self.closed = False
+        # Counters
+        self.posted = 0
+        self.applied = 0
+        self.dropped = {}
+        self.ticks = 0
+        self.errors = 0
+        self.max_latency = 0.0
+        root.bind("<Destroy>", self._on_destroy, add="+")
+
+    def post(self, target, func, *args, **kwargs):
+        with self._lock:
+            if target in self._latest:
+                self.dropped[target] = self.dropped.get(target, 0) + 1
+            self._latest[target] = (time.monotonic(), func, args, kwargs)
+            self.posted += 1
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            self._schedule()
+
+    def call(self, func, *args, **kwargs):
+        with self._lock:
+            self._calls.append((time.monotonic(), func, args, kwargs))
+            self.posted += 1
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            self._schedule()
+
+    def _schedule(self):
+        if self.closed:
+            return
+        delay = max(0.0, self._last_tick + self.interval - time.monotonic())
+        try:
+            self.root.after(int(delay * 1000), self._tick)
+        except Exception:
+            log.debug("UI tick not scheduled, retrying on the next post", exc_info=True)
+            with self._lock:
+                self._scheduled = False
+
+    def _tick(self):
+        with self._lock:
+            calls, self._calls = self._calls, []
+            latest, self._latest = self._latest, {}
+            self._scheduled = False
+        self._last_tick = now = time.monotonic()
+        self.ticks += 1
+        for posted_at, func, args, kwargs in calls + list(latest.values()):
+            self.max_latency = max(self.max_latency, now - posted_at)
+            try:
+                func(*args, **kwargs)
+                self.applied += 1
+            except Exception:
+                self.errors += 1
+                log.exception("UI update %s failed", getattr(func, "__qualname__", func))
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.close()
+
+    def close(self):
+        self.closed = True
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._calls) + len(self._latest)
+            dropped = dict(self.dropped)
+        return {"posted": self.posted, "applied": self.applied, "dropped": dropped,
+                "dropped_total": sum(dropped.values()), "ticks": self.ticks, "pending": pending,
+                "errors": self.errors, "max_latency_ms": self.max_latency * 1000}
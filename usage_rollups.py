@@ -0,0 +1,113 @@
+# Running per-device ON-time totals in hour / day / week buckets
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+HOUR, DAY, WEEK = 0, 1, 2
+PERIODS = {"hour": HOUR, "day": DAY, "week": WEEK}
+
+
+def bucket_start(period, ts):
+    """Start of the local hour / day / week (Monday) containing ts."""
+    dt = datetime.fromtimestamp(ts)
+    if period == HOUR:
+        return dt.replace(minute=0, second=0, microsecond=0).timestamp()
+    dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == WEEK:
+        dt -= timedelta(days=dt.weekday())
+    return dt.timestamp()
+
+
+@lru_cache(maxsize=4096)
+def next_bucket(period, start):
+    if period == HOUR:
+        return start + 3600
+    days = 7 if period == WEEK else 1
+    # Calendar arithmetic so DST days are 23 or 25 hours long
+    return (datetime.fromtimestamp(start) + timedelta(days=days)).replace(hour=0).timestamp()
+
+
+def split(period, start, end):
+    """[(bucket, seconds)] covering the interval [start, end)."""
+    pieces = []
+    bucket = bucket_start(period, start)
+    while start < end:
+        edge = min(next_bucket(period, bucket), end)
+        pieces.append((bucket, edge - start))
+        start, bucket = edge, next_bucket(period, bucket)
+    return pieces
+
+
+class UsageRollups:
+    """
+    Closed ON intervals are added to every hour, day and week bucket they
+    overlap when the device switches OFF; the interval still open is kept as
+    on_since and added at query time. Every query is a dict lookup per device,
+    independent of how much history exists.
+
+    apply() returns the bucket deltas it added, (period, bucket, device,
+    seconds), so a store can persist exactly the same increments. Hour
+    buckets older than hour_retention seconds are pruned from memory by
+    prune(); day and week buckets are kept.
+    """
+
+    def __init__(self, hour_retention=8 * 86400):
+        self.hour_retention = hour_retention
+        self.totals = {}       # (period, bucket, device) -> seconds
+        self.on_since = {}     # device -> ts it switched ON, for devices currently ON
+
+    def apply(self, device, state, ts):
+        if state:
+            self.on_since.setdefault(device, ts)
+            return []
+        start = self.on_since.pop(device, None)
+        if start is None or ts <= start:
+            return []
+        deltas = [(period, bucket, device, seconds)
+                  for period in (HOUR, DAY, WEEK) for bucket, seconds in split(period, start, ts)]
+        for period, bucket, _, seconds in deltas:
+            self.add(period, bucket, device, seconds)
+        return deltas
+
+    def add(self, period, bucket, device, seconds):
+        key = (period, bucket, device)
+        self.totals[key] = self.totals.get(key, 0.0) + seconds
+
+    def prune(self, now=None):
+        cutoff = (time.time() if now is None else now) - self.hour_retention
+        for key in [k for k in self.totals if k[0] == HOUR and k[1] < cutoff]:
+            del self.totals[key]
+
+    # ---------- Queries ----------
+    def on_duration(self, device, now=None):
+        """Seconds the device has been ON continuously, 0 when it is OFF."""
+        start = self.on_since.get(device)
+        if start is None:
+            return 0.0
+        return max(0.0, (time.time() if now is None else now) - start)
+
+    def total(self, device, period="day", ts=None, now=None):
+        """ON seconds in the bucket containing ts (default: the current one), open interval included."""
+        return self.summary((device,), period, ts, now)[device]
+
+    def summary(self, devices, period="day", ts=None, now=None):
+        """{device: ON seconds} for one bucket."""
+        now = time.time() if now is None else now
+        period = PERIODS.get(period, period)
+        bucket = bucket_start(period, now if ts is None else ts)
+        end = min(now, next_bucket(period, bucket))
+        totals, on_since = self.totals, self.on_since
+        usage = {}
+        for device in devices:
+            seconds = totals.get((period, bucket, device), 0.0)
+            start = on_since.get(device)
+            if start is not None:
+                seconds += max(0.0, end - max(start, bucket))
+            usage[device] = seconds
+        return usage
+
+    def running_longer_than(self, seconds, now=None):
+        """Devices ON continuously for more than `seconds`, longest first."""
+        now = time.time() if now is None else now
+        long_running = [(now - start, device) for device, start in self.on_since.items() if now - start > seconds]
+        return [device for _, device in sorted(long_running, reverse=True)]
@@ -0,0 +1,356 @@
+# Append-only device usage log: SQLite in WAL mode, written by a background batching thread
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from intent_engine import DEVICES
+from usage_rollups import DAY, HOUR, PERIODS, UsageRollups, bucket_start, next_bucket
+
+DEFAULT_PATH = os.environ.get("SMART_HOME_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "usage.db"))
+
+# Events are stored as small integers; the order of SOURCES is part of the file format.
+# Device codes live in the devices table (the built-in DEVICES keep codes 0-3).
+SOURCES = ("manual", "voice", "gesture", "chat", "system", "api", "timer")
+SOURCE_CODES = {source: i for i, source in enumerate(SOURCES)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id     INTEGER PRIMARY KEY,
+    ts     REAL    NOT NULL,
+    device INTEGER NOT NULL,
+    state  INTEGER NOT NULL,
+    source INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_device_ts ON events (device, ts);
+CREATE TABLE IF NOT EXISTS devices (
+    code INTEGER PRIMARY KEY,
+    name TEXT    NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    period  INTEGER NOT NULL,
+    bucket  REAL    NOT NULL,
+    device  INTEGER NOT NULL,
+    seconds REAL    NOT NULL,
+    PRIMARY KEY (period, bucket, device)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value
+);
+"""
+
+UPSERT_ROLLUP = ("INSERT INTO rollups (period, bucket, device, seconds) VALUES (?, ?, ?, ?) "
+                 "ON CONFLICT (period, bucket, device) DO UPDATE SET seconds = seconds + excluded.seconds")
+
+
+class UsageEvent(NamedTuple):
+    ts: float
+    device: str
+    state: bool
+    source: str
+
+
+def day_start(ts):
+    """Local midnight at or before ts, as a Unix timestamp."""
+    return bucket_start(DAY, ts)
+
+
+class UsageStore:
+    """
+    record() only drops a transition into an in-memory queue, so it is safe
+    (and cheap) on the Tk thread. A writer thread commits queued events in
+    batches of up to batch_size, at most every flush_interval seconds.
+
+    Only real transitions are stored: recording the state a device is
+    already in is a no-op. The latest state per device is kept in memory, so
+    current_state()/on_duration() never touch the disk; range queries go
+    through the (ts) and (device, ts) indexes and read only the rows in range.
+    Events still in the queue become visible to range queries after the
+    next batch commit (or flush()).
+
+    Hour/day/week ON-time rollups are updated in memory by record() and
+    persisted in the same transaction as the events they came from. On open,
+    a rollup checkpoint that does not match the event log (a database from
+    before rollups, or one edited by hand) starts a rebuild on the writer
+    thread, which can take tens of seconds on years of history; until it
+    finishes (rebuilding is True) summaries are computed from the raw log,
+    where events still being queued behind the rebuild are not visible yet.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=256, flush_interval=0.5, hour_retention=8 * 86400):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+        self.rollups = UsageRollups(hour_retention)
+        self.rebuilding = False
+        self._since_rebuild = None  # transitions recorded while a rebuild runs, replayed onto its result
+        self._codes, self._names = self._load_devices()
+        self._last = self._load_last()
+        self.error = None
+        self._load_rollups()
+        # Counters
+        self.recorded = 0
+        self.ignored = 0
+        self.written = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="usage-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _load_devices(self):
+        self._reader.executemany("INSERT OR IGNORE INTO devices (code, name) VALUES (?, ?)", enumerate(DEVICES))
+        rows = self._reader.execute("SELECT code, name FROM devices").fetchall()
+        return {name: code for code, name in rows}, {code: name for code, name in rows}
+
+    def _load_last(self):
+        last = {}
+        for device, code in self._codes.items():
+            row = self._reader.execute("SELECT ts, state FROM events WHERE device = ? ORDER BY ts DESC LIMIT 1",
+                                       (code,)).fetchone()
+            last[device] = (bool(row[1]), row[0]) if row else (False, None)
+        return last
+
+    def _load_rollups(self):
+        checkpoint = self._reader.execute("SELECT value FROM meta WHERE key = 'rollup_event_id'").fetchone()
+        last_id = self._reader.execute("SELECT coalesce(max(id), 0) FROM events").fetchone()[0]
+        for device, (state, since) in self._last.items():
+            if state:
+                self.rollups.on_since[device] = since  # on_duration() works before any rebuild ends
+        if checkpoint is None or checkpoint[0] != last_id:
+            self._start_rebuild()
+            return
+        cutoff = time.time() - self.rollups.hour_retention
+        rows = self._reader.execute("SELECT period, bucket, device, seconds FROM rollups "
+                                    "WHERE period != ? OR bucket >= ?", (HOUR, cutoff))
+        for period, bucket, code, seconds in rows:
+            self.rollups.add(period, bucket, self._names[code], seconds)
+
+    def rebuild_rollups(self, timeout=None):
+        """Recompute every rollup bucket by replaying the raw event log (e.g. after a crash); waits for it."""
+        return self._start_rebuild().wait(timeout)
+
+    def _start_rebuild(self):
+        done = threading.Event()
+        with self._lock:
+            self.rebuilding = True
+            if self._since_rebuild is None:
+                self._since_rebuild = []
+            self._queue.put(("rebuild", done))
+        return done
+
+    def _rebuild_rollups(self, conn):
+        # Writer thread: everything queued before the rebuild is committed, everything after waits for it
+        rollups = UsageRollups(self.rollups.hour_retention)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last_id = conn.execute("SELECT coalesce(max(id), 0) FROM events").fetchone()[0]
+            for _, ts, code, state in conn.execute("SELECT id, ts, device, state FROM events "
+                                                   "WHERE id <= ? ORDER BY ts, id", (last_id,)):
+                rollups.apply(self._names[code], bool(state), ts)
+            conn.execute("DELETE FROM rollups")
+            conn.executemany("INSERT INTO rollups (period, bucket, device, seconds) VALUES (?, ?, ?, ?)",
+                             ((period, bucket, self._codes[device], seconds)
+                              for (period, bucket, device), seconds in rollups.totals.items()))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rollup_event_id', ?)", (last_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        rollups.prune()
+        with self._lock:
+            for device, state, ts in self._since_rebuild or ():
+                rollups.apply(device, state, ts)
+            for device, (state, since) in self._last.items():
+                if state:
+                    rollups.on_since.setdefault(device, since)
+            self.rollups = rollups
+            self._since_rebuild = None
+            self.rebuilding = False
+
+    # ---------- Writes ----------
+    def record(self, device, state, source="manual", ts=None):
+        """Queue a transition; returns False when the device was already in that state."""
+        ts = time.time() if ts is None else ts
+        state = bool(state)
+        with self._lock:
+            if device not in self._codes:
+                code = max(self._names, default=-1) + 1
+                self._codes[device], self._names[code] = code, device
+                self._last[device] = (False, None)
+                self._queue.put(("device", code, device))
+            if self._last[device][0] == state:
+                self.ignored += 1
+                return False
+            self._last[device] = (state, ts)
+            deltas = self.rollups.apply(device, state, ts)
+            if self._since_rebuild is not None:
+                self._since_rebuild.append((device, state, ts))
+            self.recorded += 1
+            if self.recorded % 1024 == 0:
+                self.rollups.prune()
+        code = self._codes[device]
+        self._queue.put(("event", (ts, code, int(state), SOURCE_CODES[source]),
+                         [(period, bucket, code, seconds) for period, bucket, _, seconds in deltas]))
+        return True
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+        with self._read_lock:
+            self._reader.close()
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            events, deltas, devices, waiters, rebuild = [], [], [], [], None
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item[0] == "rebuild":
+                    rebuild = item[1]
+                elif item[0] == "device":
+                    devices.append(item[1:])
+                else:
+                    events.append(item[1])
+                    deltas += item[2]
+                if stopping or waiters or rebuild or len(events) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if events or devices:
+                try:
+                    with conn:
+                        conn.execute("BEGIN")
+                        conn.executemany("INSERT OR IGNORE INTO devices (code, name) VALUES (?, ?)", devices)
+                        conn.executemany("INSERT INTO events (ts, device, state, source) VALUES (?, ?, ?, ?)",
+                                         events)
+                        conn.executemany(UPSERT_ROLLUP, deltas)
+                        conn.execute("INSERT OR REPLACE INTO meta (key, value) "
+                                     "SELECT 'rollup_event_id', coalesce(max(id), 0) FROM events")
+                    self.written += len(events)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    self.error = e
+            if rebuild is not None:
+                try:
+                    self._rebuild_rollups(conn)
+                except sqlite3.Error as e:
+                    self.error = e
+                    with self._lock:
+                        self.rebuilding = False  # summaries stay on the raw log
+                rebuild.set()
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    # ---------- Queries ----------
+    def current_state(self, device):
+        """(state, since) from memory; since is None for a device never recorded."""
+        with self._lock:
+            return self._last.get(device, (False, None))
+
+    def on_duration(self, device, now=None):
+        """Seconds the device has been ON continuously, 0 when it is OFF."""
+        with self._lock:
+            return self.rollups.on_duration(device, now)
+
+    def running_longer_than(self, seconds, now=None):
+        """Devices that have been ON for more than `seconds` ("Fan has been ON for 2 hours")."""
+        with self._lock:
+            return self.rollups.running_longer_than(seconds, now)
+
+    def usage(self, device, period="day", ts=None, now=None):
+        """ON seconds of one device in the hour/day/week containing ts (default: now)."""
+        return self.summary(period, ts, now, (device,))[device]
+
+    def summary(self, period="day", ts=None, now=None, devices=None):
+        """{device: ON seconds} for the hour/day/week containing ts (default: now)."""
+        now = time.time() if now is None else now
+        ts = now if ts is None else ts
+        devices = self.devices if devices is None else devices
+        if self.rebuilding:
+            period = PERIODS.get(period, period)
+            start = bucket_start(period, ts)
+            end = next_bucket(period, start)
+            return {device: self.on_seconds(device, start, end, now) if device in self._codes else 0.0
+                    for device in devices}
+        if PERIODS.get(period, period) == HOUR and ts < now - self.rollups.hour_retention:
+            # Old hour buckets are only kept on disk
+            with self._read_lock:
+                rows = dict(self._reader.execute("SELECT device, seconds FROM rollups WHERE period = ? AND bucket = ?",
+                                                 (HOUR, bucket_start(HOUR, ts))).fetchall())
+            return {device: rows.get(self._codes.get(device), 0.0) for device in devices}
+        with self._lock:
+            return self.rollups.summary(devices, period, ts, now)
+
+    @property
+    def devices(self):
+        return list(self._codes)
+
+    def changes_since(self, since):
+        """Every event with ts >= since, oldest first."""
+        with self._read_lock:
+            rows = self._reader.execute("SELECT ts, device, state, source FROM events WHERE ts >= ? ORDER BY ts",
+                                        (since,)).fetchall()
+        return [UsageEvent(ts, self._names[code], bool(state), SOURCES[source]) for ts, code, state, source in rows]
+
+    def recent_changes(self, seconds=3600, now=None):
+        return self.changes_since((time.time() if now is None else now) - seconds)
+
+    def on_seconds(self, device, start, end, now=None):
+        """Total ON time of a device within [start, end), from the raw log."""
+        code = self._codes[device]
+        with self._read_lock:
+            before = self._reader.execute("SELECT state FROM events WHERE device = ? AND ts < ? "
+                                          "ORDER BY ts DESC LIMIT 1", (code, start)).fetchone()
+            rows = self._reader.execute("SELECT ts, state FROM events WHERE device = ? AND ts >= ? AND ts < ? "
+                                        "ORDER BY ts", (code, start, end)).fetchall()
+        total, on_since = 0.0, start if before and before[0] else None
+        for ts, state in rows:
+            if state and on_since is None:
+                on_since = ts
+            elif not state and on_since is not None:
+                total += ts - on_since
+                on_since = None
+        if on_since is not None:
+            total += min(end, time.time() if now is None else now) - on_since
+        return max(0.0, total)
+
+    def daily_usage(self, days=7, now=None):
+        """{date: {device: ON seconds}} for the last `days` local days, today included."""
+        now = time.time() if now is None else now
+        first = datetime.fromtimestamp(day_start(now)) - timedelta(days=days - 1)
+        return {(first + timedelta(days=i)).date(): self.summary("day", (first + timedelta(days=i)).timestamp(), now)
+                for i in range(days)}
+
+    def stats(self):
+        return {"recorded": self.recorded, "ignored": self.ignored, "written": self.written,
+                "batches": self.batches, "queued": self._queue.qsize(), "rebuilding": self.rebuilding}
@@ -1,39 +1,50 @@
 # Working voice module py file
 import speech_recognition as sr
-import re
+
+from intent_engine import get_engine
+from recognizers import build_recognizer
+from voice_frontend import VoiceFrontend
+
+_frontend = None
+_recognizer = None
 
 def listen_for_command():
     """
     Listen for voice input and convert it to text
     Returns the recognized text or None if recognition fails
     """
-    recognizer = sr.Recognizer()
-    microphone = sr.Microphone()
+    global _frontend, _recognizer
+    # The microphone stays open between calls; the noise floor is learnt once
+    # and keeps adapting, so there is no calibration pause before each command
+    if _frontend is None:
+        _frontend = VoiceFrontend().start()
+    if _recognizer is None:
+        _recognizer = build_recognizer()
     
     print("Listening for command... (speak now)")
     
-    with microphone as source:
-        # Adjust for ambient noise
-        recognizer.adjust_for_ambient_noise(source, duration=1)
-        try:
-            # Listen for audio with timeout
-            audio = recognizer.listen(source, timeout=5, phrase_time_limit=3)
-            print("Processing...")
-            
-            # Convert speech to text using Google's speech recognition
-            text = recognizer.recognize_google(audio)
-            print(f"You said: '{text}'")
-            return text.lower()
-            
-        except sr.WaitTimeoutError:
+    audio = _frontend.next_utterance(timeout=5)
+    if audio is None:
+        if _frontend.error is not None:
+            print(f"Microphone error: {_frontend.error}")
+            _frontend = None
+        else:
             print("Timeout: No speech detected")
-            return None
-        except sr.UnknownValueError:
-            print("Could not understand the audio")
-            return None
-        except sr.RequestError as e:
-            print(f"Error with speech recognition service: {e}")
-            return None
+        return None
+    try:
+        print("Processing...")
+        
+        # Offline command recogniser first, Google speech recognition as fallback
+        text = _recognizer.recognize(audio, "en-IN")
+        print(f"You said: '{text}' ({_recognizer.last_backend})")
+        return text
+        
+    except sr.UnknownValueError:
+        print("Could not understand the audio")
+        return None
+    except sr.RequestError as e:
+        print(f"Error with speech recognition service: {e}")
+        return None
 
 def process_fan_command(text):
     """
@@ -43,36 +54,8 @@ def process_fan_command(text):
     if text is None:
         return None
     
-    # Define patterns for turn on commands
-    turn_on_patterns = [
-        r'turn\s+on\s+.*fan',
-        r'switch\s+on\s+.*fan',
-        r'start\s+.*fan',
-        r'fan\s+on',
-        r'turn\s+.*fan\s+on'
-    ]
-    
-    # Define patterns for turn off commands
-    turn_off_patterns = [
-        r'turn\s+off\s+.*fan',
-        r'switch\s+off\s+.*fan',
-        r'stop\s+.*fan',
-        r'fan\s+off',
-        r'turn\s+.*fan\s+off'
-    ]
-    
-    # Check for turn on patterns
-    for pattern in turn_on_patterns:
-        if re.search(pattern, text):
-            return True
-    
-    # Check for turn off patterns
-    for pattern in turn_off_patterns:
-        if re.search(pattern, text):
-            return False
-    
-    # If no pattern matches, return None
-    return None
+    # All phrase/alias matching lives in the shared intent engine
+    return get_engine().parse_device(text, "fan")
 
 def main():
     """
@@ -0,0 +1,283 @@
+# Persistent microphone stream with streaming voice-activity detection
+import queue
+import threading
+import time
+
+import numpy as np
+
+from metrics import METRICS
+
+try:
+    import speech_recognition as sr
+except Exception:
+    sr = None
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+SAMPLE_WIDTH = 2  # int16
+
+
+class RingBuffer:
+    """Fixed-size int16 ring holding the most recent audio (for pre-roll)."""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.write = 0
+        self.filled = 0
+
+    def extend(self, samples):
+        n = len(samples)
+        if n >= self.capacity:
+            self.data[:] = samples[-self.capacity:]
+            self.write, self.filled = 0, self.capacity
+            return
+        end = self.write + n
+        if end <= self.capacity:
+            self.data[self.write:end] = samples
+        else:
+            split = self.capacity - self.write
+            self.data[self.write:] = samples[:split]
+            self.data[:n - split] = samples[split:]
+        self.write = end % self.capacity
+        self.filled = min(self.capacity, self.filled + n)
+
+    def latest(self, n):
+        """Copy of the last n samples, oldest first."""
+        n = min(n, self.filled)
+        start = (self.write - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.data[start:start + n].copy()
+        return np.concatenate((self.data[start:], self.data[:self.write]))
+
+
+class VoiceActivityDetector:
+    """
+    Energy + zero-crossing VAD over fixed 20 ms frames.
+
+    The noise floor is seeded from the first calibrate_ms of audio, then keeps
+    adapting in the background on frames judged to be silence, so there is no
+    per-command calibration pause. A frame is speech when its RMS is well above
+    the floor (energy_ratio) and its zero-crossing rate is not noise-like.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, energy_ratio=3.0, min_rms=80.0,
+                 max_zcr=0.35, calibrate_ms=300, adapt_rate=0.05):
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.energy_ratio = energy_ratio
+        self.min_rms = min_rms
+        self.max_zcr = max_zcr
+        self.calibrate_frames = max(1, calibrate_ms // frame_ms)
+        self.adapt_rate = adapt_rate
+        self.noise_floor = None
+        self._calibration = []
+
+    def features(self, frames):
+        """RMS and zero-crossing rate for a (n, frame_len) block, vectorized."""
+        x = frames.astype(np.float32)
+        rms = np.sqrt(np.mean(x * x, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(frames.shape[1])
+        return rms, zcr
+
+    def classify(self, frames):
+        """Speech flag per frame; updates the noise floor as a side effect."""
+        rms, zcr = self.features(frames)
+        flags = np.zeros(len(rms), dtype=bool)
+        for i, (energy, crossings) in enumerate(zip(rms.tolist(), zcr.tolist())):
+            if self.noise_floor is None:
+                self._calibration.append(energy)
+                if len(self._calibration) >= self.calibrate_frames:
+                    self.noise_floor = max(float(np.median(self._calibration)), 1.0)
+                continue
+            threshold = max(self.noise_floor * self.energy_ratio, self.min_rms)
+            speech = energy > threshold and crossings < self.max_zcr
+            if not speech:
+                self.noise_floor += self.adapt_rate * (energy - self.noise_floor)
+                self.noise_floor = max(self.noise_floor, 1.0)
+            flags[i] = speech
+        return flags
+
+
+class Segmenter:
+    """
+    Turns a continuous int16 stream into utterance segments.
+
+    A segment opens after start_ms of consecutive speech (including pre_roll_ms
+    of audio before it) and closes after end_ms of silence, or at max_ms.
+    feed() returns the segments completed by that chunk together with the
+    stream position (in samples) at which each one closed; speech_spans then
+    holds, for the same segments, the (start, end) stream positions of the
+    speech itself, without the pre-roll and the closing silence.
+    """
+
+    def __init__(self, vad=None, sample_rate=SAMPLE_RATE, start_ms=60, end_ms=300,
+                 pre_roll_ms=300, max_ms=6000, min_ms=200):
+        self.vad = vad or VoiceActivityDetector(sample_rate)
+        self.sample_rate = sample_rate
+        self.frame_len = self.vad.frame_len
+        frame_ms = 1000 * self.frame_len // sample_rate
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_ms // frame_ms)
+        self.pre_roll = pre_roll_ms * sample_rate // 1000
+        self.max_frames = max_ms // frame_ms
+        self.min_frames = min_ms // frame_ms
+        self.ring = RingBuffer(self.pre_roll + self.frame_len * (self.start_frames + 1))
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._segment = None
+        self._speech_run = 0
+        self._silence_run = 0
+        self._frames_in_segment = 0
+        self._speech_start = 0
+        self.position = 0      # samples consumed so far
+        self.in_speech = False
+        self.speech_spans = []
+
+    def feed(self, samples):
+        samples = np.frombuffer(samples, dtype=np.int16) if isinstance(samples, (bytes, bytearray)) else samples
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        n_frames = len(samples) // self.frame_len
+        usable = n_frames * self.frame_len
+        self._pending = samples[usable:].copy()
+        self.speech_spans = []
+        if n_frames == 0:
+            return []
+        frames = samples[:usable].reshape(n_frames, self.frame_len)
+        flags = self.vad.classify(frames)
+
+        done = []
+        for frame, speech in zip(frames, flags.tolist()):
+            self.position += self.frame_len
+            # Always, so the next segment's pre-roll is the audio just before it even when segments are close
+            self.ring.extend(frame)
+            if self._segment is None:
+                self._speech_run = self._speech_run + 1 if speech else 0
+                if self._speech_run >= self.start_frames:
+                    self._segment = [self.ring.latest(self.pre_roll + self._speech_run * self.frame_len)]
+                    self._frames_in_segment = self._speech_run
+                    self._speech_start = self.position - self._speech_run * self.frame_len
+                    self._silence_run = 0
+                    self.in_speech = True
+                continue
+            self._segment.append(frame.copy())
+            self._frames_in_segment += 1
+            self._silence_run = 0 if speech else self._silence_run + 1
+            if self._silence_run >= self.end_frames or self._frames_in_segment >= self.max_frames:
+                audio = np.concatenate(self._segment)
+                if self._frames_in_segment - self._silence_run >= self.min_frames:
+                    done.append((audio, self.position))
+                    self.speech_spans.append((self._speech_start, self.position - self._silence_run * self.frame_len))
+                self._segment = None
+                self._speech_run = 0
+                self.in_speech = False
+        return done
+
+
+class VoiceFrontend:
+    """
+    Keeps one microphone stream open for the whole session and publishes
+    finished utterances to a queue as speech_recognition AudioData, ready
+    for recognize_google() or any other backend.
+
+    source is any input_sources audio source (default: the microphone).
+    With a live source a full queue drops the oldest utterance; a recording
+    replayed as fast as possible waits for the recogniser instead, and
+    finished is set once it has run out.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, device_index=None, segmenter=None, on_speech=None, source=None):
+        self.sample_rate = sample_rate
+        self.device_index = device_index
+        self.segmenter = segmenter or Segmenter(sample_rate=sample_rate)
+        self.on_speech = on_speech       # called with True/False when speech starts/ends
+        self.source = source
+        self.utterances = queue.Queue(maxsize=8)
+        self.error = None
+        self.running = False
+        self.finished = False
+        self.dropped = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.running = True
+            self._thread = threading.Thread(target=self._run, name="voice-frontend", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self):
+        if self.source is None:
+            from input_sources import MicrophoneSource
+
+            chunk = self.segmenter.frame_len * 5  # 100 ms reads
+            self.source = MicrophoneSource(self.sample_rate, self.device_index, chunk)
+        try:
+            self.source.open()
+            try:
+                while self.running:
+                    data = self.source.read()
+                    if data is None:
+                        self.finished = self.source.finished
+                        break
+                    self.feed(data)
+            finally:
+                self.source.close()
+        except Exception as e:
+            self.error = e
+        self.running = False
+
+    def feed(self, data):
+        """Push raw int16 audio (the capture thread does this for every read; benchmarks call it directly)."""
+        was_speaking = self.segmenter.in_speech
+        t0 = time.perf_counter()
+        segments = self.segmenter.feed(data)
+        METRICS.observe("voice_vad", time.perf_counter() - t0)
+        METRICS.tick("voice_capture")
+        mark = getattr(self.source, "mark", None)
+        if mark is not None:
+            for start, end in self.segmenter.speech_spans:
+                mark(start, end)
+        for samples, _ in segments:
+            audio = sr.AudioData(samples.tobytes(), self.sample_rate, SAMPLE_WIDTH) if sr else samples
+            self._put((time.perf_counter(), audio))
+        if self.on_speech is not None and self.segmenter.in_speech != was_speaking:
+            self.on_speech(self.segmenter.in_speech)
+
+    def _put(self, item):
+        if not getattr(self.source, "live", True):
+            # Replayed input: wait for the recogniser, nothing is lost
+            while self.running or self._thread is None:
+                try:
+                    self.utterances.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        try:
+            self.utterances.put_nowait(item)
+        except queue.Full:
+            # Recogniser is behind: drop the oldest utterance, keep the newest
+            try:
+                self.utterances.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            self.utterances.put_nowait(item)
+
+    def next_utterance(self, timeout=None, stamped=False):
+        """
+        Block for the next finished utterance; returns AudioData or None on
+        timeout. stamped=True returns (perf_counter() when it ended, AudioData).
+        """
+        try:
+            item = self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return item if stamped else item[1]
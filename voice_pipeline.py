@@ -0,0 +1,147 @@
+# Overlapped speech recognition: utterances decode concurrently, results apply in order
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RecognitionPipeline:
+    """
+    submit(audio) from the capture side; recognize_fn(audio) runs on a small
+    worker pool; on_result(result) / on_error(exc) are called from a single
+    applier thread in utterance order.
+
+    An utterance whose result is still missing after max_wait is skipped as
+    soon as a newer one has finished, so one slow cloud call cannot hold up
+    the commands behind it. A result that turns up after it was skipped, or
+    that is older than max_age by the time its turn comes, is stale and is
+    discarded instead of being applied out of order.
+    """
+
+    def __init__(self, recognize_fn, on_result, on_error=None, workers=3, max_in_flight=6,
+                 max_wait=4.0, max_age=10.0):
+        self.recognize_fn = recognize_fn
+        self.on_result = on_result
+        self.on_error = on_error
+        self.max_wait = max_wait
+        self.max_age = max_age
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="voice-recognize")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._cond = threading.Condition()
+        self._submitted = {}   # seq -> capture time, until applied or skipped
+        self._done = {}        # seq -> (result, error)
+        self._next_seq = 0     # next sequence number to hand out
+        self._apply_seq = 0    # next sequence number to apply
+        self.running = False
+        self._thread = None
+        # Counters
+        self.applied = 0
+        self.errors = 0
+        self.stale = 0
+        self.skipped = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.last_latency = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self.running = True
+            self._thread = threading.Thread(target=self._apply_loop, name="voice-apply", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, join_timeout=1.0):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._pool.shutdown(wait=False)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(join_timeout)
+        self._thread = None
+
+    def submit(self, audio, captured_at=None, timeout=None):
+        """
+        Queue an utterance for recognition; returns its sequence number, or
+        None when max_in_flight utterances are still decoding after timeout.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            return None
+        captured_at = time.monotonic() if captured_at is None else captured_at
+        with self._cond:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._submitted[seq] = captured_at
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            self._pool.submit(self._recognize, seq, audio)
+        except RuntimeError as e:  # pool already shut down
+            self._finish(seq, None, e)
+        return seq
+
+    def _recognize(self, seq, audio):
+        result, error = None, None
+        try:
+            result = self.recognize_fn(audio)
+        except Exception as e:
+            error = e
+        self._finish(seq, result, error)
+
+    def _finish(self, seq, result, error):
+        self._slots.release()
+        with self._cond:
+            self.in_flight -= 1
+            if seq < self._apply_seq:
+                self.stale += 1         # skipped while we were decoding
+                return
+            self._done[seq] = (result, error)
+            self._cond.notify_all()
+
+    def _next_ready(self):
+        """Pop the next result to apply, skipping hopeless ones; call with the lock held."""
+        while self._apply_seq < self._next_seq:
+            seq = self._apply_seq
+            if seq in self._done:
+                self._apply_seq += 1
+                captured_at = self._submitted.pop(seq)
+                result, error = self._done.pop(seq)
+                if time.monotonic() - captured_at > self.max_age:
+                    self.stale += 1
+                    continue
+                return seq, captured_at, result, error
+            newer_done = any(s > seq for s in self._done)
+            if newer_done and time.monotonic() - self._submitted[seq] > self.max_wait:
+                self._apply_seq += 1
+                self._submitted.pop(seq)
+                self.skipped += 1
+                continue
+            return None
+        return None
+
+    def _apply_loop(self):
+        while self.running:
+            with self._cond:
+                ready = self._next_ready()
+                if ready is None:
+                    self._cond.wait(0.1)
+                    continue
+            seq, captured_at, result, error = ready
+            try:
+                if error is None:
+                    self.on_result(result)
+                    self.applied += 1
+                else:
+                    self.errors += 1
+                    if self.on_error is not None:
+                        self.on_error(error)
+            except Exception as e:
+                self.errors += 1
+                if self.on_error is not None:
+                    self.on_error(e)
+            self.last_latency = time.monotonic() - captured_at
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._submitted)
+        return {"applied": self.applied, "errors": self.errors, "stale": self.stale,
+                "skipped": self.skipped, "pending": pending, "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight, "last_latency_ms": self.last_latency * 1000}